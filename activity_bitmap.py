@@ -0,0 +1,211 @@
+import datetime
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# ================= 配置区 =================
+# 几点之后还开着电脑算"加班"
+OVERTIME_HOUR = 20
+# ========================================
+
+MINUTES_PER_DAY = 1440
+BYTES_PER_DAY = MINUTES_PER_DAY // 8   # 每天正好 180 字节，按天切片不需要移位
+
+def popcount(x):
+    return bin(x).count('1')
+
+if hasattr(int, 'bit_count'):
+    popcount = int.bit_count
+
+class ActivityBitmap:
+    """
+    一年的分钟级活跃位图：每分钟 1 位，闰年 527040 位 ≈ 64 KB。
+    第 m 位对应当年本地时间 1 月 1 日 0 点之后的第 m 分钟 (按字节内从低位到高位排列)。
+    所有汇总 (每小时、每周几、每天、加班、连续活跃天数) 都从位图上做 popcount / NumPy 归约，
+    不同主机或不同年份的位图可以直接按位或、或者逐分钟求和。
+    """
+
+    def __init__(self, year, bits=None):
+        self.year = year
+        self.origin = datetime.datetime(year, 1, 1)
+        self.days = (datetime.date(year + 1, 1, 1) - datetime.date(year, 1, 1)).days
+        self.minutes = self.days * MINUTES_PER_DAY
+        self.bits = bytearray(bits) if bits is not None else bytearray(self.minutes // 8)
+
+    @classmethod
+    def from_intervals(cls, year, intervals):
+        """由 (epoch秒起点, epoch秒终点) 区间填充，超出当年的部分自动裁掉"""
+        bitmap = cls(year)
+        for start, end in intervals:
+            bitmap.add_interval(start, end)
+        return bitmap
+
+    def minute_of(self, ts):
+        """epoch 秒 -> 当年第几分钟 (本地挂钟时间，四舍五入到整分钟)"""
+        dt = datetime.datetime.fromtimestamp(ts)
+        return int(round((dt - self.origin).total_seconds() / 60))
+
+    def add_interval(self, start, end):
+        self.set_range(self.minute_of(start), self.minute_of(end))
+
+    def set_range(self, lo, hi):
+        """把 [lo, hi) 分钟置 1：两端的半个字节用掩码，中间整字节一次性切片赋值"""
+        lo, hi = max(lo, 0), min(hi, self.minutes)
+        if lo >= hi:
+            return
+        b0, b1 = lo >> 3, (hi - 1) >> 3
+        if b0 == b1:
+            self.bits[b0] |= ((1 << (hi - lo)) - 1) << (lo & 7)
+            return
+        self.bits[b0] |= (0xFF << (lo & 7)) & 0xFF
+        self.bits[b0 + 1:b1] = b'\xff' * (b1 - b0 - 1)
+        self.bits[b1] |= (1 << (((hi - 1) & 7) + 1)) - 1
+
+    def is_active(self, minute):
+        return bool(self.bits[minute >> 3] >> (minute & 7) & 1)
+
+    # ---------- 合并 ----------
+    def __or__(self, other):
+        """按"一年中的第几分钟"对齐做并集 (跨年合并时闰年多出的一天保留)"""
+        longer, shorter = (self, other) if len(self.bits) >= len(other.bits) else (other, self)
+        merged = bytearray(longer.bits)
+        n = len(shorter.bits)
+        merged[:n] = (int.from_bytes(merged[:n], 'little') | int.from_bytes(shorter.bits, 'little')).to_bytes(n, 'little')
+        return ActivityBitmap(longer.year, merged)
+
+    def active_minutes(self):
+        return popcount(int.from_bytes(self.bits, 'little'))
+
+    # ---------- 汇总 ----------
+    def day_matrix(self):
+        """NumPy 可用时返回 (天数, 1440) 的 0/1 矩阵"""
+        flat = np.unpackbits(np.frombuffer(bytes(self.bits), dtype=np.uint8), bitorder='little')
+        return flat.reshape(self.days, MINUTES_PER_DAY)
+
+    def rollups(self):
+        """
+        返回 {'per_day': [...], 'per_hour': [24], 'per_weekday': [7], 'overtime_minutes', 'overtime_days'}，
+        单位都是分钟。
+        """
+        if np is not None:
+            matrix = self.day_matrix()
+            by_hour = matrix.reshape(self.days, 24, 60).sum(axis=2, dtype=np.int64)   # (天数, 24)
+            per_day = by_hour.sum(axis=1).tolist()
+            per_hour = by_hour.sum(axis=0).tolist()
+            overtime = by_hour[:, OVERTIME_HOUR:].sum(axis=1).tolist()
+        else:
+            per_day, per_hour, overtime = [], [0] * 24, []
+            hour_mask = (1 << 60) - 1
+            for d in range(self.days):
+                day = int.from_bytes(self.bits[d * BYTES_PER_DAY:(d + 1) * BYTES_PER_DAY], 'little')
+                per_day.append(popcount(day))
+                late = 0
+                if day:
+                    for h in range(24):
+                        n = popcount((day >> (h * 60)) & hour_mask)
+                        per_hour[h] += n
+                        if h >= OVERTIME_HOUR:
+                            late += n
+                overtime.append(late)
+
+        per_weekday = [0] * 7
+        first_weekday = self.origin.weekday()
+        for d, minutes in enumerate(per_day):
+            per_weekday[(first_weekday + d) % 7] += minutes
+
+        return {
+            'per_day': per_day,
+            'per_hour': per_hour,
+            'per_weekday': per_weekday,
+            'overtime_minutes': sum(overtime),
+            'overtime_days': sum(1 for m in overtime if m > 0),
+        }
+
+    def longest_streak(self, per_day=None):
+        """最长连续活跃天数，返回 (天数, 起始日期)"""
+        per_day = per_day if per_day is not None else self.rollups()['per_day']
+        return longest_streak(per_day, self.origin.date())
+
+def longest_streak(per_day, first_day):
+    """per_day[i] 是 first_day 之后第 i 天的活跃分钟数，返回 (最长连续天数, 起始日期)"""
+    best, best_start, run, run_start = 0, None, 0, 0
+    for d, minutes in enumerate(per_day):
+        if minutes:
+            if run == 0:
+                run_start = d
+            run += 1
+            if run > best:
+                best, best_start = run, run_start
+        else:
+            run = 0
+    start = first_day + datetime.timedelta(days=best_start) if best else None
+    return best, start
+
+def bitmaps_from_index(index):
+    """按年份把活跃区间索引切成位图 {年份: ActivityBitmap}"""
+    bitmaps = {}
+    for year in sorted({d.year for d in index.day_span()}):
+        t1 = datetime.datetime(year, 1, 1).timestamp()
+        t2 = datetime.datetime(year + 1, 1, 1).timestamp()
+        bitmaps[year] = ActivityBitmap.from_intervals(year, index.slice(t1, t2).intervals())
+    return bitmaps
+
+def sum_bitmaps(bitmaps):
+    """
+    逐分钟求和：结果第 m 项表示有多少台主机 (或多少年) 在这一分钟活跃，
+    用于 fleet 视图的"同时在线"统计。有 NumPy 时返回 ndarray，否则返回 list。
+    """
+    length = max(b.minutes for b in bitmaps)
+    if np is not None:
+        total = np.zeros(length, dtype=np.int32)
+        for b in bitmaps:
+            flat = np.unpackbits(np.frombuffer(bytes(b.bits), dtype=np.uint8), bitorder='little')
+            total[:flat.size] += flat
+        return total
+    total = [0] * length
+    for b in bitmaps:
+        for i, byte in enumerate(b.bits):
+            if byte:
+                base = i * 8
+                for k in range(8):
+                    if byte >> k & 1:
+                        total[base + k] += 1
+    return total
+
+def summarize(bitmaps):
+    """
+    多个 (按年份连续的) 位图的汇总，单位分钟：
+    per_hour / per_weekday 逐项相加，per_day 展开成 {date: 分钟}，
+    连续活跃天数跨年拼接计算 (12-31 与次年 01-01 连在一起)。
+    """
+    per_hour, per_weekday = [0] * 24, [0] * 7
+    daily, timeline = {}, []
+    overtime_minutes = overtime_days = 0
+    first_day = None
+    for year in sorted(bitmaps):
+        bitmap = bitmaps[year]
+        r = bitmap.rollups()
+        for h in range(24):
+            per_hour[h] += r['per_hour'][h]
+        for w in range(7):
+            per_weekday[w] += r['per_weekday'][w]
+        overtime_minutes += r['overtime_minutes']
+        overtime_days += r['overtime_days']
+        origin = bitmap.origin.date()
+        if first_day is None:
+            first_day = origin
+        for d, minutes in enumerate(r['per_day']):
+            if minutes:
+                daily[origin + datetime.timedelta(days=d)] = minutes
+        timeline.extend(r['per_day'])
+    streak, streak_start = longest_streak(timeline, first_day) if timeline else (0, None)
+    return {
+        'per_hour': per_hour,
+        'per_weekday': per_weekday,
+        'per_day': daily,
+        'overtime_minutes': overtime_minutes,
+        'overtime_days': overtime_days,
+        'streak': {'days': streak, 'start': streak_start},
+    }
@@ -0,0 +1,350 @@
+import os
+import sys
+import json
+import math
+import time
+import datetime
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import tracing
+from columnar import photo_row, photo_from_row
+
+# ================= 配置区 =================
+# 后台扫描的读盘上限：每秒字节数 / 每秒文件数 (按实际读出的字节计，EXIF 只读文件头)
+MAX_BYTES_PER_SEC = 8 * 1024 * 1024
+MAX_FILES_PER_SEC = 40
+# 单张照片 打开+解析 的目标耗时；超过就把并发减半，低于则慢慢加回来 (AIMD)
+TARGET_LATENCY = 0.05
+MIN_WORKERS, MAX_WORKERS = 1, 8
+# 断点文件：遍历位置 + 已解析的记录 (每行一张)，扫描完成后自动删除
+CHECKPOINT_PATH = "lens_scan.checkpoint.json"
+# 每完成多少张写一次断点
+CHECKPOINT_EVERY = 200
+# ========================================
+
+VALID_EXTENSIONS = ('.jpg', '.jpeg')
+
+class TokenBucket:
+    """
+    令牌桶限速：rate 个/秒，最多攒 burst 个。
+    允许先用后还 (charge 可以把余额扣成负数)，下一次 wait 会等到还清为止——
+    实际读了多少字节要等读完才知道，这样限速的是真实读盘量。
+    """
+
+    def __init__(self, rate, burst=None):
+        self.rate = float(rate)
+        self.capacity = float(burst if burst is not None else rate)
+        self.tokens = self.capacity
+        self.last = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.last) * self.rate)
+        self.last = now
+
+    def charge(self, n):
+        with self.lock:
+            self._refill()
+            self.tokens -= n
+
+    def wait(self, n=0):
+        """等到余额够 n 个 (n=0 表示等到不再欠账)，然后扣掉 n"""
+        while True:
+            with self.lock:
+                self._refill()
+                if self.tokens >= n:
+                    self.tokens -= n
+                    return
+                delay = (n - self.tokens) / self.rate
+            time.sleep(min(delay, 1.0))
+
+class AIMDWindow:
+    """
+    并发窗口：读一张照片的耗时超过目标就减半 (乘性减)，否则每完成一张加 1/窗口 (加性增)，
+    与 TCP 拥塞控制相同。前台负载把磁盘占满时，扫描会自动退到单线程。
+    """
+
+    def __init__(self, target=TARGET_LATENCY, lo=MIN_WORKERS, hi=MAX_WORKERS):
+        self.target = target
+        self.lo, self.hi = lo, hi
+        self.size = float(lo)
+        self.in_flight = 0
+        self.cond = threading.Condition()
+
+    def acquire(self):
+        with self.cond:
+            while self.in_flight >= int(self.size):
+                self.cond.wait()
+            self.in_flight += 1
+
+    def release(self, latency):
+        with self.cond:
+            self.in_flight -= 1
+            if latency > self.target:
+                self.size = max(self.lo, self.size / 2)
+            else:
+                self.size = min(self.hi, self.size + 1 / self.size)
+            self.cond.notify_all()
+
+class CountingFile:
+    """包一层文件对象，统计 PIL 实际读出的字节数"""
+
+    def __init__(self, f):
+        self._f = f
+        self.bytes_read = 0
+
+    def read(self, *args):
+        data = self._f.read(*args)
+        self.bytes_read += len(data)
+        return data
+
+    def readinto(self, buf):
+        n = self._f.readinto(buf)
+        self.bytes_read += n or 0
+        return n
+
+    def __getattr__(self, name):
+        return getattr(self._f, name)
+
+_lowered = None
+
+def lower_priority():
+    """尽量把本进程的 CPU 与磁盘优先级调到最低，返回实际做了哪些调整 (同一进程只调一次)"""
+    global _lowered
+    if _lowered is None:
+        _lowered = _lower_priority()
+    return _lowered
+
+def _lower_priority():
+    done = []
+    if sys.platform == 'win32':
+        import ctypes
+        # PROCESS_MODE_BACKGROUND_BEGIN：同时降低 CPU、磁盘 I/O 和内存优先级
+        kernel32 = ctypes.windll.kernel32
+        if kernel32.SetPriorityClass(kernel32.GetCurrentProcess(), 0x00100000):
+            done.append('background mode')
+        return done
+    try:
+        os.nice(10)
+        done.append('nice +10')
+    except (AttributeError, OSError):
+        pass
+    if sys.platform.startswith('linux'):
+        # ioprio_set(IOPRIO_WHO_PROCESS, 0, IOPRIO_CLASS_IDLE)：只在磁盘空闲时读盘。
+        # 之后创建的线程会继承这个设置，所以要在启动线程池之前调用
+        import ctypes
+        import platform
+        nr = {'x86_64': 251, 'aarch64': 30, 'i686': 289, 'i386': 289}.get(platform.machine())
+        if nr is not None:
+            try:
+                libc = ctypes.CDLL(None, use_errno=True)
+                if libc.syscall(nr, 1, 0, 3 << 13) == 0:
+                    done.append('ioprio idle')
+            except OSError:
+                pass
+    return done
+
+def walk_key(parts):
+    """
+    相对路径 (拆成各级名字) 在遍历顺序里的排序键：同一目录下先文件后子目录，各自按名字排序，
+    与下面 os.walk + sort 的实际顺序一致。
+    """
+    return tuple((1, name) for name in parts[:-1]) + ((0, parts[-1]),)
+
+def walk_photos(folder_paths, after=None, resume=None):
+    """
+    按固定顺序 (目录、文件名排序) 流式遍历 JPG，不先列出全部文件，产出 (路径, 断点位置)。
+    断点位置是 [第几个文件夹, 相对该文件夹的路径 ('/' 分隔)]，与文件夹写成相对还是绝对路径无关。
+    after: 断点记录的最后一个已完成的位置，只产出排在它之后的文件。按排序比较而不是找同一个文件，
+    断点那张照片被删除或改名也能接着扫；整棵排在断点之前的子目录直接跳过，不进去遍历。
+    resume: 传入 dict 时，遍历越过断点位置 (遇到断点那张或任何排在它之后的文件) 会置 resume['found'] = True。
+    """
+    after_index, after_key = (after[0], walk_key(after[1].split('/'))) if after else (-1, None)
+    for index, folder in enumerate(folder_paths):
+        if index < after_index:
+            continue
+        skipping = index == after_index
+        for root, dirs, files in os.walk(folder):
+            rel_root = os.path.relpath(root, folder)
+            parts = [] if rel_root == os.curdir else rel_root.split(os.sep)
+            dirs.sort()
+            if skipping:
+                # 子树里的路径都以 prefix 开头：prefix 排在断点前面 (且不是断点的上级目录) 时整棵跳过
+                prefix = tuple((1, name) for name in parts)
+                dirs[:] = [d for d in dirs if prefix + ((1, d),) >= after_key[:len(prefix) + 1]]
+            for filename in sorted(files):
+                if not filename.lower().endswith(VALID_EXTENSIONS):
+                    continue
+                if skipping:
+                    key = walk_key(parts + [filename])
+                    if key < after_key:
+                        continue
+                    skipping = False
+                    if key == after_key:
+                        if resume is not None:
+                            resume['found'] = True
+                        continue
+                if resume is not None:
+                    resume['found'] = True
+                yield os.path.join(root, filename), [index, '/'.join(parts + [filename])]
+
+# ---------- 断点 ----------
+def records_path(checkpoint):
+    return checkpoint + '.photos.jsonl'
+
+def dump_record(data):
+    row = list(photo_row(data))
+    row[0] = row[0].isoformat()
+    return json.dumps([None if isinstance(v, float) and math.isnan(v) else v for v in row], ensure_ascii=False)
+
+def load_record(line):
+    row = json.loads(line)
+    row[0] = datetime.datetime.fromisoformat(row[0])
+    return photo_from_row([math.nan if v is None else v for v in row])
+
+def load_checkpoint(checkpoint, folder_paths):
+    """返回 (断点位置, 已解析的照片)；文件夹不一致或没有断点时从头开始"""
+    if not os.path.exists(checkpoint):
+        return None, []
+    with open(checkpoint, encoding="utf-8") as f:
+        state = json.load(f)
+    if state.get('folders') != [os.path.abspath(p) for p in folder_paths]:
+        print("⚠️ 断点对应的文件夹与本次不同，从头开始扫描。")
+        return None, []
+    position = state['position']
+    if isinstance(position, str):
+        # 旧版断点记的是完整路径：换算成 [文件夹序号, 相对路径]
+        position = relative_position(position, folder_paths)
+        if position is None:
+            print("⚠️ 断点位置不在本次的文件夹里，从头开始扫描。")
+            return None, []
+    photos = []
+    with open(records_path(checkpoint), encoding="utf-8") as f:
+        # 只认断点里记下的行数：写记录之后、更新断点之前被打断时多出来的行丢弃
+        for _, line in zip(range(state['records']), f):
+            photos.append(load_record(line))
+    return position, photos
+
+def relative_position(path, folder_paths):
+    """完整路径 -> [文件夹序号, 相对路径]，不在任何一个文件夹下时返回 None"""
+    path = os.path.abspath(path)
+    for index, folder in enumerate(folder_paths):
+        rel = os.path.relpath(path, os.path.abspath(folder))
+        if not rel.startswith(os.pardir):
+            return [index, rel.replace(os.sep, '/')]
+    return None
+
+def save_checkpoint(checkpoint, folder_paths, position, records):
+    state = {
+        'folders': [os.path.abspath(p) for p in folder_paths],
+        'position': position,
+        'records': records,
+        'saved_at': datetime.datetime.now().isoformat(timespec='seconds'),
+    }
+    tmp = checkpoint + '.tmp'
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f, ensure_ascii=False)
+    os.replace(tmp, checkpoint)
+
+def clear_checkpoint(checkpoint):
+    for path in (checkpoint, records_path(checkpoint)):
+        if os.path.exists(path):
+            os.remove(path)
+
+@tracing.traced()
+def background_scan(folder_paths, checkpoint=CHECKPOINT_PATH, max_bytes_per_sec=MAX_BYTES_PER_SEC,
+                    max_files_per_sec=MAX_FILES_PER_SEC, target_latency=TARGET_LATENCY, max_workers=MAX_WORKERS):
+    """
+    低影响的后台扫描：限速 (字节/秒 + 文件/秒)、按读盘延迟自适应并发、降低自身优先级，
+    每 CHECKPOINT_EVERY 张保存一次断点。Ctrl+C 暂停，再次运行同样的命令从断点继续。
+    返回与 scan_folders 相同的照片列表。
+    """
+    from camera import get_exif_data
+
+    adjusted = lower_priority()
+    if adjusted:
+        print(f"   🐢 已降低优先级: {', '.join(adjusted)}")
+
+    position, photos = load_checkpoint(checkpoint, folder_paths)
+    if position:
+        print(f"   ⏯️ 从断点继续：已完成 {len(photos)} 张，上次停在 {position[1]}")
+
+    byte_bucket = TokenBucket(max_bytes_per_sec)
+    file_bucket = TokenBucket(max_files_per_sec)
+    window = AIMDWindow(target_latency, MIN_WORKERS, max_workers)
+
+    def parse(path):
+        t0 = time.perf_counter()
+        try:
+            with open(path, 'rb') as raw:
+                f = CountingFile(raw)
+                data = get_exif_data(f)
+            if data:
+                data['Path'] = path
+            byte_bucket.charge(f.bytes_read)
+            tracing.count('bytes_read', f.bytes_read, source='photo')
+        except OSError:
+            data = None
+        window.release(time.perf_counter() - t0)
+        return data
+
+    # 完成顺序与遍历顺序不同：只有某个位置之前的文件全部完成，断点才能推进到那里
+    pending = []          # [(断点位置, future)]，按遍历顺序
+    records = open(records_path(checkpoint), "r+" if position else "w", encoding="utf-8")
+    if position:
+        # 截掉断点之后多写的记录
+        for _ in range(len(photos)):
+            records.readline()
+        records.truncate(records.tell())
+    done_since_save = 0
+    scanned = 0
+    started = time.monotonic()
+
+    def drain(block):
+        nonlocal position, done_since_save
+        while pending and (block or pending[0][1].done()):
+            done_at, future = pending.pop(0)
+            data = future.result()
+            if data:
+                photos.append(data)
+                records.write(dump_record(data) + '\n')
+            position = done_at
+            done_since_save += 1
+        if done_since_save >= CHECKPOINT_EVERY or (block and done_since_save):
+            records.flush()
+            save_checkpoint(checkpoint, folder_paths, position, len(photos))
+            done_since_save = 0
+
+    resume = {'found': position is None}
+    paused = False
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        try:
+            for path, at in walk_photos(folder_paths, after=position, resume=resume):
+                file_bucket.wait(1)
+                byte_bucket.wait()          # 等上一批读盘的欠账还清
+                window.acquire()
+                pending.append((at, pool.submit(parse, path)))
+                scanned += 1
+                drain(block=False)
+                if scanned % 500 == 0:
+                    rate = scanned / (time.monotonic() - started)
+                    print(f"   ... 已扫描 {len(photos)} 张 · {rate:.1f} 张/秒 · 并发 {window.size:.1f}")
+        except KeyboardInterrupt:
+            paused = True
+            print("\n⏸️ 已暂停，正在保存断点...")
+        drain(block=True)
+    records.close()
+
+    if paused:
+        print(f"   断点已保存到 {os.path.abspath(checkpoint)}，再次运行会从这里继续。")
+        raise KeyboardInterrupt
+    if not resume['found']:
+        # 断点之后一张照片都没找到 (断点那张也不在)：多半是文件夹被移走或换了内容，
+        # 此时删掉断点就丢了进度，保留下来让用户确认
+        print(f"⚠️ 没有找到断点位置 {position[1]} 及之后的照片，断点保留在 {os.path.abspath(checkpoint)}；"
+              f"确认要从头扫描请删除它。")
+        return photos
+    clear_checkpoint(checkpoint)
+    return photos
@@ -0,0 +1,231 @@
+import os
+import json
+import math
+import string
+import operator
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# ================= 配置区 =================
+RULES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "badge_rules.json")
+# 焦段 (35mm 等效) / 作息的分界 (与 Lens Report 的图表口径一致)
+WIDE_FOCAL = 24
+TELE_FOCAL = 85
+LARGE_APERTURE = 2.8
+# ========================================
+
+OPS = {
+    '>': operator.gt,
+    '>=': operator.ge,
+    '<': operator.lt,
+    '<=': operator.le,
+    '==': operator.eq,
+    '!=': operator.ne,
+}
+
+# ---------- 指标：每份 stats 只算一次，规则只和这些数字比较 ----------
+def system_metrics(stats):
+    """System Report 的 stats -> 徽章用到的数值指标"""
+    hour_dist = stats['hour_dist']
+    ci = stats.get('crash_install') or {}
+    ratio = ci.get('ratio')
+    return {
+        'longest_hours': stats['longest_session']['duration'] / 3600,
+        'late_night_ops': sum(hour_dist[0:5]),
+        'crash_total': stats['bsod'] + stats['crash'],
+        'bsod': stats['bsod'],
+        'total_hours': stats['total_uptime_seconds'] / 3600,
+        'install_count': stats['install_count'],
+        'crash_incidents': ci.get('incidents', 0),
+        'crash_after_install': ci.get('after_install', 0),
+        'crash_install_share': ci.get('share', 0.0),
+        # 平时没有崩溃 (没有基线) 时 ratio 为 None，按无穷大处理
+        'crash_install_ratio': math.inf if ci and ratio is None else (ratio or 0.0),
+        'lookback_hours': ci.get('lookback_hours', 0),
+    }
+
+_aperture_values = {}
+
+def aperture_value(label):
+    """'f/2.8' -> 2.8，解析结果按字符串缓存 (光圈档位就那么几十个)"""
+    value = _aperture_values.get(label, False)
+    if value is False:
+        try:
+            value = float(label.replace('f/', ''))
+        except (AttributeError, ValueError):
+            value = None
+        _aperture_values[label] = value
+    return value
+
+def photo_metrics(stats):
+    """Lens Report 的 stats -> 徽章用到的数值指标"""
+    total = stats['total_count']
+    if total == 0:
+        return {'total': 0}
+    hour_dist = stats['hour_dist']
+    # 广角 / 长焦按 35mm 等效焦距算 (手机、APS-C 的实际焦距会被错分)
+    focals = stats.get('focal35_dist') or stats['focal_dist']
+    wide_count = sum(c for f, c in focals.items() if f < WIDE_FOCAL)
+    tele_count = sum(c for f, c in focals.items() if f >= TELE_FOCAL)
+    night_shots = sum(hour_dist[0:5]) + sum(hour_dist[22:24])
+    noon_shots = sum(hour_dist[11:14])
+    large_aperture = 0
+    for k, v in stats['aperture_dist'].items():
+        value = aperture_value(k)
+        if value is not None and value <= LARGE_APERTURE:
+            large_aperture += v
+    return {
+        'total': total,
+        'wide_share': wide_count / total,
+        'tele_share': tele_count / total,
+        'night_share': night_shots / total,
+        'noon_share': noon_shots / total,
+        'large_aperture_share': large_aperture / total,
+        'camera_count': len(stats['camera_dist']),
+    }
+
+class _DescFormatter(string.Formatter):
+    """desc 模板：在 str.format 的基础上多一个 !i (取整，与 int() 一致)"""
+
+    def convert_field(self, value, conversion):
+        if conversion == 'i':
+            return int(value)
+        return super().convert_field(value, conversion)
+
+_formatter = _DescFormatter()
+
+class BadgeRules:
+    """
+    编译后的徽章规则 (badge_rules.json 中的一组)：
+    所有条件去重后编成一张谓词表 [(指标, 运算符, 阈值)]，每条规则只记它用到的谓词下标。
+    单份 stats 逐个求值；成千上万份快照 (fleet 的每台主机) 时每个谓词对整列一次比较，
+    再按组 "先命中者胜" 归约，得到每份快照解锁了哪些徽章。
+    """
+
+    def __init__(self, spec):
+        self.predicates = []
+        index = {}
+
+        def compile_clauses(clauses):
+            ids = []
+            for metric, op, value in clauses:
+                if op not in OPS:
+                    raise ValueError(f"未知的运算符: {op}")
+                key = (metric, op, float(value))
+                if key not in index:
+                    index[key] = len(self.predicates)
+                    self.predicates.append(key)
+                ids.append(index[key])
+            return ids
+
+        self.require = compile_clauses(spec.get('require', []))
+        self.badges = []      # 所有徽章 (含 fallback)，按规则文件顺序
+        self.groups = []      # 每组: [(徽章下标, 谓词下标列表), ...]
+        for group in spec['groups']:
+            rules = []
+            for rule in group['rules']:
+                rules.append((len(self.badges), compile_clauses(rule.get('when', []))))
+                self.badges.append(rule)
+            self.groups.append(rules)
+        self.fallback = None
+        if spec.get('fallback'):
+            self.fallback = len(self.badges)
+            self.badges.append(spec['fallback'])
+        self.ids = [b['id'] for b in self.badges]
+        self.metrics = sorted({p[0] for p in self.predicates})
+
+    @classmethod
+    def load(cls, name, path=RULES_PATH):
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f)[name])
+
+    def matches(self, metrics):
+        """单份指标 -> 解锁的徽章下标 (按规则文件顺序)"""
+        truth = [OPS[op](metrics.get(metric, math.nan), value) for metric, op, value in self.predicates]
+        if not all(truth[i] for i in self.require):
+            return []
+        unlocked = []
+        for rules in self.groups:
+            for badge, clauses in rules:
+                if all(truth[i] for i in clauses):
+                    unlocked.append(badge)
+                    break
+        if not unlocked and self.fallback is not None:
+            unlocked.append(self.fallback)
+        return unlocked
+
+    def render(self, badge, metrics):
+        rule = self.badges[badge]
+        return {'icon': rule['icon'], 'title': rule['title'], 'desc': _formatter.format(rule['desc'], **metrics)}
+
+    def evaluate(self, metrics):
+        """单份指标 -> 报告里展示的徽章列表 [{'icon', 'title', 'desc'}]"""
+        return [self.render(b, metrics) for b in self.matches(metrics)]
+
+    def unlock_matrix(self, rows):
+        """
+        多份指标一次性求值，返回 {徽章 id: 每份快照是否解锁}。
+        有 NumPy 时每个谓词是一次整列比较，没有时退回列表推导 (结果相同)。
+        """
+        n = len(rows)
+        columns = {m: [r.get(m, math.nan) for r in rows] for m in self.metrics}
+        if np is not None:
+            columns = {m: np.asarray(col, dtype=float) for m, col in columns.items()}
+            truth = [OPS[op](columns[metric], value) for metric, op, value in self.predicates]
+            ok = np.ones(n, dtype=bool)
+            for i in self.require:
+                ok &= truth[i]
+            unlocked = {badge_id: np.zeros(n, dtype=bool) for badge_id in self.ids}
+            any_badge = np.zeros(n, dtype=bool)
+            for rules in self.groups:
+                pending = ok.copy()     # 本组还没命中的快照
+                for badge, clauses in rules:
+                    hit = pending.copy()
+                    for i in clauses:
+                        hit &= truth[i]
+                    unlocked[self.ids[badge]] = hit
+                    pending &= ~hit
+                any_badge |= ok & ~pending
+            if self.fallback is not None:
+                unlocked[self.ids[self.fallback]] = ok & ~any_badge
+            return unlocked
+
+        truth = [[OPS[op](x, value) for x in columns[metric]] for metric, op, value in self.predicates]
+        ok = [all(truth[i][k] for i in self.require) for k in range(n)]
+        unlocked = {badge_id: [False] * n for badge_id in self.ids}
+        any_badge = [False] * n
+        for rules in self.groups:
+            pending = list(ok)
+            for badge, clauses in rules:
+                hit = [pending[k] and all(truth[i][k] for i in clauses) for k in range(n)]
+                unlocked[self.ids[badge]] = hit
+                pending = [p and not h for p, h in zip(pending, hit)]
+            any_badge = [a or (o and not p) for a, o, p in zip(any_badge, ok, pending)]
+        if self.fallback is not None:
+            unlocked[self.ids[self.fallback]] = [o and not a for o, a in zip(ok, any_badge)]
+        return unlocked
+
+    def unlock_rates(self, rows):
+        """每个徽章被多少份快照解锁：{id: {'icon', 'title', 'count', 'share'}}"""
+        matrix = self.unlock_matrix(rows)
+        rates = {}
+        for badge_id, rule in zip(self.ids, self.badges):
+            count = int(sum(matrix[badge_id]))
+            rates[badge_id] = {
+                'icon': rule['icon'],
+                'title': rule['title'],
+                'count': count,
+                'share': round(count / len(rows), 4) if rows else 0.0,
+            }
+        return rates
+
+_rules = {}
+
+def default_rules(name):
+    """进程内共享的规则 ('system' / 'photo')，首次使用时加载并编译"""
+    if name not in _rules:
+        _rules[name] = BadgeRules.load(name)
+    return _rules[name]
@@ -0,0 +1,271 @@
+import os
+import re
+import sys
+import json
+import time
+import argparse
+import datetime
+import contextlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+# 这里只导入标准库：各类报告的模块 (以及 Pillow) 在 worker 里按任务类型再导入，
+# python batch.py --help 和纯 System Report 任务都不会加载 Pillow
+
+# ================= 配置区 =================
+BATCH_OUT_DIR = "reports"
+SUMMARY_JSON = "batch_summary.json"
+# 每个任务的输出目录里保存它自己的运行日志 (worker 的 print 不会互相穿插)
+JOB_LOG = "job.log"
+JOB_KINDS = ('system', 'history', 'photo', 'combined')
+# ========================================
+
+def job_name(job, index):
+    """任务名决定输出子目录；没写 name 时按类型 + 来源 + 年份拼一个"""
+    name = job.get('name')
+    if not name:
+        source = job.get('events') or ','.join(job.get('folders') or job.get('photos') or []) or 'local'
+        source = os.path.splitext(os.path.basename(os.path.normpath(source)))[0] or 'local'
+        name = '-'.join(str(p) for p in (job['kind'], source, job.get('year')) if p)
+    name = re.sub(r'[^\w.-]+', '_', name)
+    return name or f"job{index}"
+
+def load_jobs(path):
+    """
+    任务文件：JSON 数组，或每行一个 JSON 对象 (NDJSON)。例如
+    {"name": "alice-2024", "kind": "system", "events": "exports/alice.json", "year": 2024}
+    {"kind": "photo", "folders": ["D:/Photos/2024"], "offline": true, "export": "photos.parquet"}
+    {"kind": "combined", "photos": ["D:/Photos"], "events": "exports/alice.json", "year": 2024}
+    """
+    with open(path, encoding="utf-8-sig") as f:
+        text = f.read().strip()
+    if not text:
+        return []
+    if text[0] == '[':
+        jobs = json.loads(text)
+    else:
+        jobs = [json.loads(line) for line in text.splitlines() if line.strip() and not line.lstrip().startswith('#')]
+    for i, job in enumerate(jobs, 1):
+        if not isinstance(job, dict) or job.get('kind') not in JOB_KINDS:
+            raise ValueError(f"{path} 第 {i} 个任务缺少有效的 kind ({' / '.join(JOB_KINDS)})")
+    return jobs
+
+def load_events(job):
+    """有 events 时读导出文件 (与 fleet 相同的格式)，否则直接读取本机日志"""
+    if job.get('events'):
+        from fleet import load_host_events
+        return load_host_events(job['events'])
+    from digital_life import get_hybrid_data, get_history_data
+    year = job.get('year')
+    return get_hybrid_data(year) if year and job['kind'] != 'history' else get_history_data()
+
+def export_path(job, out_dir):
+    """任务里的 export 是相对路径时放进该任务的输出目录"""
+    path = job.get('export')
+    return os.path.join(out_dir, path) if path else None
+
+def render_system(job, out_dir):
+    from digital_life import analyze_hybrid, analyze_history, generate_html, generate_history_report, parse_time
+    events = load_events(job)
+    if not events:
+        raise RuntimeError("没有可用事件")
+    if job.get('export'):
+        from columnar import export_events
+        export_events(events, export_path(job, out_dir))
+    offline = job.get('offline', False)
+    if job['kind'] == 'history':
+        output = os.path.join(out_dir, "my_digital_life_history.html")
+        return generate_history_report(analyze_history(events), output=output, open_browser=False, offline=offline)
+
+    year = job.get('year') or datetime.datetime.now().year
+    t1 = datetime.datetime(year, 1, 1).timestamp()
+    t2 = datetime.datetime(year + 1, 1, 1).timestamp()
+    in_year = []
+    for e in events:
+        dt = parse_time(str(e.get('TimeCreated', '')))
+        if dt is not None and t1 <= dt.timestamp() < t2:
+            in_year.append(e)
+    events = in_year
+    if not events:
+        raise RuntimeError(f"{year} 年没有可用事件")
+    output = os.path.join(out_dir, f"my_digital_life_{year}.html")
+    return generate_html(analyze_hybrid(events), year, output=output, open_browser=False, offline=offline)
+
+def render_photo(job, out_dir):
+    from camera import scan_folders, analyze_data, generate_html
+    folders = [p for p in job.get('folders') or [] if os.path.exists(p)]
+    if not folders:
+        raise RuntimeError("没有有效的照片文件夹")
+    # 后台模式的断点放在任务目录里，并行的任务互不干扰
+    background = job.get('background') and os.path.join(out_dir, "scan.checkpoint.json")
+    stats = analyze_data(scan_folders(folders, export=export_path(job, out_dir), background=background))
+    if not stats:
+        raise RuntimeError("未找到有效的 JPG 图片")
+    output = os.path.join(out_dir, "my_photo_life_report.html")
+    return generate_html(stats, offline=job.get('offline', False), output=output, open_browser=False)
+
+def render_combined(job, out_dir):
+    from camera import iter_photos
+    from combined import session_index_from, photo_times_from, combine, generate_html
+    events = load_events(job)
+    if not events:
+        raise RuntimeError("没有可用事件")
+    index = session_index_from(events)
+    year = job.get('year')
+    t1 = t2 = first = last = None
+    if year:
+        first, last = datetime.date(year, 1, 1), datetime.date(year, 12, 31)
+        t1 = datetime.datetime(year, 1, 1).timestamp()
+        t2 = datetime.datetime(year + 1, 1, 1).timestamp()
+        index = index.slice(t1, t2)
+    result = combine(photo_times_from(iter_photos(job.get('photos') or []), t1, t2), index, first, last)
+    if not result['totals']['photos'] and not len(index):
+        raise RuntimeError("没有照片，也没有电脑活跃记录")
+    title = f"{year} 年" if year else "全部历史"
+    output = os.path.join(out_dir, "my_digital_life_combined.html")
+    return generate_html(result, title, output, open_browser=False, offline=job.get('offline', False))
+
+RENDERERS = {
+    'system': render_system,
+    'history': render_system,
+    'photo': render_photo,
+    'combined': render_combined,
+}
+
+def run_job(job, out_dir):
+    """
+    worker：在 out_dir 下生成一份报告，返回一行汇总。
+    任何异常都只记在这一行里，不影响其它任务。
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    row = {'name': os.path.basename(out_dir), 'kind': job['kind'], 'output': None, 'error': None}
+    t0 = time.perf_counter()
+    c0 = time.process_time()
+    with open(os.path.join(out_dir, JOB_LOG), "w", encoding="utf-8") as log, \
+            contextlib.redirect_stdout(log), contextlib.redirect_stderr(log):
+        try:
+            row['output'] = os.path.abspath(RENDERERS[job['kind']](job, out_dir))
+        except Exception as e:
+            import traceback
+            traceback.print_exc()
+            row['error'] = f"{type(e).__name__}: {e}"
+    row['wall_s'] = round(time.perf_counter() - t0, 3)
+    row['cpu_s'] = round(time.process_time() - c0, 3)
+    return row
+
+def run_batch(jobs, out_root=BATCH_OUT_DIR, workers=None):
+    """
+    并行执行所有任务，每个任务输出到 out_root/<任务名>/。
+    只有一个任务或 workers=1 时在当前进程里直接跑，省掉进程池的启动开销。
+    """
+    names, planned = set(), []
+    for i, job in enumerate(jobs, 1):
+        name = job_name(job, i)
+        # 重名任务加序号，避免互相覆盖输出
+        if name in names:
+            name = f"{name}-{i}"
+        names.add(name)
+        planned.append((job, os.path.join(out_root, name)))
+
+    if workers == 1 or len(planned) <= 1:
+        rows = []
+        for job, out_dir in planned:
+            rows.append(run_job(job, out_dir))
+            print_row(rows[-1])
+        return rows
+
+    rows = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(run_job, job, out_dir): (job, out_dir) for job, out_dir in planned}
+        for future in as_completed(futures):
+            job, out_dir = futures[future]
+            try:
+                row = future.result()
+            except BrokenProcessPool as e:
+                # worker 进程直接崩溃：这个任务记为失败，其它任务的结果照常收集
+                row = {'name': os.path.basename(out_dir), 'kind': job['kind'], 'output': None,
+                       'error': f"worker 崩溃: {e}", 'wall_s': None, 'cpu_s': None}
+            rows.append(row)
+            print_row(row)
+    order = {os.path.basename(out_dir): i for i, (_, out_dir) in enumerate(planned)}
+    rows.sort(key=lambda r: order[r['name']])
+    return rows
+
+def print_row(row):
+    mark = '✅' if row['error'] is None else '❌'
+    print(f"   {mark} {row['name']}", file=sys.stderr)
+
+def print_summary(rows, elapsed):
+    width = max([len(r['name']) for r in rows] + [4])
+    print(f"\n📋 批量任务汇总 ({len(rows)} 个，总耗时 {elapsed:.2f}s)")
+    print(f"   {'任务':<{width}}  {'类型':<8} {'墙钟':>9} {'CPU':>9}  结果")
+    for r in rows:
+        wall = f"{r['wall_s']:.2f}s" if r['wall_s'] is not None else '-'
+        cpu = f"{r['cpu_s']:.2f}s" if r['cpu_s'] is not None else '-'
+        result = r['output'] if r['output'] else f"❌ {r['error']}"
+        print(f"   {r['name']:<{width}}  {r['kind']:<8} {wall:>9} {cpu:>9}  {result}")
+
+def add_common(parser, export=True):
+    if export:
+        parser.add_argument('--export', default=None,
+                            help="同时把照片/事件记录导出为列式文件 (.parquet，相对路径放在任务目录里)")
+    parser.add_argument('-o', '--out-dir', default=BATCH_OUT_DIR, help="输出根目录，每个任务一个子目录")
+    parser.add_argument('--name', default=None, help="任务名 (子目录名)")
+    parser.add_argument('--offline', action='store_true', help="内联 ECharts，生成可以断网打开的报告")
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="无交互批量生成报告：不弹输入框、不打开浏览器")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p = sub.add_parser('run', help="执行任务文件中的所有任务")
+    p.add_argument('jobs', help="任务文件 (JSON 数组或 NDJSON)")
+    p.add_argument('-o', '--out-dir', default=BATCH_OUT_DIR, help="输出根目录，每个任务一个子目录")
+    p.add_argument('-j', '--workers', type=int, default=None, help="进程数 (默认等于 CPU 核数)")
+
+    p = sub.add_parser('system', help="单个 System Report")
+    p.add_argument('--events', default=None, help="事件导出文件 (.json/.ndjson/.evtx/.wtmp)，默认读取本机日志")
+    p.add_argument('--year', type=int, default=datetime.datetime.now().year)
+    add_common(p)
+
+    p = sub.add_parser('history', help="历年报告 (每年一页 + 索引页)")
+    p.add_argument('--events', default=None, help="事件导出文件，默认读取本机日志")
+    add_common(p)
+
+    p = sub.add_parser('photo', help="单个 Lens Report")
+    p.add_argument('folders', nargs='+', help="包含 JPG 的文件夹")
+    p.add_argument('--background', action='store_true', help="低影响后台扫描 (限速、降低优先级，中断后可续扫)")
+    add_common(p)
+
+    p = sub.add_parser('combined', help="照片 × 电脑活跃交叉报告")
+    p.add_argument('--photos', nargs='+', required=True, help="包含 JPG 的文件夹")
+    p.add_argument('--events', default=None, help="事件导出文件，默认读取本机日志")
+    p.add_argument('--year', type=int, default=None)
+    add_common(p, export=False)
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.command == 'run':
+        jobs = load_jobs(args.jobs)
+        workers = args.workers
+    else:
+        job = {k: v for k, v in vars(args).items() if k not in ('command', 'out_dir') and v is not None}
+        job['kind'] = args.command
+        jobs, workers = [job], 1
+    if not jobs:
+        print("⚠️ 任务文件是空的。")
+        return 1
+
+    print(f"🚚 共 {len(jobs)} 个任务，输出到 {os.path.abspath(args.out_dir)}", file=sys.stderr)
+    t0 = time.perf_counter()
+    rows = run_batch(jobs, args.out_dir, workers)
+    elapsed = time.perf_counter() - t0
+
+    print_summary(rows, elapsed)
+    os.makedirs(args.out_dir, exist_ok=True)
+    with open(os.path.join(args.out_dir, SUMMARY_JSON), "w", encoding="utf-8") as f:
+        json.dump({'elapsed_s': round(elapsed, 3), 'jobs': rows}, f, ensure_ascii=False, indent=2)
+    return 0 if all(r['error'] is None for r in rows) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,170 @@
+import os
+import sys
+import gc
+import json
+import time
+import argparse
+import platform
+import datetime
+import shutil
+import tempfile
+import subprocess
+import contextlib
+
+import digital_life
+from synth import iter_events
+
+# ================= 配置区 =================
+DEFAULT_SIZES = (10_000, 1_000_000, 10_000_000)
+BENCH_JSON = "bench_results.json"
+# 测首屏渲染用的无头浏览器，也可以用 CHROME_PATH 环境变量指定
+HEADLESS_BROWSERS = ('chromium', 'chromium-browser', 'google-chrome', 'chrome', 'chrome-headless-shell', 'msedge')
+# ========================================
+
+# 注入到报告末尾：页面加载完、再等两帧后把 paint 时间写进 <title>，由 --dump-dom 读回
+PAINT_PROBE = """<script>
+window.addEventListener('load', function() {
+    requestAnimationFrame(function() { requestAnimationFrame(function() {
+        var r = { load_ms: performance.now() };
+        performance.getEntriesByType('paint').forEach(function(e) { r[e.name.replace(/-/g, '_') + '_ms'] = e.startTime; });
+        document.title = 'BENCH:' + JSON.stringify(r);
+    }); });
+});
+</script>"""
+
+def timed(fn, repeat):
+    """返回 (最快一次耗时, 最后一次结果)；计时期间关闭 GC 减少抖动"""
+    best, result = None, None
+    for _ in range(repeat):
+        gc.collect()
+        gc.disable()
+        try:
+            t0 = time.perf_counter()
+            result = fn()
+            elapsed = time.perf_counter() - t0
+        finally:
+            gc.enable()
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+def find_browser():
+    path = os.environ.get('CHROME_PATH')
+    if path:
+        return path
+    for name in HEADLESS_BROWSERS:
+        path = shutil.which(name)
+        if path:
+            return path
+    return None
+
+def measure_first_paint(html_path, browser, timeout=60):
+    """
+    用无头浏览器打开报告，返回 {'first_paint_ms', 'first_contentful_paint_ms', 'load_ms'}；
+    浏览器不可用或超时返回 None
+    """
+    with open(html_path, encoding="utf-8") as f:
+        html = f.read()
+    probe_path = html_path[:-5] + '.probe.html'
+    with open(probe_path, "w", encoding="utf-8") as f:
+        f.write(html.replace('</body>', PAINT_PROBE + '</body>', 1))
+    cmd = [browser, '--headless', '--disable-gpu', '--no-sandbox', '--virtual-time-budget=10000',
+           '--dump-dom', 'file://' + os.path.abspath(probe_path)]
+    try:
+        out = subprocess.run(cmd, capture_output=True, timeout=timeout).stdout.decode('utf-8', errors='ignore')
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    start = out.find('<title>BENCH:')
+    if start < 0:
+        return None
+    start += len('<title>BENCH:')
+    try:
+        result = json.loads(out[start:out.index('</title>', start)].replace('&quot;', '"'))
+    except ValueError:
+        return None
+    return {k: round(v, 1) for k, v in result.items()}
+
+def bench_size(n, repeat=1, seed=0, time_format='mixed', browser=None):
+    # 准备数据不计时：生成事件并序列化成采集器的原始输出
+    events = list(iter_events(host='bench', seed=seed, profile='laptop', time_format=time_format, limit=n))
+    raw_json = json.dumps(events)
+    del events
+
+    row = {'events': n, 'json_bytes': len(raw_json)}
+
+    row['json_parse_s'], parsed = timed(lambda: json.loads(raw_json), repeat)
+    del raw_json
+
+    times = [e['TimeCreated'] for e in parsed]
+    row['parse_time_s'], _ = timed(lambda: [digital_life.parse_time(t) for t in times], repeat)
+    del times
+
+    row['analyze_s'], stats = timed(lambda: digital_life.analyze_hybrid(parsed), repeat)
+    del parsed
+
+    with tempfile.TemporaryDirectory() as tmp:
+        out = os.path.join(tmp, 'bench.html')
+        # generate_html 的提示信息转到 stderr，保证 stdout 只有 JSON
+        with contextlib.redirect_stdout(sys.stderr):
+            row['generate_html_s'], _ = timed(
+                lambda: digital_life.generate_html(stats, 'bench', output=out, open_browser=False, period='bench'), repeat)
+        row['html_bytes'] = os.path.getsize(out)
+
+        # 离线包：体积 + 首屏时间 (需要本地有 ECharts 与无头浏览器)
+        offline_out = os.path.join(tmp, 'bench_offline.html')
+        try:
+            with contextlib.redirect_stdout(sys.stderr):
+                digital_life.generate_html(stats, 'bench', output=offline_out, open_browser=False, period='bench', offline=True)
+        except RuntimeError as e:
+            print(f"⚠️ 跳过离线包测试: {e}", file=sys.stderr)
+        else:
+            row['offline_html_bytes'] = os.path.getsize(offline_out)
+            if browser:
+                row['first_paint'] = measure_first_paint(offline_out, browser)
+
+    row['total_s'] = round(row['json_parse_s'] + row['parse_time_s'] + row['analyze_s'] + row['generate_html_s'], 4)
+    row['events_per_s'] = round(n / row['total_s']) if row['total_s'] else None
+    for key in ('json_parse_s', 'parse_time_s', 'analyze_s', 'generate_html_s'):
+        row[key] = round(row[key], 4)
+    return row
+
+def run_bench(sizes=DEFAULT_SIZES, repeat=1, seed=0, time_format='mixed', browser=None):
+    results = {
+        'timestamp': datetime.datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'seed': seed,
+        'time_format': time_format,
+        'browser': browser,
+        'results': [],
+    }
+    for n in sizes:
+        print(f"⏱️  正在测试 {n:,} 条事件...", file=sys.stderr)
+        results['results'].append(bench_size(n, repeat, seed, time_format, browser))
+    return results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="analyze_hybrid 流水线基准测试 (使用合成事件流)")
+    parser.add_argument('--sizes', type=lambda s: [int(x) for x in s.split(',')],
+                        default=list(DEFAULT_SIZES), help="逗号分隔的事件条数，例如 10000,1000000 (10M 档需要数 GB 内存)")
+    parser.add_argument('--repeat', type=int, default=1, help="每项重复次数，取最快一次")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--time-format', default='mixed', choices=('msdate', 'iso', 'mixed'))
+    parser.add_argument('-o', '--output', default=BENCH_JSON, help="结果 JSON 路径，- 表示输出到 stdout")
+    parser.add_argument('--no-browser', action='store_true', help="不测首屏渲染时间")
+    args = parser.parse_args(argv)
+
+    browser = None if args.no_browser else find_browser()
+    if browser is None and not args.no_browser:
+        print("💡 没有找到无头浏览器 (可设置 CHROME_PATH)，跳过首屏渲染测试。", file=sys.stderr)
+    results = run_bench(args.sizes, args.repeat, args.seed, args.time_format, browser)
+    text = json.dumps(results, ensure_ascii=False, indent=2)
+    if args.output == '-':
+        print(text)
+    else:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+        print(f"📊 基准结果已写入: {os.path.abspath(args.output)}", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,98 @@
+import json
+import datetime
+
+# ================= 配置区 =================
+# 每一年的日历在图里占多高 (像素)，多年时竖着叠放
+YEAR_HEIGHT = 170
+# ========================================
+
+def add_day(buckets, dt, n=1):
+    """在聚合循环里调用：{日期序号(date.toordinal()): 计数}"""
+    key = dt.toordinal()
+    buckets[key] = buckets.get(key, 0) + n
+
+def calendar_payload(buckets, first=None, last=None, scale=1, digits=None, extra=None):
+    """
+    {日期序号: 值} -> 紧凑的日历数据：起始日期 + 逐日数值数组 (没有数据的日子填 0)。
+    HTML 里只放这一个数组，不管原始事件/照片有多少，最多也就 366 个数 / 年。
+    first / last: 日期范围 (默认取 buckets 中最早、最晚的一天)
+    scale / digits: 数值换算与保留小数位，例如秒 -> 小时
+    extra: 另一个 {日期序号: 值}，作为 tooltip 的附加信息 (与 values 等长)
+    """
+    if not buckets and first is None:
+        return None
+    first = first if first is not None else datetime.date.fromordinal(min(buckets))
+    last = last if last is not None else datetime.date.fromordinal(max(buckets))
+    start, end = first.toordinal(), last.toordinal()
+
+    def dense(source, scale=1, digits=None):
+        values = []
+        for day in range(start, end + 1):
+            v = source.get(day, 0) * scale
+            values.append(round(v, digits) if digits else int(v) if v == int(v) else v)
+        return values
+
+    payload = {'start': first.isoformat(), 'end': last.isoformat(), 'values': dense(buckets, scale, digits)}
+    if extra is not None:
+        payload['extra'] = dense(extra)
+    return payload
+
+def chart_height(payload):
+    if not payload:
+        return YEAR_HEIGHT
+    years = int(payload['end'][:4]) - int(payload['start'][:4]) + 1
+    return YEAR_HEIGHT * years + 80
+
+def calendar_script(var_name, element_id, data_expr, label, colors, extra_label=None, unit=''):
+    """
+    生成初始化日历热力图的 JS。data_expr 是取到 calendar_payload 结果的 JS 表达式
+    (例如 DATA.calendar)。日期在浏览器里由起始日期 + 下标还原，每一年一个 calendar 坐标系竖着排列。
+    """
+    return f"""
+            var {var_name} = echarts.init(document.getElementById('{element_id}'));
+            (function() {{
+                var p = {data_expr};
+                if (!p) return;
+                var s = p.start.split('-'), y0 = +s[0], m0 = +s[1] - 1, d0 = +s[2];
+                var y1 = +p.end.slice(0, 4);
+                var pad = function(n) {{ return (n < 10 ? '0' : '') + n; }};
+                var calendars = [], series = [], byYear = {{}}, max = 0;
+                for (var i = 0; i < p.values.length; i++) {{
+                    // 数值为 0 但有附加信息的日子 (例如有事件、在线时长为 0) 也要画出来，tooltip 才看得到
+                    if (!p.values[i] && !(p.extra && p.extra[i])) continue;
+                    var d = new Date(y0, m0, d0 + i);
+                    var key = d.getFullYear() + '-' + pad(d.getMonth() + 1) + '-' + pad(d.getDate());
+                    (byYear[d.getFullYear()] = byYear[d.getFullYear()] || []).push([key, p.values[i], p.extra ? p.extra[i] : null]);
+                    if (p.values[i] > max) max = p.values[i];
+                }}
+                for (var y = y0; y <= y1; y++) {{
+                    var idx = y - y0;
+                    calendars.push({{
+                        top: 70 + idx * {YEAR_HEIGHT}, left: 40, right: 20, cellSize: ['auto', 15],
+                        range: y0 === y1 ? [p.start, p.end] : String(y),
+                        itemStyle: {{ color: 'rgba(255,255,255,0.03)', borderColor: '#0f172a', borderWidth: 2 }},
+                        splitLine: {{ lineStyle: {{ color: '#475569' }} }},
+                        yearLabel: {{ show: y0 !== y1, color: colorText }},
+                        monthLabel: {{ nameMap: 'ZH', color: colorText }},
+                        dayLabel: {{ nameMap: 'ZH', firstDay: 1, color: colorText }}
+                    }});
+                    series.push({{ type: 'heatmap', coordinateSystem: 'calendar', calendarIndex: idx, data: byYear[y] || [] }});
+                }}
+                {var_name}.setOption({{
+                    tooltip: {{
+                        formatter: function(x) {{
+                            var tip = x.value[0] + '<br>{label}: ' + x.value[1] + '{unit}';
+                            {f"if (x.value[2] !== null) tip += '<br>{extra_label}: ' + x.value[2];" if extra_label else ""}
+                            return tip;
+                        }}
+                    }},
+                    visualMap: {{
+                        min: 0, max: max || 1, calculable: true, orient: 'horizontal', left: 'center', top: 0,
+                        itemHeight: 120, textStyle: {{ color: colorText }},
+                        inRange: {{ color: {json.dumps(colors)} }}
+                    }},
+                    calendar: calendars,
+                    series: series
+                }});
+            }})();
+"""
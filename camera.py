@@ -4,21 +4,44 @@ import datetime
 import json
 import webbrowser
 from collections import Counter, defaultdict
-from PIL import Image, ExifTags
+from badges import default_rules, photo_metrics
+from photo_cube import PhotoCube, crosstab_payloads
+from photo_records import RecordBook, records_html
+from lens_info import exif_text, lens_name, crop_table, UNKNOWN_LENS
+from chart_shaping import focal_views, shutter_histogram, aperture_bars, top_with_other, LARGE_THRESHOLD, TOP_LENSES
+from columnar import is_columnar, iter_rows, photo_from_row, export_photos
+from calendar_heatmap import add_day, calendar_payload, calendar_script, chart_height
+from report_assets import head_assets, data_script, DATA_LOADER_JS, FONT_STACK
+import tracing
 
 # ================= 配置区 =================
 # 输出文件名
 OUTPUT_HTML = "my_photo_life_report.html"
+# 离线报告：内联 ECharts、不加载网络字体 (内网/断网机器上打开报告)
+OFFLINE_REPORT = False
+# 设置后把解析出的 EXIF 记录导出为列式文件 (.parquet，没装 pyarrow 时为 .cols 目录)，
+# 之后把这个文件当作"文件夹"输入即可跳过解析
+EXPORT_PATH = None
+# 后台模式：限速读盘、自适应并发、降低优先级，可以 Ctrl+C 暂停、下次从断点继续
+# (限速参数见 background_scan.py 的配置区)
+BACKGROUND_SCAN = False
 # ========================================
 
+@tracing.traced()
 def get_exif_data(image_path):
     """
     读取单张图片的EXIF信息，进行清洗和格式化
     """
+    # Pillow 用到时才导入，batch.py --help 与 System Report 不用为它付启动时间
+    from PIL import Image, ExifTags
     try:
+        # 后台扫描传进来的是文件对象，读了多少字节由它自己统计
+        if tracing.ENABLED and isinstance(image_path, str):
+            tracing.count('bytes_read', os.path.getsize(image_path), source='photo')
         img = Image.open(image_path)
         exif_raw = img._getexif()
         if not exif_raw:
+            tracing.count('photos_skipped', reason='no_exif')
             return None
             
         # 将数字ID转换为标签名
@@ -31,6 +54,7 @@ def get_exif_data(image_path):
         
         # 1. 焦段处理 (FocalLength) - 需求核心：无信息默认14mm
         fl = exif.get('FocalLength')
+        focal_mm = None # 实际焦距 (不取整)，换算等效焦距用
         try:
             if fl:
                 # 兼容旧版Pillow返回分数/元组的情况
@@ -39,6 +63,7 @@ def get_exif_data(image_path):
                 else:
                     val = float(fl)
                 data['FocalLength'] = int(round(val))
+                focal_mm = val
             else:
                 data['FocalLength'] = 14 # 默认设定
         except:
@@ -55,8 +80,10 @@ def get_exif_data(image_path):
                 data['Year'] = dt.year
                 data['DateObject'] = dt
             except:
+                tracing.count('photos_skipped', reason='bad_datetime')
                 return None
         else:
+            tracing.count('photos_skipped', reason='no_datetime')
             return None
 
         # 3. 快门速度 (ExposureTime)
@@ -88,144 +115,171 @@ def get_exif_data(image_path):
         else:
             data['Aperture'] = "Unknown"
 
-        # 5. 器材信息 (Model)
-        data['Camera'] = exif.get('Model', 'Unknown Camera').strip().replace('\x00', '')
+        # 5. 器材信息 (Model / 镜头)，字符串驻留后同型号共享一份
+        make = exif_text(exif.get('Make'))
+        data['Camera'] = exif_text(exif.get('Model')) or 'Unknown Camera'
+        data['Lens'] = lens_name(exif_text(exif.get('LensMake')), exif_text(exif.get('LensModel')))
+
+        # 5b. 35mm 等效焦距：手机 (4-7mm)、APS-C 的实际焦距和全画幅放在一起没有可比性。
+        #     优先用 FocalLengthIn35mmFilm，没有时按机身的裁切系数换算 (见 crop_factors.json)
+        try:
+            focal35 = int(exif.get('FocalLengthIn35mmFilm') or 0)
+        except (TypeError, ValueError):
+            focal35 = 0
+        #     两者都没有时记为 None (未知)，不用 14mm 的默认值冒充等效焦距
+        data['Focal35'] = crop_table().equivalent(focal_mm, focal35, make, data['Camera'])
         
         # 6. ISO
         data['ISO'] = int(exif.get('ISOSpeedRatings', 0))
 
+        # 7. 文件路径 (纪录卡片链接到原图；后台扫描传入文件对象时由调用方补上)
+        if isinstance(image_path, str):
+            data['Path'] = image_path
+
+        tracing.count('photos_parsed')
         return data
 
-    except Exception:
+    except Exception as e:
+        tracing.count('photos_failed', reason=type(e).__name__)
         return None
 
-def scan_folders(folder_paths):
-    print("🕵️‍♂️ 正在扫描文件夹...")
-    print("   [1/3] 正在解析图像 EXIF 元数据...")
-    
-    photos = []
+def list_photo_files(folder_paths):
+    """先把所有 JPG 路径找出来，解析阶段才能给出总数与预计剩余时间"""
     valid_extensions = ('.jpg', '.jpeg')
+    paths = []
 
     for folder_path in folder_paths:
         print(f"   ---> 扫描路径: {folder_path}")
         for root, _, files in os.walk(folder_path):
             for filename in files:
                 if filename.lower().endswith(valid_extensions):
-                    full_path = os.path.join(root, filename)
-                    data = get_exif_data(full_path)
-                    if data:
-                        photos.append(data)
-    
+                    paths.append(os.path.join(root, filename))
+                else:
+                    tracing.count('files_skipped', reason='extension')
+    tracing.count('files_seen', len(paths))
+    return paths
+
+def iter_photos(folder_paths, background=False):
+    """
+    逐张产出可用照片的 EXIF 数据 (按目录遍历顺序，不是时间顺序)。
+    之前导出的 .parquet / .cols 直接按行读出，不再打开图片。
+    background: 用低影响的后台扫描解析图片 (见 background_scan.py)；传字符串时作为断点文件路径
+    """
+    for path in folder_paths:
+        if is_columnar(path):
+            print(f"   ---> 读取导出记录: {path}")
+            with tracing.span('load_columnar'):
+                for row in iter_rows(path):
+                    yield photo_from_row(row)
+    folder_paths = [path for path in folder_paths if not is_columnar(path)]
+    if background:
+        from background_scan import background_scan, CHECKPOINT_PATH
+        yield from background_scan(folder_paths, background if isinstance(background, str) else CHECKPOINT_PATH)
+        return
+
+    with tracing.span('list_photo_files'):
+        paths = list_photo_files(folder_paths)
+
+    bar = tracing.progress(len(paths), "EXIF")
+    try:
+        for full_path in paths:
+            data = get_exif_data(full_path)
+            bar.update()
+            if data:
+                yield data
+    finally:
+        bar.close()
+
+@tracing.traced()
+def scan_folders(folder_paths, export=None, background=False):
+    """export: 同时把 EXIF 记录按批写进列式文件；background: 后台模式扫描"""
+    print("🕵️‍♂️ 正在扫描文件夹...")
+    with tracing.stage(1, 3, "解析图像 EXIF 元数据") as st:
+        photos = iter_photos(folder_paths, background)
+        if export:
+            photos = export_photos(photos, export)
+        photos = list(photos)
+        st.note = f"{len(photos)} 张"
     return photos
 
+@tracing.traced()
 def analyze_data(photos):
-    print("   [2/3] 正在生成统计分布...")
     if not photos:
         return None
-        
-    stats = {
-        'total_count': len(photos),
-        'focal_dist': Counter(),
-        'month_dist': [0] * 12, # 0-11 index
-        'hour_dist': [0] * 24,
-        'camera_dist': Counter(),
-        'shutter_dist': Counter(),
-        'aperture_dist': Counter(),
-        'iso_dist': [],
-        'latest_photo': None,
-        'earliest_photo': None,
-        'primary_camera': "None"
-    }
+
+    with tracing.stage(2, 3, "生成统计分布") as st:
+        stats = {
+            'total_count': len(photos),
+            'focal_dist': Counter(),
+            'focal35_dist': Counter(), # 35mm 等效焦距 (徽章的广角 / 长焦按它算)
+            'focal35_unknown': 0, # 没有焦距信息、不计入等效焦段的张数
+            'month_dist': [0] * 12, # 0-11 index
+            'hour_dist': [0] * 24,
+            'day_dist': {}, # 日期序号 -> 张数 (日历热力图)
+            'camera_dist': Counter(),
+            'lens_dist': Counter(),
+            'shutter_dist': Counter(),
+            'aperture_dist': Counter(),
+            'iso_dist': [],
+            'latest_photo': None,
+            'earliest_photo': None,
+            'primary_camera': "None",
+            'cube': PhotoCube(), # 相机 × 焦段 × 光圈 × 快门 × ISO × 时段 的稀疏交叉统计
+            'records': RecordBook(), # 最长曝光、最高 ISO、每台机身的第一张 / 最后一张 等纪录
+        }
     
-    dates = []
+        cube = stats['cube']
+        records = stats['records']
     
-    for p in photos:
-        stats['focal_dist'][p['FocalLength']] += 1
-        stats['month_dist'][p['Month']-1] += 1
-        stats['hour_dist'][p['Hour']] += 1
-        stats['camera_dist'][p['Camera']] += 1
-        if p.get('ShutterSpeed') != 'Unknown':
-            stats['shutter_dist'][p['ShutterSpeed']] += 1
-        if p.get('Aperture') != 'Unknown':
-            stats['aperture_dist'][p['Aperture']] += 1
+        for p in photos:
+            cube.add(p)
+            records.add(p)
+            stats['focal_dist'][p['FocalLength']] += 1
+            focal35 = p.get('Focal35', p['FocalLength'])
+            if focal35:
+                stats['focal35_dist'][focal35] += 1
+            else:
+                stats['focal35_unknown'] += 1
+            stats['month_dist'][p['Month']-1] += 1
+            stats['hour_dist'][p['Hour']] += 1
+            add_day(stats['day_dist'], p['DateObject'])
+            stats['camera_dist'][p['Camera']] += 1
+            stats['lens_dist'][p.get('Lens', UNKNOWN_LENS)] += 1
+            if p.get('ShutterSpeed') != 'Unknown':
+                stats['shutter_dist'][p['ShutterSpeed']] += 1
+            if p.get('Aperture') != 'Unknown':
+                stats['aperture_dist'][p['Aperture']] += 1
         
-        stats['iso_dist'].append(p['ISO'])
-        dates.append(p['DateObject'])
+            stats['iso_dist'].append(p['ISO'])
 
-    if dates:
-        dates.sort()
-        stats['earliest_photo'] = dates[0]
-        stats['latest_photo'] = dates[-1]
+        # 每台机身的第一张 / 最后一张里取最早和最晚，不用对全部拍摄时间排序
+        bodies = records.first_last_by_body()
+        if bodies:
+            stats['earliest_photo'] = min(first['taken'] for _, first, _ in bodies)
+            stats['latest_photo'] = max(last['taken'] for _, _, last in bodies)
 
-    if stats['camera_dist']:
-        stats['primary_camera'] = stats['camera_dist'].most_common(1)[0][0]
+        if stats['camera_dist']:
+            stats['primary_camera'] = stats['camera_dist'].most_common(1)[0][0]
+        st.note = f"{stats['total_count']} 张 · {len(stats['camera_dist'])} 台机身"
 
     return stats
 
 def get_achievements(stats):
-    print("   [3/3] 正在评估摄影成就徽章...")
-    badges = []
-    
-    total = stats['total_count']
-    if total == 0: return []
-
-    # 1. 焦段偏好
-    focals = stats['focal_dist']
-    wide_count = sum(c for f, c in focals.items() if f < 24)
-    tele_count = sum(c for f, c in focals.items() if f >= 85)
-    
-    if wide_count / total > 0.4:
-        badges.append({'icon': '🏔️', 'title': '广角狂魔', 'desc': '40% 以上的照片使用了超广角，心中装得下山河湖海'})
-    elif tele_count / total > 0.4:
-        badges.append({'icon': '🔭', 'title': '空气切割机', 'desc': '偏爱长焦压缩感，也是一名合格的偷窥...观察者'})
-    else:
-        badges.append({'icon': '👁️', 'title': '人文之眼', 'desc': '多使用 35mm-50mm 标准焦段，平实记录生活'})
-
-    # 2. 作息偏好
-    night_shots = sum(stats['hour_dist'][0:5]) + sum(stats['hour_dist'][22:24])
-    noon_shots = sum(stats['hour_dist'][11:14])
-    
-    if night_shots / total > 0.3:
-        badges.append({'icon': '🌃', 'title': '夜之城行者', 'desc': '超过 30% 的照片拍摄于深夜，ISO 一定很高吧'})
-    elif noon_shots / total > 0.4:
-        badges.append({'icon': '☀️', 'title': '光影捕手', 'desc': '顶着正午的大太阳拍摄，你是真的不怕热'})
-        
-    # 3. 光圈偏好
-    apertures = stats['aperture_dist']
-    large_aperture = 0
-    # 简单的字符串判断 f/1.x or f/2.x
-    for k, v in apertures.items():
-        try:
-            val = float(k.replace('f/', ''))
-            if val <= 2.8: large_aperture += v
-        except: pass
-        
-    if large_aperture / total > 0.5:
-        badges.append({'icon': '🥯', 'title': '虚化大师', 'desc': '一半以上的照片都在追求焦外如奶油般化开'})
-    else:
-        badges.append({'icon': '🏔️', 'title': '小光圈战士', 'desc': 'F8 才是风光狗的归宿，边缘画质必须锐利'})
-
-    # 4. 快门数
-    if total > 5000:
-        badges.append({'icon': '🔫', 'title': '机关枪手', 'desc': f'单文件夹扫射了 {total} 张照片，硬盘还好吗？'})
-    elif total < 100:
-        badges.append({'icon': '🎨', 'title': '胶片节奏', 'desc': '按快门非常克制，每一张都是深思熟虑'})
-        
-    # 5. 器材党
-    if len(stats['camera_dist']) > 3:
-        badges.append({'icon': '📸', 'title': '器材抚摸党', 'desc': f'使用了 {len(stats["camera_dist"])} 种不同的相机拍摄'})
+    # 规则与阈值见 badge_rules.json
+    return default_rules('photo').evaluate(photo_metrics(stats))
 
-    return badges
-
-def generate_html(stats):
+@tracing.traced('camera.render_html')
+def render_html(stats, offline=False):
+    """
+    生成报告页面的 HTML 字符串 (写文件见 generate_html)。
+    offline: 内联 ECharts、使用系统字体，图表滚动到可视区域时才初始化
+    """
     badges = get_achievements(stats)
     
     # 准备图表数据
     
-    # 1. 焦段 (Bar) - 按焦距排序
-    sorted_focal = sorted(stats['focal_dist'].items())
-    focal_x = [f"{k}mm" for k, v in sorted_focal]
-    focal_y = [v for k, v in sorted_focal]
+    # 1. 焦段 (Bar) - 精细 / 粗略两档，焦距种类很多时按对数分桶
+    focal_data = focal_views(stats['focal_dist'])
     
     # 2. 月份 (Line)
     month_data = stats['month_dist']
@@ -233,19 +287,42 @@ def generate_html(stats):
     # 3. 时段 (Bar/Polar)
     hour_data = stats['hour_dist']
     
-    # 4. 快门 (Top 10)
-    sorted_shutter = stats['shutter_dist'].most_common(10)
-    # 按快门速度本身排序比较难，这里按数量排序展示热门快门
-    shutter_x = [k for k, v in sorted_shutter]
-    shutter_y = [v for k, v in sorted_shutter]
+    # 4. 快门 - 归并到整档，按快慢排列
+    shutter_data = shutter_histogram(stats['shutter_dist'])
+    
+    # 5. 光圈 - 最常用的几档 + 其他，按 f 值排列
+    aperture_data = aperture_bars(stats['aperture_dist'])
     
-    # 5. 光圈 (Top 10)
-    sorted_aperture = sorted(stats['aperture_dist'].items(), key=lambda x: float(x[0].replace('f/','')) if 'f/' in x[0] else 99)
-    aperture_x = [k for k, v in sorted_aperture]
-    aperture_y = [v for k, v in sorted_aperture]
+    # 6. 相机 (Pie) - 前几名 + 其他
+    pie_data = top_with_other(stats['camera_dist'])
+
+    # 6b. 等效焦段 (与焦段图同样的两档视图) 与镜头 (没有镜头信息的不计入)
+    focal35_data = focal_views(stats['focal35_dist'])
+    lens_data = top_with_other({k: v for k, v in stats['lens_dist'].items() if k != UNKNOWN_LENS}, TOP_LENSES)
+    unknown_lens = stats['lens_dist'].get(UNKNOWN_LENS, 0)
     
-    # 6. 相机 (Pie)
-    pie_data = [{'value': v, 'name': k} for k, v in stats['camera_dist'].items()]
+    # 7. 日历热力图 (按整年显示)
+    calendar_data = None
+    if stats['earliest_photo']:
+        calendar_data = calendar_payload(
+            stats['day_dist'],
+            datetime.date(stats['earliest_photo'].year, 1, 1),
+            datetime.date(stats['latest_photo'].year, 12, 31)
+        )
+
+    # 所有图表数据只内嵌一次
+    payload = {
+        'focal': focal_data,
+        'focal35': focal35_data,
+        'lens': lens_data[::-1], # 横向条形图从下往上画，倒序后最多的在最上面
+        'month': month_data,
+        'hour': hour_data,
+        'shutter': shutter_data,
+        'aperture': aperture_data,
+        'camera': pie_data,
+        'calendar': calendar_data,
+        'cross': crosstab_payloads(stats['cube'], stats['primary_camera']),
+    }
 
     # 格式化日期
     date_range = "N/A"
@@ -263,8 +340,7 @@ def generate_html(stats):
     <head>
         <meta charset="utf-8">
         <title>年度摄影报告 - Digital Lens</title>
-        <script src="https://cdn.jsdelivr.net/npm/echarts@5.4.3/dist/echarts.min.js"></script>
-        <link href="https://fonts.googleapis.com/css2?family=Noto+Sans+SC:wght@300;400;700&display=swap" rel="stylesheet">
+        {head_assets(offline)}
         <style>
             /* 沿用参考脚本的配色，调整为更适合摄影的 Cyan/Orange 风格 */
             :root {{ 
@@ -283,7 +359,7 @@ def generate_html(stats):
             }}
             
             body {{ 
-                font-family: 'Noto Sans SC', sans-serif; 
+                font-family: {FONT_STACK}; 
                 background-color: var(--bg); 
                 background-image: 
                     radial-gradient(at 0% 0%, rgba(6, 182, 212, 0.15) 0px, transparent 50%),
@@ -380,6 +456,17 @@ def generate_html(stats):
             .chart-row {{ display: grid; grid-template-columns: 1fr 1fr; gap: 30px; }}
             .chart-box {{ width: 100%; height: 350px; }}
             .chart-wide {{ width: 100%; height: 400px; }}
+            .view-toggle {{ float: right; }}
+            .view-toggle button {{ background: transparent; color: var(--text-dim); border: 1px solid var(--card-border); padding: 2px 10px; font-size: 0.5em; cursor: pointer; }}
+            .view-toggle button.active {{ color: var(--text-main); border-color: var(--accent-primary); }}
+
+            /* Records */
+            .record-grid {{ display: grid; grid-template-columns: repeat(auto-fit, minmax(300px, 1fr)); gap: 20px; }}
+            .record-box {{ background: rgba(15, 23, 42, 0.6); padding: 15px 20px; border-radius: 18px; border: 1px solid rgba(255,255,255,0.05); }}
+            .record-box h3 {{ margin: 0 0 10px; font-size: 1em; color: var(--accent-primary); }}
+            .record-box ol {{ margin: 0; padding-left: 20px; line-height: 1.8; }}
+            .record-box a {{ color: var(--accent-secondary); text-decoration: none; }}
+            .record-meta {{ font-size: 0.85em; color: var(--text-dim); }}
             
             @media (max-width: 768px) {{ .stat-grid, .chart-row {{ grid-template-columns: 1fr; }} .header h1 {{ font-size: 2.5em; }} }}
         </style>
@@ -430,14 +517,36 @@ def generate_html(stats):
                 </div>
             </div>
 
+            <!-- 纪录 -->
+            <div class="card">
+                <h2>🥇 个人纪录</h2>
+                <div class="record-grid">{records_html(stats['records'])}</div>
+            </div>
+
             <!-- 3. 图表区域 -->
             
             <!-- 焦段与月份 -->
             <div class="card">
-                <h2>🔭 焦段统计 (无Exif默认为14mm)</h2>
+                <h2>🔭 焦段统计 (实际焦距，无Exif按14mm计)
+                    <span class="view-toggle" data-chart="chart-focal"><button data-view="fine" class="active">精细</button><button data-view="coarse">粗略</button></span>
+                </h2>
                 <div id="chart-focal" class="chart-wide"></div>
             </div>
 
+            <div class="card">
+                <h2>📐 等效焦段 (35mm)
+                    <span class="view-toggle" data-chart="chart-focal35"><button data-view="fine" class="active">精细</button><button data-view="coarse">粗略</button></span>
+                </h2>
+                <div id="chart-focal35" class="chart-wide"></div>
+                <p style="color: var(--text-dim); font-size: 0.9em;">优先使用 EXIF 里的 35mm 等效焦距，没有时按机身的裁切系数换算；广角 / 长焦徽章按等效焦距统计。{f"另有 {stats['focal35_unknown']} 张照片没有焦距信息，不计入。" if stats['focal35_unknown'] else ""}</p>
+            </div>
+
+            <div class="card">
+                <h2>🔍 镜头使用</h2>
+                <div id="chart-lens" class="chart-wide" style="height: {max(160, 60 + 32 * len(lens_data))}px;"></div>
+                <p style="color: var(--text-dim); font-size: 0.9em;">{f"另有 {unknown_lens} 张照片没有记录镜头信息。" if unknown_lens else "所有照片都记录了镜头信息。"}</p>
+            </div>
+
             <div class="chart-row">
                 <div class="card">
                     <h2>📅 月份活跃度</h2>
@@ -449,10 +558,15 @@ def generate_html(stats):
                 </div>
             </div>
             
+            <div class="card">
+                <h2>🗓️ 拍摄日历</h2>
+                <div id="chart-calendar" style="width: 100%; height: {chart_height(calendar_data)}px;"></div>
+            </div>
+            
             <!-- 参数统计 -->
             <div class="chart-row">
                 <div class="card">
-                    <h2>⚡ 快门速度 (Top 10)</h2>
+                    <h2>⚡ 快门速度 (按档位)</h2>
                     <div id="chart-shutter" class="chart-box"></div>
                 </div>
                 <div class="card">
@@ -461,6 +575,23 @@ def generate_html(stats):
                 </div>
             </div>
             
+            <!-- 交叉分析 -->
+            <div class="card">
+                <h2>🧮 机身 × 焦段</h2>
+                <div id="chart-camera-focal" class="chart-wide" style="height: {max(200, 60 + 36 * len(payload['cross']['camera_focal']['rows']))}px;"></div>
+            </div>
+
+            <div class="card">
+                <h2>🌙 主力机身的时段 × 焦段 <span style="font-size: 0.6em; color: var(--text-dim);">{payload['cross']['hour_focal']['camera'] or ''}</span></h2>
+                <div id="chart-hour-focal" class="chart-wide"></div>
+                <p style="color: var(--text-dim); font-size: 0.9em;">深夜最常用的焦段：{'、'.join(f"{f} ({n} 张)" for f, n in payload['cross']['night_focal']) or '深夜没有拍过照片'}</p>
+            </div>
+
+            <div class="card">
+                <h2>🔺 曝光三角 (快门 × 光圈 × ISO)</h2>
+                <div id="chart-exposure" class="chart-wide" style="height: 450px;"></div>
+            </div>
+
             <!-- 自行发挥：相机型号 -->
             <div class="card">
                 <h2>📷 器材使用占比</h2>
@@ -469,127 +600,207 @@ def generate_html(stats):
 
         </div>
 
+        {data_script(payload)}
         <script>
-            var colorPrimary = '#06b6d4';
-            var colorSecondary = '#f97316';
-            var colorText = '#cbd5e1';
-            var colorSplit = '#334155';
+            {DATA_LOADER_JS}
+            loadReportData(function(DATA) {{
+                var colorPrimary = '#06b6d4';
+                var colorSecondary = '#f97316';
+                var colorText = '#cbd5e1';
+                var colorSplit = '#334155';
             
-            // 1. 焦段图表
-            var chartFocal = echarts.init(document.getElementById('chart-focal'));
-            chartFocal.setOption({{
-                tooltip: {{ trigger: 'axis' }},
-                xAxis: {{ 
-                    type: 'category', 
-                    data: {json.dumps(focal_x)},
-                    axisLabel: {{ color: colorText, rotate: 45 }}
-                }},
-                yAxis: {{ type: 'value', splitLine: {{ lineStyle: {{ color: colorSplit, type: 'dashed' }} }} }},
-                series: [{{
-                    data: {json.dumps(focal_y)},
-                    type: 'bar',
-                    itemStyle: {{ 
-                        color: new echarts.graphic.LinearGradient(0, 0, 0, 1, [
-                            {{ offset: 0, color: colorPrimary }},
-                            {{ offset: 1, color: 'rgba(6, 182, 212, 0.1)' }}
-                        ]),
-                        borderRadius: [4, 4, 0, 0]
+                // 1. 焦段 / 等效焦段图表 (精细 / 粗略切换)
+                function focalChart(id, views, color, fade) {{
+                    var chart = echarts.init(document.getElementById(id));
+                    function show(view) {{
+                        chart.setOption({{
+                            tooltip: {{ trigger: 'axis' }},
+                            xAxis: {{ 
+                                type: 'category', 
+                                data: views[view].x,
+                                axisLabel: {{ color: colorText, rotate: 45 }}
+                            }},
+                            yAxis: {{ type: 'value', splitLine: {{ lineStyle: {{ color: colorSplit, type: 'dashed' }} }} }},
+                            series: [{{
+                                data: views[view].y,
+                                type: 'bar',
+                                large: true,
+                                largeThreshold: {LARGE_THRESHOLD},
+                                itemStyle: {{ 
+                                    color: new echarts.graphic.LinearGradient(0, 0, 0, 1, [
+                                        {{ offset: 0, color: color }},
+                                        {{ offset: 1, color: fade }}
+                                    ]),
+                                    borderRadius: [4, 4, 0, 0]
+                                }}
+                            }}]
+                        }});
                     }}
-                }}]
-            }});
-
-            // 2. 月份图表
-            var chartMonth = echarts.init(document.getElementById('chart-month'));
-            chartMonth.setOption({{
-                tooltip: {{ trigger: 'axis' }},
-                xAxis: {{ 
-                    type: 'category', 
-                    data: ['1月','2月','3月','4月','5月','6月','7月','8月','9月','10月','11月','12月'],
-                    axisLabel: {{ color: colorText }}
-                }},
-                yAxis: {{ type: 'value', splitLine: {{ lineStyle: {{ color: colorSplit, type: 'dashed' }} }} }},
-                series: [{{
-                    data: {json.dumps(month_data)},
-                    type: 'line',
-                    smooth: true,
-                    areaStyle: {{ opacity: 0.3, color: colorSecondary }},
-                    itemStyle: {{ color: colorSecondary }},
-                    lineStyle: {{ width: 3 }}
-                }}]
-            }});
-
-            // 3. 时段图表 (极坐标)
-            var chartHour = echarts.init(document.getElementById('chart-hour'));
-            chartHour.setOption({{
-                tooltip: {{ trigger: 'item' }},
-                polar: {{ radius: [30, '80%'] }},
-                angleAxis: {{ type: 'category', data: {json.dumps([str(i) for i in range(24)])}, startAngle: 90 }},
-                radiusAxis: {{ min: 0 }},
-                series: [{{
-                    type: 'bar',
-                    data: {json.dumps(hour_data)},
-                    coordinateSystem: 'polar',
-                    itemStyle: {{ color: '#8b5cf6' }}
-                }}]
-            }});
+                    show('fine');
+                    document.querySelectorAll('.view-toggle[data-chart="' + id + '"] button').forEach(function(btn, i, buttons) {{
+                        btn.addEventListener('click', function() {{
+                            buttons.forEach(function(b) {{ b.classList.toggle('active', b === btn); }});
+                            show(btn.getAttribute('data-view'));
+                        }});
+                    }});
+                    return chart;
+                }}
+                var chartFocal = focalChart('chart-focal', DATA.focal, colorPrimary, 'rgba(6, 182, 212, 0.1)');
+                var chartFocal35 = focalChart('chart-focal35', DATA.focal35, colorSecondary, 'rgba(249, 115, 22, 0.1)');
+
+                // 镜头 (横向条形图)
+                var chartLens = echarts.init(document.getElementById('chart-lens'));
+                chartLens.setOption({{
+                    tooltip: {{ trigger: 'axis', axisPointer: {{ type: 'shadow' }} }},
+                    grid: {{ containLabel: true, left: 10, right: 30, top: 10, bottom: 10 }},
+                    xAxis: {{ type: 'value', splitLine: {{ lineStyle: {{ color: colorSplit, type: 'dashed' }} }} }},
+                    yAxis: {{ type: 'category', data: DATA.lens.map(function(d) {{ return d.name; }}), axisLabel: {{ color: colorText }} }},
+                    series: [{{
+                        type: 'bar',
+                        data: DATA.lens.map(function(d) {{ return d.value; }}),
+                        itemStyle: {{ color: '#8b5cf6', borderRadius: [0, 4, 4, 0] }}
+                    }}]
+                }});
+
+                // 2. 月份图表
+                var chartMonth = echarts.init(document.getElementById('chart-month'));
+                chartMonth.setOption({{
+                    tooltip: {{ trigger: 'axis' }},
+                    xAxis: {{ 
+                        type: 'category', 
+                        data: ['1月','2月','3月','4月','5月','6月','7月','8月','9月','10月','11月','12月'],
+                        axisLabel: {{ color: colorText }}
+                    }},
+                    yAxis: {{ type: 'value', splitLine: {{ lineStyle: {{ color: colorSplit, type: 'dashed' }} }} }},
+                    series: [{{
+                        data: DATA.month,
+                        type: 'line',
+                        smooth: true,
+                        areaStyle: {{ opacity: 0.3, color: colorSecondary }},
+                        itemStyle: {{ color: colorSecondary }},
+                        lineStyle: {{ width: 3 }}
+                    }}]
+                }});
+
+                // 3. 时段图表 (极坐标)
+                var chartHour = echarts.init(document.getElementById('chart-hour'));
+                chartHour.setOption({{
+                    tooltip: {{ trigger: 'item' }},
+                    polar: {{ radius: [30, '80%'] }},
+                    angleAxis: {{ type: 'category', data: {json.dumps([str(i) for i in range(24)])}, startAngle: 90 }},
+                    radiusAxis: {{ min: 0 }},
+                    series: [{{
+                        type: 'bar',
+                        data: DATA.hour,
+                        coordinateSystem: 'polar',
+                        itemStyle: {{ color: '#8b5cf6' }}
+                    }}]
+                }});
             
-            // 4. 快门图表
-            var chartShutter = echarts.init(document.getElementById('chart-shutter'));
-            chartShutter.setOption({{
-                tooltip: {{ trigger: 'axis' }},
-                grid: {{ containLabel: true, left: 10, right: 10, bottom: 10, top: 20 }},
-                xAxis: {{ type: 'value', splitLine: {{ show: false }} }},
-                yAxis: {{ 
-                    type: 'category', 
-                    data: {json.dumps(shutter_x)},
-                    axisLabel: {{ color: colorText }}
-                }},
-                series: [{{
-                    type: 'bar',
-                    data: {json.dumps(shutter_y)},
-                    itemStyle: {{ borderRadius: [0, 4, 4, 0], color: colorSecondary }}
-                }}]
-            }});
+                // 4. 快门图表
+                var chartShutter = echarts.init(document.getElementById('chart-shutter'));
+                chartShutter.setOption({{
+                    tooltip: {{ trigger: 'axis' }},
+                    grid: {{ containLabel: true, left: 10, right: 10, bottom: 10, top: 20 }},
+                    xAxis: {{ type: 'value', splitLine: {{ show: false }} }},
+                    yAxis: {{ 
+                        type: 'category', 
+                        inverse: true,
+                        data: DATA.shutter.x,
+                        axisLabel: {{ color: colorText }}
+                    }},
+                    series: [{{
+                        type: 'bar',
+                        data: DATA.shutter.y,
+                        itemStyle: {{ borderRadius: [0, 4, 4, 0], color: colorSecondary }}
+                    }}]
+                }});
             
-            // 5. 光圈图表
-            var chartAperture = echarts.init(document.getElementById('chart-aperture'));
-            chartAperture.setOption({{
-                tooltip: {{ trigger: 'axis' }},
-                xAxis: {{ type: 'category', data: {json.dumps(aperture_x)}, axisLabel: {{ color: colorText }} }},
-                yAxis: {{ type: 'value', splitLine: {{ lineStyle: {{ color: colorSplit }} }} }},
-                series: [{{
-                    type: 'bar',
-                    data: {json.dumps(aperture_y)},
-                    itemStyle: {{ color: colorPrimary }}
-                }}]
+                // 5. 光圈图表
+                var chartAperture = echarts.init(document.getElementById('chart-aperture'));
+                chartAperture.setOption({{
+                    tooltip: {{ trigger: 'axis' }},
+                    xAxis: {{ type: 'category', data: DATA.aperture.x, axisLabel: {{ color: colorText }} }},
+                    yAxis: {{ type: 'value', splitLine: {{ lineStyle: {{ color: colorSplit }} }} }},
+                    series: [{{
+                        type: 'bar',
+                        data: DATA.aperture.y,
+                        itemStyle: {{ color: colorPrimary }}
+                    }}]
+                }});
+
+                // 6. 相机饼图
+                var chartCamera = echarts.init(document.getElementById('chart-camera'));
+                chartCamera.setOption({{
+                    tooltip: {{ trigger: 'item' }},
+                    series: [{{
+                        type: 'pie',
+                        radius: ['40%', '70%'],
+                        itemStyle: {{ borderRadius: 10, borderColor: '#1e293b', borderWidth: 2 }},
+                        data: DATA.camera
+                    }}]
+                }});
+
+                // 7. 日历热力图
+                {calendar_script('chartCalendar', 'chart-calendar', 'DATA.calendar', '照片', ['#1e293b', '#06b6d4', '#f97316'], unit=' 张')}
+
+                // 8. 交叉热力图 (机身 × 焦段、主力机身 时段 × 焦段)
+                function crossHeatmap(id, table, xName, yName) {{
+                    var chart = echarts.init(document.getElementById(id));
+                    var max = 1;
+                    table.cells.forEach(function(c) {{ if (c[2] > max) max = c[2]; }});
+                    chart.setOption({{
+                        tooltip: {{ formatter: function(p) {{ return table.rows[p.value[1]] + ' · ' + table.cols[p.value[0]] + '<br/>' + p.value[2] + ' 张'; }} }},
+                        grid: {{ containLabel: true, left: 10, right: 30, top: 10, bottom: 50 }},
+                        xAxis: {{ type: 'category', name: xName, data: table.cols, axisLabel: {{ color: colorText }}, splitArea: {{ show: true }} }},
+                        yAxis: {{ type: 'category', name: yName, data: table.rows, axisLabel: {{ color: colorText }}, splitArea: {{ show: true }} }},
+                        visualMap: {{ min: 0, max: max, calculable: true, orient: 'horizontal', left: 'center', bottom: 0,
+                                      inRange: {{ color: ['#1e293b', colorPrimary, colorSecondary] }}, textStyle: {{ color: colorText }} }},
+                        series: [{{ type: 'heatmap', data: table.cells, progressive: 1000 }}]
+                    }});
+                    return chart;
+                }}
+                var chartCameraFocal = crossHeatmap('chart-camera-focal', DATA.cross.camera_focal, '焦段', '');
+                var chartHourFocal = crossHeatmap('chart-hour-focal', DATA.cross.hour_focal, '时', '焦段');
+
+                // 9. 曝光三角：气泡大小为张数，每个 ISO 档一个系列 (点图例可以单独看某一档)
+                var exposure = DATA.cross.exposure;
+                var chartExposure = echarts.init(document.getElementById('chart-exposure'));
+                chartExposure.setOption({{
+                    tooltip: {{ formatter: function(p) {{ return p.seriesName + '<br/>' + exposure.shutters[p.value[0]] + ' · ' + exposure.apertures[p.value[1]] + '<br/>' + p.value[2] + ' 张'; }} }},
+                    legend: {{ type: 'scroll', top: 0, textStyle: {{ color: colorText }} }},
+                    grid: {{ containLabel: true, left: 10, right: 30, top: 40, bottom: 10 }},
+                    xAxis: {{ type: 'category', name: '快门', data: exposure.shutters, axisLabel: {{ color: colorText, rotate: 45 }}, splitLine: {{ show: true, lineStyle: {{ color: colorSplit, type: 'dashed' }} }} }},
+                    yAxis: {{ type: 'category', name: '光圈', data: exposure.apertures, axisLabel: {{ color: colorText }}, splitLine: {{ show: true, lineStyle: {{ color: colorSplit, type: 'dashed' }} }} }},
+                    series: exposure.series.map(function(s) {{
+                        return {{ name: s.name, type: 'scatter', data: s.data, symbolSize: function(v) {{ return Math.min(6 + Math.sqrt(v[2]) * 3, 48); }}, itemStyle: {{ opacity: 0.7 }} }};
+                    }})
+                }});
+
+                window.onresize = function() {{
+                    chartFocal.resize(); chartMonth.resize(); chartHour.resize(); 
+                    chartShutter.resize(); chartAperture.resize(); chartCamera.resize(); chartCalendar.resize();
+                    chartCameraFocal.resize(); chartHourFocal.resize(); chartExposure.resize(); chartFocal35.resize(); chartLens.resize();
+                }};
             }});
-
-            // 6. 相机饼图
-            var chartCamera = echarts.init(document.getElementById('chart-camera'));
-            chartCamera.setOption({{
-                tooltip: {{ trigger: 'item' }},
-                series: [{{
-                    type: 'pie',
-                    radius: ['40%', '70%'],
-                    itemStyle: {{ borderRadius: 10, borderColor: '#1e293b', borderWidth: 2 }},
-                    data: {json.dumps(pie_data)}
-                }}]
-            }});
-
-            window.onresize = function() {{
-                chartFocal.resize(); chartMonth.resize(); chartHour.resize(); 
-                chartShutter.resize(); chartAperture.resize(); chartCamera.resize();
-            }};
         </script>
     </body>
     </html>
     """
-    
-    with open(OUTPUT_HTML, "w", encoding="utf-8") as f:
+    return html_content
+
+def generate_html(stats, offline=False, output=None, open_browser=True):
+    with tracing.stage(3, 3, "评估成就徽章并生成报告页面") as st:
+        html_content = render_html(stats, offline=offline)
+        st.note = f"{len(html_content) // 1024} KB"
+    output = output or OUTPUT_HTML
+    with open(output, "w", encoding="utf-8") as f:
         f.write(html_content)
     
-    print(f"\n🎉 报告已生成！文件路径: {os.path.abspath(OUTPUT_HTML)}")
-    webbrowser.open('file://' + os.path.abspath(OUTPUT_HTML))
+    print(f"\n🎉 报告已生成！文件路径: {os.path.abspath(output)}")
+    if open_browser:
+        webbrowser.open('file://' + os.path.abspath(output))
+    return output
 
 if __name__ == "__main__":
     try:
@@ -605,13 +816,15 @@ if __name__ == "__main__":
         if not valid_paths:
             print("❌ 没有提供有效的文件夹路径，请检查后重试。")
         else:
-            photos = scan_folders(valid_paths)
+            photos = scan_folders(valid_paths, export=EXPORT_PATH, background=BACKGROUND_SCAN)
             if photos:
                 stats = analyze_data(photos)
-                generate_html(stats)
+                generate_html(stats, offline=OFFLINE_REPORT)
             else:
                 print("⚠️ 未找到有效的 JPG 图片。")
         
+    except KeyboardInterrupt:
+        print("\n👋 已退出。")
     except Exception as e:
         import traceback
         traceback.print_exc()
@@ -0,0 +1,124 @@
+import math
+
+# ================= 配置区 =================
+# 焦段对数分桶：每翻一倍焦距分几个桶 (精细 / 粗略两档，页面上可以切换)
+FOCAL_FINE_PER_OCTAVE = 6
+FOCAL_COARSE_PER_OCTAVE = 2
+FOCAL_MIN, FOCAL_MAX = 8, 2400
+# 不同焦距不超过这么多个时，精细视图直接按实际焦距显示 (定焦用户看到的还是 35mm / 50mm)
+EXACT_FOCAL_LIMIT = 40
+# 器材饼图最多几块，其余合并为"其他"
+TOP_CAMERAS = 9
+# 镜头条形图最多几行
+TOP_LENSES = 12
+# 光圈柱状图最多几根 (最常用的几档按 f 值排列，其余合并为"其他")
+TOP_APERTURES = 12
+# 类目超过这么多时让 ECharts 切到 large 模式
+LARGE_THRESHOLD = 200
+# ========================================
+
+# 快门整档 (秒)，快门分布按最近的整档归并、从快到慢排列
+SHUTTER_STOPS = [1/8000, 1/4000, 1/2000, 1/1000, 1/500, 1/250, 1/125, 1/60, 1/30, 1/15, 1/8, 1/4, 1/2,
+                 1, 2, 4, 8, 15, 30]
+SHUTTER_LOG = [math.log2(s) for s in SHUTTER_STOPS]
+
+def shutter_seconds(label):
+    """'1/250s' -> 0.004，'2.0s' -> 2.0"""
+    text = label.rstrip('s')
+    if text.startswith('1/'):
+        return 1 / float(text[2:])
+    return float(text)
+
+def shutter_label(seconds):
+    return f"1/{int(round(1 / seconds))}s" if seconds < 1 else f"{seconds:g}s"
+
+def shutter_stop(seconds):
+    """快门时间 -> 最近的整档下标 (超出 1/8000 ~ 30s 的归到两端)"""
+    x = math.log2(seconds)
+    return min(range(len(SHUTTER_LOG)), key=lambda i: abs(SHUTTER_LOG[i] - x))
+
+def shutter_bucket(label):
+    """'1/320s' -> '1/250s'，无法解析时返回 None；给交叉表归并快门维度用"""
+    try:
+        return shutter_label(SHUTTER_STOPS[shutter_stop(shutter_seconds(label))])
+    except (ValueError, ZeroDivisionError):
+        return None
+
+def shutter_histogram(shutter_dist):
+    """{'1/320s': n, ...} -> 按整档从快到慢排列的 {'x', 'y'}，只保留用到的档位区间"""
+    counts = [0] * len(SHUTTER_STOPS)
+    for label, n in shutter_dist.items():
+        try:
+            counts[shutter_stop(shutter_seconds(label))] += n
+        except (ValueError, ZeroDivisionError):
+            continue
+    used = [i for i, n in enumerate(counts) if n]
+    if not used:
+        return {'x': [], 'y': []}
+    lo, hi = used[0], used[-1] + 1
+    return {'x': [shutter_label(s) for s in SHUTTER_STOPS[lo:hi]], 'y': counts[lo:hi]}
+
+def focal_bin(focal, per_octave):
+    f = min(max(focal, FOCAL_MIN), FOCAL_MAX - 1)
+    return int(math.log2(f / FOCAL_MIN) * per_octave)
+
+def focal_bin_label(index, per_octave):
+    lo = FOCAL_MIN * 2 ** (index / per_octave)
+    hi = FOCAL_MIN * 2 ** ((index + 1) / per_octave)
+    return f"{round(lo)}-{round(hi)}mm"
+
+def focal_bucket(per_octave):
+    """交叉表用：焦距 -> 对数桶标签"""
+    return lambda focal: None if focal is None else focal_bin_label(focal_bin(focal, per_octave), per_octave)
+
+def focal_histogram(focal_dist, per_octave):
+    """对数分桶的焦段分布，最短到最长焦之间的空桶也保留 (横轴按比例)"""
+    counts = {}
+    for focal, n in focal_dist.items():
+        i = focal_bin(focal, per_octave)
+        counts[i] = counts.get(i, 0) + n
+    if not counts:
+        return {'x': [], 'y': []}
+    bins = range(min(counts), max(counts) + 1)
+    return {'x': [focal_bin_label(i, per_octave) for i in bins], 'y': [counts.get(i, 0) for i in bins]}
+
+def focal_views(focal_dist):
+    """焦段图的两档视图；桶数上限由分桶方式决定，与照片库有多少种焦距无关"""
+    if len(focal_dist) <= EXACT_FOCAL_LIMIT:
+        exact = sorted(focal_dist.items())
+        fine = {'x': [f"{k}mm" for k, _ in exact], 'y': [v for _, v in exact]}
+    else:
+        fine = focal_histogram(focal_dist, FOCAL_FINE_PER_OCTAVE)
+    return {'fine': fine, 'coarse': focal_histogram(focal_dist, FOCAL_COARSE_PER_OCTAVE)}
+
+def f_number(label):
+    """'f/2.8' -> 2.8，无法解析时返回 None"""
+    try:
+        return float(label.replace('f/', ''))
+    except ValueError:
+        return None
+
+def aperture_bars(aperture_dist, n=TOP_APERTURES, other='其他'):
+    """
+    {'f/2.8': n, ...} -> {'x', 'y'}：照片最多的 n-1 档按 f 值从小到大排列，
+    其余合并成最后一根 "其他 (k 档)"；不超过 n 档时全部显示
+    """
+    ranked = sorted(aperture_dist.items(), key=lambda x: (-x[1], x[0]))
+    head, tail = (ranked, []) if len(ranked) <= n else (ranked[:n - 1], ranked[n - 1:])
+    head.sort(key=lambda x: (f_number(x[0]) is None, f_number(x[0]) or 0, x[0]))
+    x = [k for k, _ in head]
+    y = [v for _, v in head]
+    if tail:
+        x.append(f"{other} ({len(tail)} 档)")
+        y.append(sum(v for _, v in tail))
+    return {'x': x, 'y': y}
+
+def top_with_other(counts, n=TOP_CAMERAS, other='其他'):
+    """前 n-1 项 + "其他 (k 款)"；不超过 n 项时原样返回。输出 ECharts 饼图的 data"""
+    ranked = sorted(counts.items(), key=lambda x: (-x[1], str(x[0])))
+    if len(ranked) <= n:
+        return [{'value': v, 'name': k} for k, v in ranked]
+    head, tail = ranked[:n - 1], ranked[n - 1:]
+    data = [{'value': v, 'name': k} for k, v in head]
+    data.append({'value': sum(v for _, v in tail), 'name': f"{other} ({len(tail)} 款)"})
+    return data
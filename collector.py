@@ -0,0 +1,151 @@
+import base64
+import queue
+import subprocess
+import threading
+
+# ================= 配置区 =================
+POWERSHELL_EXE = 'powershell'
+# 单次查询超时 (秒)，扫描多年日志时可以调大
+DEFAULT_TIMEOUT = 300
+# ========================================
+
+# 帧协议 (每帧都是一行，内容统一 base64(UTF-8)，不受控制台代码页影响)：
+#   请求: <base64 脚本>\n
+#   响应: @@FRAME <base64 输出>\n
+# 响应行之外的任何输出 (启动横幅、警告) 都会被忽略。
+FRAME_PREFIX = '@@FRAME '
+
+BOOTSTRAP = r"""
+[Console]::OutputEncoding = [Text.Encoding]::UTF8
+while ($true) {
+    $line = [Console]::In.ReadLine()
+    if ($line -eq $null) { break }
+    try {
+        $script = [Text.Encoding]::UTF8.GetString([Convert]::FromBase64String($line))
+        $out = (Invoke-Expression $script | Out-String)
+    } catch {
+        $out = ''
+    }
+    if ($out -eq $null) { $out = '' }
+    $b = [Convert]::ToBase64String([Text.Encoding]::UTF8.GetBytes($out))
+    [Console]::Out.WriteLine('@@FRAME ' + $b)
+    [Console]::Out.Flush()
+}
+"""
+
+
+def default_shell_command():
+    """常驻 PowerShell：读循环通过 -EncodedCommand (UTF-16LE base64) 传入，只冷启动一次"""
+    encoded = base64.b64encode(BOOTSTRAP.encode('utf-16-le')).decode('ascii')
+    return [POWERSHELL_EXE, '-NoLogo', '-NoProfile', '-NonInteractive', '-EncodedCommand', encoded]
+
+
+class CollectorError(RuntimeError):
+    pass
+
+
+class PowerShellCollector:
+    """
+    常驻的 PowerShell 采集进程。
+
+    多次查询 (不同年份、不同时间段) 复用同一个进程，省掉每次冷启动和模块加载；
+    查询超时会杀掉进程，进程崩溃会在下一次查询时自动重启。
+    command 可替换成任意实现了同一帧协议的解释器 (例如 ps_standin.py)，方便在 Linux 上测试。
+    """
+
+    def __init__(self, command=None, timeout=DEFAULT_TIMEOUT):
+        self.command = list(command or default_shell_command())
+        self.timeout = timeout
+        self.proc = None
+        self.lines = None
+        self.starts = 0
+        self._lock = threading.Lock()
+
+    # ---------- 进程管理 ----------
+    def start(self):
+        self.starts += 1
+        self.proc = subprocess.Popen(
+            self.command,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+        )
+        self.lines = queue.Queue()
+        reader = threading.Thread(target=self._read_stdout, args=(self.proc, self.lines), daemon=True)
+        reader.start()
+
+    @staticmethod
+    def _read_stdout(proc, lines):
+        for raw in iter(proc.stdout.readline, b''):
+            lines.put(raw)
+        lines.put(None)  # EOF: 进程退出
+
+    @property
+    def restarts(self):
+        return max(self.starts - 1, 0)
+
+    def alive(self):
+        return self.proc is not None and self.proc.poll() is None
+
+    def close(self):
+        if self.proc is None:
+            return
+        try:
+            self.proc.stdin.close()
+        except OSError:
+            pass
+        try:
+            self.proc.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            self.proc.kill()
+            self.proc.wait()
+        self.proc = None
+
+    def kill(self):
+        if self.proc is not None:
+            if self.proc.poll() is None:
+                self.proc.kill()
+            self.proc.wait()
+            self.proc = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ---------- 查询 ----------
+    def _request(self, script, timeout):
+        payload = base64.b64encode(script.encode('utf-8')) + b'\n'
+        self.proc.stdin.write(payload)
+        self.proc.stdin.flush()
+        while True:
+            raw = self.lines.get(timeout=timeout)
+            if raw is None:
+                raise CollectorError("采集进程意外退出")
+            # 只去掉换行：空输出的帧是 "@@FRAME " 加空串，strip() 会连前缀后的空格一起去掉
+            line = raw.decode('utf-8', errors='ignore').rstrip('\r\n')
+            if line.startswith(FRAME_PREFIX):
+                return base64.b64decode(line[len(FRAME_PREFIX):]).decode('utf-8', errors='ignore')
+
+    def run(self, script, timeout=None, retries=1):
+        """
+        执行一段脚本并返回它的文本输出。
+        超时或进程崩溃时重启进程并重试 retries 次，仍然失败则抛出 CollectorError。
+        """
+        timeout = self.timeout if timeout is None else timeout
+        with self._lock:
+            for attempt in range(retries + 1):
+                if not self.alive():
+                    self.kill()
+                    self.start()
+                try:
+                    return self._request(script, timeout)
+                except queue.Empty:
+                    # 卡住的进程无法再对齐请求/响应，只能杀掉重来
+                    self.kill()
+                    error = CollectorError(f"查询超时 ({timeout}s)")
+                except (CollectorError, OSError) as e:
+                    self.kill()
+                    error = e if isinstance(e, CollectorError) else CollectorError(str(e))
+            raise error
@@ -0,0 +1,345 @@
+import os
+import sys
+import json
+import math
+import datetime
+from array import array
+
+from lens_info import UNKNOWN_LENS
+
+# ================= 配置区 =================
+# 每攒够这么多行写一次 (Parquet 的一个 row group / .npy 的一段追加)，内存只和这个数有关
+BATCH_ROWS = 64 * 1024
+# 没有 pyarrow 时的目录格式：每列一个 .npy，字符串列存字典编码，字典写在 schema.json
+FALLBACK_SUFFIX = ".cols"
+# text 列 (每行几乎都不同的字符串，比如路径) 不做字典编码：.npy 存每行的结束偏移，UTF-8 字节另存一个文件
+TEXT_SUFFIX = ".bin"
+# ========================================
+
+# 列类型 -> (array 类型码, .npy dtype)
+NPY_TYPES = {
+    'int64': ('q', '<i8'),
+    'int32': ('i', '<i4'),
+    'int16': ('h', '<i2'),
+    'float64': ('d', '<f8'),
+    'timestamp': ('q', '<i8'),   # 本地挂钟时间距 1970-01-01 的秒数 (不带时区，与 EXIF 一致)
+    'string': ('i', '<i4'),      # 字典编码
+    'text': ('q', '<i8'),        # 在 .bin 里的结束偏移 (字节)
+}
+NPY_HEADER_BYTES = 128   # 预留定长文件头，写完再回填行数
+EPOCH = datetime.datetime(1970, 1, 1)
+
+# pyarrow 导入很慢，第一次读写 Parquet 时才导入 (None 表示还没试过，False 表示没装)
+pa = pq = None
+
+def load_arrow():
+    global pa, pq
+    if pa is None:
+        try:
+            import pyarrow
+            import pyarrow.parquet
+            pa, pq = pyarrow, pyarrow.parquet
+        except ImportError:
+            pa = pq = False
+    return pq is not False
+
+# 照片：get_exif_data 的结果；事件：采集器的 {Id, TimeCreated, Type}
+PHOTO_SCHEMA = [
+    ('taken', 'timestamp'),
+    ('focal_mm', 'int16'),
+    ('shutter', 'string'),
+    ('shutter_s', 'float64'),
+    ('aperture', 'string'),
+    ('f_number', 'float64'),
+    ('camera', 'string'),
+    ('iso', 'int32'),
+    ('path', 'text'),
+    ('focal35_mm', 'int16'),   # 0 表示未知
+    ('lens', 'string'),
+]
+EVENT_SCHEMA = [
+    ('time_ms', 'int64'),
+    ('id', 'int32'),
+    ('type', 'string'),
+]
+
+def photo_row(p):
+    return (p['DateObject'], p['FocalLength'], p['ShutterSpeed'], p.get('ShutterVal', math.nan),
+            p['Aperture'], p.get('ApertureVal', math.nan), p['Camera'], p['ISO'], p.get('Path') or '',
+            p.get('Focal35', p['FocalLength']) or 0, p.get('Lens', UNKNOWN_LENS))
+
+def photo_from_row(row):
+    """还原成 get_exif_data 的返回格式，analyze_data / combined 可以直接使用"""
+    # 早期的导出没有 path / 等效焦距 / 镜头列：等效焦距按实际焦距处理
+    taken, focal, shutter, shutter_s, aperture, f_number, camera, iso = row[:8]
+    path = row[8] if len(row) > 8 else ''
+    focal35, lens = row[9:11] if len(row) > 10 else (focal, UNKNOWN_LENS)
+    data = {
+        'FocalLength': focal,
+        'Month': taken.month,
+        'Hour': taken.hour,
+        'Year': taken.year,
+        'DateObject': taken,
+        'ShutterSpeed': shutter,
+        'Aperture': aperture,
+        # Parquet 每行解出一个新字符串，驻留后同型号共享一份
+        'Camera': sys.intern(camera),
+        'Lens': sys.intern(lens),
+        'Focal35': focal35 or None,
+        'ISO': iso,
+    }
+    if not math.isnan(shutter_s):
+        data['ShutterVal'] = shutter_s
+    if not math.isnan(f_number):
+        data['ApertureVal'] = f_number
+    if path:
+        data['Path'] = path
+    return data
+
+def event_row(e, parse_time):
+    """返回 None 表示时间解析失败 (这类事件分析器本来也会丢弃)"""
+    dt = parse_time(str(e.get('TimeCreated', '')))
+    if dt is None:
+        return None
+    return (int(round(dt.timestamp() * 1000)), int(e.get('Id') or 0), e.get('Type') or '')
+
+def event_from_row(row):
+    ms, eid, etype = row
+    return {'Id': eid, 'TimeCreated': f"/Date({ms})/", 'Type': etype}
+
+# ---------- .npy (无 pyarrow 时) ----------
+def npy_header(dtype, rows):
+    header = f"{{'descr': '{dtype}', 'fortran_order': False, 'shape': ({rows},), }}"
+    header = header.ljust(NPY_HEADER_BYTES - 10 - 1) + '\n'
+    return b'\x93NUMPY\x01\x00' + len(header).to_bytes(2, 'little') + header.encode('latin1')
+
+def iter_npy(path, typecode, batch_rows=BATCH_ROWS):
+    """
+    按 batch_rows 个元素一段读取自己写出的 .npy (跳过文件头后顺序读)，内存只与批大小有关；
+    NumPy 也可以直接 np.load(path, mmap_mode='r')
+    """
+    itemsize = array(typecode).itemsize
+    with open(path, 'rb') as f:
+        f.seek(8)
+        f.seek(10 + int.from_bytes(f.read(2), 'little'))
+        while True:
+            chunk = f.read(batch_rows * itemsize)
+            if not chunk:
+                return
+            values = array(typecode)
+            values.frombytes(chunk)
+            if sys.byteorder == 'big':
+                values.byteswap()
+            yield values
+
+def iter_text(offsets, path):
+    """text 列：按偏移批次从 .bin 里切出对应的字符串，一次只读一批的字节"""
+    with open(path, 'rb') as f:
+        try:
+            for ends in offsets:
+                base = f.tell()
+                data = f.read(ends[-1] - base)
+                values, start = [], 0
+                for end in ends:
+                    values.append(data[start:end - base].decode('utf-8'))
+                    start = end - base
+                yield values
+        finally:
+            offsets.close()
+
+def to_number(kind, value):
+    if kind == 'timestamp':
+        return int((value - EPOCH).total_seconds())
+    return value
+
+def from_number(kind, value):
+    if kind == 'timestamp':
+        return EPOCH + datetime.timedelta(seconds=value)
+    return value
+
+class ColumnarWriter:
+    """
+    流式列式写入：append() 一行行写，每 BATCH_ROWS 行落盘一次。
+    path 以 .parquet 结尾且装了 pyarrow 时写 Parquet，否则写 <名字>.cols/ 目录。
+    """
+
+    def __init__(self, path, schema, batch_rows=BATCH_ROWS):
+        self.schema = schema
+        self.batch_rows = batch_rows
+        self.rows = 0
+        self.buffer = [[] for _ in schema]
+        self.parquet = path.endswith('.parquet') and load_arrow()
+        if path.endswith('.parquet') and not self.parquet:
+            path = path[:-len('.parquet')] + FALLBACK_SUFFIX
+            print(f"💡 没有安装 pyarrow，改为写入 {path} (每列一个 .npy)，读回时用这个路径")
+        self.path = path
+        if self.parquet:
+            self.arrow_schema = pa.schema([(name, self.arrow_type(kind)) for name, kind in schema])
+            self.writer = pq.ParquetWriter(path, self.arrow_schema, compression='zstd')
+        else:
+            os.makedirs(path, exist_ok=True)
+            self.files = []
+            self.blobs = []
+            for name, kind in schema:
+                f = open(os.path.join(path, name + '.npy'), 'wb')
+                f.write(npy_header(NPY_TYPES[kind][1], 0))
+                self.files.append(f)
+                self.blobs.append(open(os.path.join(path, name + TEXT_SUFFIX), 'wb') if kind == 'text' else None)
+            self.dictionaries = [{} if kind == 'string' else None for _, kind in schema]
+
+    @staticmethod
+    def arrow_type(kind):
+        if kind == 'string':
+            return pa.dictionary(pa.int32(), pa.string())
+        if kind == 'text':
+            return pa.string()
+        if kind == 'timestamp':
+            return pa.timestamp('s')
+        return getattr(pa, kind)()
+
+    def append(self, row):
+        for column, value in zip(self.buffer, row):
+            column.append(value)
+        if len(self.buffer[0]) >= self.batch_rows:
+            self.flush()
+
+    def flush(self):
+        n = len(self.buffer[0])
+        if not n:
+            return
+        if self.parquet:
+            arrays = []
+            for (name, kind), column in zip(self.schema, self.buffer):
+                if kind == 'string':
+                    arrays.append(pa.array(column, pa.string()).dictionary_encode())
+                else:
+                    arrays.append(pa.array(column, self.arrow_type(kind)))
+            self.writer.write_table(pa.Table.from_arrays(arrays, schema=self.arrow_schema))
+        else:
+            for (name, kind), column, f, blob, dictionary in zip(self.schema, self.buffer, self.files, self.blobs, self.dictionaries):
+                if dictionary is not None:
+                    codes = array('i', [dictionary.setdefault(v, len(dictionary)) for v in column])
+                elif blob is not None:
+                    codes = array('q')
+                    end = blob.tell()
+                    for v in column:
+                        data = v.encode('utf-8')
+                        blob.write(data)
+                        end += len(data)
+                        codes.append(end)
+                else:
+                    codes = array(NPY_TYPES[kind][0], [to_number(kind, v) for v in column])
+                if sys.byteorder == 'big':
+                    codes.byteswap()
+                codes.tofile(f)
+        self.rows += n
+        self.buffer = [[] for _ in self.schema]
+
+    def close(self):
+        self.flush()
+        if self.parquet:
+            self.writer.close()
+            return self.path
+        for (name, kind), f, blob in zip(self.schema, self.files, self.blobs):
+            f.seek(0)
+            f.write(npy_header(NPY_TYPES[kind][1], self.rows))
+            f.close()
+            if blob is not None:
+                blob.close()
+        meta = {
+            'rows': self.rows,
+            'columns': [{'name': name, 'type': kind} for name, kind in self.schema],
+            'dictionaries': {name: list(d) for (name, _), d in zip(self.schema, self.dictionaries) if d is not None},
+        }
+        with open(os.path.join(self.path, 'schema.json'), "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False)
+        return self.path
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+def resolve_path(path):
+    """
+    没装 pyarrow 时写 photos.parquet 实际得到的是 photos.cols/：
+    按 .parquet 路径读取而该文件不存在时，自动改用同名的 .cols 目录
+    """
+    path = path.rstrip('/\\')
+    if path.endswith('.parquet') and not os.path.exists(path):
+        fallback = path[:-len('.parquet')] + FALLBACK_SUFFIX
+        if os.path.isdir(fallback):
+            return fallback
+    return path
+
+def is_columnar(path):
+    return path.endswith('.parquet') or (path.rstrip('/\\').endswith(FALLBACK_SUFFIX) and os.path.isdir(path))
+
+def iter_rows(path, batch_rows=BATCH_ROWS):
+    """按批读出元组行 (列顺序与写入时的 schema 一致)，同时只有一批在内存里"""
+    path = resolve_path(path)
+    if path.endswith('.parquet'):
+        if not load_arrow():
+            raise RuntimeError(f"读取 {path} 需要先安装 pyarrow: pip install pyarrow")
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=batch_rows):
+            yield from zip(*(column.to_pylist() for column in batch.columns))
+        return
+
+    with open(os.path.join(path, 'schema.json'), encoding="utf-8") as f:
+        meta = json.load(f)
+    readers = []
+    for col in meta['columns']:
+        kind = col['type']
+        chunks = iter_npy(os.path.join(path, col['name'] + '.npy'), NPY_TYPES[kind][0], batch_rows)
+        if kind == 'text':
+            chunks = iter_text(chunks, os.path.join(path, col['name'] + TEXT_SUFFIX))
+        readers.append((kind, meta['dictionaries'].get(col['name']), chunks))
+    try:
+        while True:
+            columns = []
+            for kind, dictionary, chunks in readers:
+                values = next(chunks, None)
+                if values is None:
+                    return
+                if dictionary is not None:
+                    columns.append([dictionary[v] for v in values])
+                elif kind == 'text':
+                    columns.append(values)
+                elif kind == 'timestamp':
+                    columns.append([from_number(kind, v) for v in values])
+                else:
+                    columns.append(values)
+            yield from zip(*columns)
+    finally:
+        for _, _, chunks in readers:
+            chunks.close()
+
+# ---------- 照片 / 事件 ----------
+def export_photos(photos, path, batch_rows=BATCH_ROWS):
+    """边产出边写入：包一层生成器，原样产出照片，同时按批写进列式文件"""
+    with ColumnarWriter(path, PHOTO_SCHEMA, batch_rows) as writer:
+        for p in photos:
+            writer.append(photo_row(p))
+            yield p
+    print(f"💾 已导出 {writer.rows} 张照片的 EXIF 记录: {os.path.abspath(writer.path)}")
+
+def load_photos(path):
+    return [photo_from_row(row) for row in iter_rows(path)]
+
+def export_events(events, path, batch_rows=BATCH_ROWS):
+    """events 可以是列表或任意可迭代对象，返回实际写入的路径"""
+    from digital_life import parse_time
+    with ColumnarWriter(path, EVENT_SCHEMA, batch_rows) as writer:
+        for e in events:
+            row = event_row(e, parse_time)
+            if row is not None:
+                writer.append(row)
+    print(f"💾 已导出 {writer.rows} 条事件: {os.path.abspath(writer.path)}")
+    return writer.path
+
+def load_events(path):
+    """按时间排序后返回 (analyze_hybrid 依赖时间顺序)"""
+    rows = sorted(iter_rows(path), key=lambda row: row[0])
+    return [event_from_row(row) for row in rows]
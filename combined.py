@@ -0,0 +1,328 @@
+import os
+import sys
+import argparse
+import datetime
+import webbrowser
+
+from sessions import reconstruct_intervals, SessionIndex
+from report_assets import head_assets, data_script, DATA_LOADER_JS, FONT_STACK
+
+# ================= 配置区 =================
+OUTPUT_HTML = "my_digital_life_combined.html"
+# 一天里开机少于这么多分钟不算"屏幕日" (避免开机更新一下就关掉也算)
+MIN_SCREEN_MINUTES = 10
+# ========================================
+
+# 每天的聚合槽位
+SCREEN_SEC, PHOTOS, PHOTOS_ON_PC = 0, 1, 2
+
+def local_midnight(ts):
+    dt = datetime.datetime.fromtimestamp(ts)
+    return datetime.datetime.combine(dt.date(), datetime.time())
+
+def day_slot(days, ordinal):
+    slot = days.get(ordinal)
+    if slot is None:
+        slot = days[ordinal] = [0.0, 0, 0]
+    return slot
+
+def add_screen_time(days, start, end):
+    """把一个活跃区间按本地午夜切开，累加到每天的在线秒数"""
+    midnight = local_midnight(start)
+    while start < end:
+        next_midnight = midnight + datetime.timedelta(days=1)
+        cut = min(end, next_midnight.timestamp())
+        day_slot(days, midnight.toordinal())[SCREEN_SEC] += cut - start
+        start, midnight = cut, next_midnight
+
+def join_photos(photo_times, index):
+    """
+    照片时间流与 PC 活跃区间的流式连接：每张照片到达时用 SessionIndex 二分查找它落在哪个区间，
+    照片不需要排序，也不会先收集成列表。在线时长直接从索引的区间数组按天累加。
+    内存只与覆盖的天数和索引本身 (区间数) 有关，与照片数无关。
+    返回 {日期序号: [在线秒数, 照片数, 开机时拍的照片数]}
+    """
+    days = {}
+    for start, end in zip(index.starts, index.ends):
+        add_screen_time(days, start, end)
+    for ts in photo_times:
+        slot = day_slot(days, local_midnight(ts).toordinal())
+        slot[PHOTOS] += 1
+        if index.covers(ts):
+            slot[PHOTOS_ON_PC] += 1
+    return days
+
+def summarize_months(days, first=None, last=None):
+    """
+    按天槽位 -> 按月统计。first / last 为日期范围 (默认取有数据的首尾两天)，
+    范围内既没开机也没拍照的日子记为"空白日"。
+    """
+    if not days and first is None:
+        return []
+    first = first or datetime.date.fromordinal(min(days))
+    last = last or datetime.date.fromordinal(max(days))
+    months = {}
+    for ordinal in range(first.toordinal(), last.toordinal() + 1):
+        day = datetime.date.fromordinal(ordinal)
+        key = f"{day.year}-{day.month:02d}"
+        m = months.get(key)
+        if m is None:
+            m = months[key] = {'month': key, 'days': 0, 'screen_days': 0, 'shooting_days': 0,
+                               'both_days': 0, 'neither_days': 0, 'screen_hours': 0.0,
+                               'photos': 0, 'photos_on_pc': 0}
+        screen_sec, photos, on_pc = days.get(ordinal, (0.0, 0, 0))
+        screen = screen_sec >= MIN_SCREEN_MINUTES * 60
+        m['days'] += 1
+        m['screen_hours'] += screen_sec / 3600
+        m['photos'] += photos
+        m['photos_on_pc'] += on_pc
+        m['screen_days'] += screen
+        m['shooting_days'] += photos > 0
+        m['both_days'] += screen and photos > 0
+        m['neither_days'] += not screen and photos == 0
+    result = list(months.values())
+    for m in result:
+        m['screen_hours'] = round(m['screen_hours'], 1)
+    return result
+
+def combine(photo_times, index, first=None, last=None):
+    """对外入口：photo_times 是任意顺序的 epoch 秒 (可以是生成器)，index 是 SessionIndex，返回 {'months': [...], 'totals': {...}}"""
+    months = summarize_months(join_photos(photo_times, index), first, last)
+    totals = {}
+    for key in ('days', 'screen_days', 'shooting_days', 'both_days', 'neither_days', 'photos', 'photos_on_pc'):
+        totals[key] = sum(m[key] for m in months)
+    totals['screen_hours'] = round(sum(m['screen_hours'] for m in months), 1)
+    totals['on_pc_share'] = totals['photos_on_pc'] / totals['photos'] if totals['photos'] else 0.0
+    return {'months': months, 'totals': totals}
+
+def photo_times_from(photos, t1=None, t2=None):
+    """EXIF 拍摄时间 -> epoch 秒的生成器 (按扫描顺序，边扫边连接，不攒成列表)"""
+    for p in photos:
+        ts = p['DateObject'].timestamp()
+        if (t1 is None or ts >= t1) and (t2 is None or ts < t2):
+            yield ts
+
+def session_index_from(events):
+    """按时间排序的采集器事件 -> 全局活跃区间索引 (只收集会话时间线，不按年份切分事件)"""
+    from digital_life import parse_time, event_kind
+    timeline = []
+    for e in events:
+        kind = event_kind(e)
+        if not kind:
+            continue
+        dt = parse_time(e.get('TimeCreated'))
+        if dt:
+            timeline.append((dt.timestamp(), kind))
+    return SessionIndex(reconstruct_intervals(timeline))
+
+def generate_html(result, title, output=None, open_browser=True, offline=False):
+    output = output or OUTPUT_HTML
+    totals = result['totals']
+    months = result['months']
+    labels = [m['month'] for m in months]
+
+    def column(key):
+        return [m[key] for m in months]
+
+    on_pc_pct = [round(m['photos_on_pc'] / m['photos'] * 100, 1) if m['photos'] else 0 for m in months]
+
+    # 所有图表数据只内嵌一次
+    payload = {
+        'labels': labels,
+        'screen_days': column('screen_days'),
+        'shooting_days': column('shooting_days'),
+        'both_days': column('both_days'),
+        'neither_days': column('neither_days'),
+        'photos': column('photos'),
+        'on_pc_pct': on_pc_pct,
+    }
+
+    html_content = f"""
+    <!DOCTYPE html>
+    <html>
+    <head>
+        <meta charset="utf-8">
+        <title>{title} 数字生活交叉报告</title>
+        {head_assets(offline)}
+        <style>
+            :root {{
+                --bg: #0f172a;
+                --card-bg: #1e293b;
+                --card-border: #334155;
+                --text-main: #f1f5f9;
+                --text-dim: #94a3b8;
+                --accent-primary: #818cf8;
+                --accent-secondary: #06b6d4;
+                --gradient-main: linear-gradient(135deg, #6366f1 0%, #06b6d4 50%, #f97316 100%);
+            }}
+            body {{ font-family: {FONT_STACK}; background-color: var(--bg); color: var(--text-main); margin: 0; padding: 40px 20px; line-height: 1.6; }}
+            .container {{ max-width: 1100px; margin: 0 auto; }}
+            .header {{ text-align: center; padding: 60px 20px; background: rgba(30, 41, 59, 0.5); border-radius: 30px; margin-bottom: 40px; border: 1px solid rgba(255,255,255,0.1); }}
+            .header h1 {{ margin: 0; font-size: 3em; font-weight: 800; background: var(--gradient-main); -webkit-background-clip: text; -webkit-text-fill-color: transparent; }}
+            .header p {{ color: var(--text-dim); margin-top: 15px; font-size: 1.1em; }}
+            .card {{ background: var(--card-bg); border-radius: 24px; padding: 35px; margin-bottom: 30px; border: 1px solid var(--card-border); }}
+            .card h2 {{ margin-top: 0; font-size: 1.6em; margin-bottom: 25px; color: #fff; }}
+            .stat-grid {{ display: grid; grid-template-columns: repeat(4, 1fr); gap: 20px; text-align: center; }}
+            .stat-box {{ background: rgba(15, 23, 42, 0.6); padding: 25px 15px; border-radius: 18px; border: 1px solid rgba(255,255,255,0.05); }}
+            .stat-num {{ font-size: 2.2em; font-weight: 800; color: #fff; }}
+            .stat-label {{ font-size: 0.9em; color: var(--text-dim); }}
+            .chart-box {{ width: 100%; height: 380px; }}
+            @media (max-width: 768px) {{ .stat-grid {{ grid-template-columns: 1fr 1fr; }} }}
+        </style>
+    </head>
+    <body>
+        <div class="container">
+            <div class="header">
+                <h1>屏幕 × 镜头</h1>
+                <p>{title} · 你的时间分给了电脑，还是分给了相机？</p>
+            </div>
+
+            <div class="card">
+                <h2>📊 总览</h2>
+                <div class="stat-grid">
+                    <div class="stat-box">
+                        <div class="stat-num">{totals['screen_days']}</div>
+                        <div class="stat-label">屏幕日 (开机 ≥ {MIN_SCREEN_MINUTES} 分钟)</div>
+                    </div>
+                    <div class="stat-box">
+                        <div class="stat-num">{totals['shooting_days']}</div>
+                        <div class="stat-label">拍摄日</div>
+                    </div>
+                    <div class="stat-box">
+                        <div class="stat-num">{totals['both_days']}</div>
+                        <div class="stat-label">两者都有</div>
+                    </div>
+                    <div class="stat-box">
+                        <div class="stat-num">{totals['neither_days']}</div>
+                        <div class="stat-label">空白日 (都没有)</div>
+                    </div>
+                    <div class="stat-box">
+                        <div class="stat-num">{totals['photos']}</div>
+                        <div class="stat-label">照片总数</div>
+                    </div>
+                    <div class="stat-box">
+                        <div class="stat-num">{totals['on_pc_share'] * 100:.0f}%</div>
+                        <div class="stat-label">拍摄时电脑开着</div>
+                    </div>
+                    <div class="stat-box">
+                        <div class="stat-num">{totals['screen_hours']:.0f}h</div>
+                        <div class="stat-label">在线时长</div>
+                    </div>
+                    <div class="stat-box">
+                        <div class="stat-num">{totals['days']}</div>
+                        <div class="stat-label">统计天数</div>
+                    </div>
+                </div>
+            </div>
+
+            <div class="card">
+                <h2>📅 每月的屏幕日 vs 拍摄日</h2>
+                <div id="chart-days" class="chart-box"></div>
+            </div>
+
+            <div class="card">
+                <h2>📸 每月照片与"开着电脑拍的"占比</h2>
+                <div id="chart-photos" class="chart-box"></div>
+            </div>
+
+            <p style="text-align: center; color: #475569; margin-top: 50px; font-size: 0.8em;">
+                隐私声明：数据完全在本地处理，不会上传任何服务器。
+            </p>
+        </div>
+
+        {data_script(payload)}
+        <script>
+            {DATA_LOADER_JS}
+            loadReportData(function(DATA) {{
+                var colorText = '#cbd5e1';
+                var colorSplit = '#334155';
+
+                var chartDays = echarts.init(document.getElementById('chart-days'));
+                chartDays.setOption({{
+                    tooltip: {{ trigger: 'axis' }},
+                    legend: {{ top: 0, textStyle: {{ color: colorText }} }},
+                    grid: {{ top: 40, bottom: 20, left: 10, right: 10, containLabel: true }},
+                    xAxis: {{ type: 'category', data: DATA.labels, axisLabel: {{ color: colorText }} }},
+                    yAxis: {{ type: 'value', splitLine: {{ lineStyle: {{ color: colorSplit, type: 'dashed' }} }}, axisLabel: {{ color: colorText }} }},
+                    series: [
+                        {{ name: '屏幕日', type: 'bar', data: DATA.screen_days, itemStyle: {{ color: '#818cf8' }} }},
+                        {{ name: '拍摄日', type: 'bar', data: DATA.shooting_days, itemStyle: {{ color: '#f97316' }} }},
+                        {{ name: '两者都有', type: 'line', data: DATA.both_days, itemStyle: {{ color: '#06b6d4' }} }},
+                        {{ name: '空白日', type: 'line', data: DATA.neither_days, lineStyle: {{ type: 'dashed' }}, itemStyle: {{ color: '#94a3b8' }} }}
+                    ]
+                }});
+
+                var chartPhotos = echarts.init(document.getElementById('chart-photos'));
+                chartPhotos.setOption({{
+                    tooltip: {{ trigger: 'axis' }},
+                    legend: {{ top: 0, textStyle: {{ color: colorText }} }},
+                    grid: {{ top: 40, bottom: 20, left: 10, right: 10, containLabel: true }},
+                    xAxis: {{ type: 'category', data: DATA.labels, axisLabel: {{ color: colorText }} }},
+                    yAxis: [
+                        {{ type: 'value', splitLine: {{ lineStyle: {{ color: colorSplit, type: 'dashed' }} }}, axisLabel: {{ color: colorText }} }},
+                        {{ type: 'value', max: 100, splitLine: {{ show: false }}, axisLabel: {{ color: colorText, formatter: '{{value}}%' }} }}
+                    ],
+                    series: [
+                        {{ name: '照片数', type: 'bar', data: DATA.photos, itemStyle: {{ color: '#f97316', borderRadius: [4, 4, 0, 0] }} }},
+                        {{ name: '开机时拍摄占比', type: 'line', yAxisIndex: 1, smooth: true, data: DATA.on_pc_pct, itemStyle: {{ color: '#818cf8' }} }}
+                    ]
+                }});
+
+                window.onresize = function() {{
+                    chartDays.resize(); chartPhotos.resize();
+                }};
+            }});
+        </script>
+    </body>
+    </html>
+    """
+
+    with open(output, "w", encoding="utf-8") as f:
+        f.write(html_content)
+    print(f"\n🎉 交叉报告已生成！文件路径: {os.path.abspath(output)}")
+    if open_browser:
+        webbrowser.open('file://' + os.path.abspath(output))
+    return output
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="数字生活交叉报告：照片拍摄时间 × 电脑活跃区间")
+    parser.add_argument('--photos', nargs='+', required=True, help="包含 JPG 的文件夹 (可多个)")
+    parser.add_argument('--events', default=None, help="事件导出文件 (.json/.ndjson/.evtx/.wtmp)，默认直接读取本机日志")
+    parser.add_argument('--year', type=int, default=None, help="只统计某一年 (默认全部)")
+    parser.add_argument('-o', '--output', default=OUTPUT_HTML)
+    parser.add_argument('--no-browser', action='store_true')
+    parser.add_argument('--offline', action='store_true', help="内联 ECharts，生成可以断网打开的报告")
+    args = parser.parse_args(argv)
+
+    from camera import iter_photos
+
+    if args.events:
+        from fleet import load_host_events
+        events = load_host_events(args.events)
+    else:
+        from digital_life import get_hybrid_data, get_history_data
+        events = get_hybrid_data(args.year) if args.year else get_history_data()
+    if not events:
+        print("\n❌ 未能获取电脑事件数据。")
+        return 1
+
+    index = session_index_from(events)
+    t1 = t2 = first = last = None
+    if args.year:
+        first, last = datetime.date(args.year, 1, 1), datetime.date(args.year, 12, 31)
+        t1 = datetime.datetime(args.year, 1, 1).timestamp()
+        t2 = datetime.datetime(args.year + 1, 1, 1).timestamp()
+        index = index.slice(t1, t2)
+
+    print("📸 正在扫描照片...")
+    result = combine(photo_times_from(iter_photos(args.photos), t1, t2), index, first, last)
+    if not result['totals']['photos'] and not len(index):
+        print("⚠️ 没有找到照片，也没有电脑活跃记录。")
+        return 1
+
+    title = f"{args.year} 年" if args.year else "全部历史"
+    generate_html(result, title, args.output, open_browser=not args.no_browser, offline=args.offline)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,84 @@
+import datetime
+from collections import Counter
+
+# ================= 配置区 =================
+# 崩溃前回看多少小时内的安装/更新
+LOOKBACK_HOURS = 72
+# 间隔这么近的多个崩溃事件 (41 + 1001) 视为同一次事故
+INCIDENT_MERGE_SECONDS = 10 * 60
+# 可疑安装日排行榜长度
+TOP_SUSPECTS = 5
+# ========================================
+
+def merge_incidents(crashes):
+    """已排序的崩溃时间戳 -> 去重后的事故时间戳 (同一次蓝屏会同时写 41 和 1001)"""
+    incidents = []
+    for ts in crashes:
+        if incidents and ts - incidents[-1] <= INCIDENT_MERGE_SECONDS:
+            continue
+        incidents.append(ts)
+    return incidents
+
+def merge_windows(installs, window):
+    """每次安装之后的 [t, t+window) 合并成互不重叠的区间"""
+    merged = []
+    for ts in installs:
+        if merged and ts <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], ts + window)
+        else:
+            merged.append([ts, ts + window])
+    return merged
+
+def correlate_crashes(installs, crashes, index=None, lookback_hours=LOOKBACK_HOURS, top_n=TOP_SUSPECTS):
+    """
+    崩溃-安装时间窗关联。installs / crashes 都是已按时间排序的 epoch 秒列表。
+
+    对每次崩溃，用双指针在安装序列上维护 [崩溃 - 窗口, 崩溃] 的滑动窗口，
+    整体 O(安装数 + 崩溃数)，不做嵌套循环。
+    index (sessions.SessionIndex) 用于把崩溃次数换算成"每 100 小时在线"的崩溃率。
+    """
+    window = lookback_hours * 3600
+    incidents = merge_incidents(crashes)
+
+    lo = hi = 0
+    after_install = 0
+    suspects = Counter()
+    for ts in incidents:
+        while hi < len(installs) and installs[hi] <= ts:
+            hi += 1
+        while lo < hi and installs[lo] < ts - window:
+            lo += 1
+        if hi > lo:
+            after_install += 1
+            # 主要嫌疑：崩溃前最近的一次安装
+            suspects[datetime.datetime.fromtimestamp(installs[hi - 1]).date()] += 1
+
+    # 安装后窗口内 vs 其余时间的崩溃率
+    windows = merge_windows(installs, window)
+    if index is not None and index.total() > 0:
+        total_hours = index.total() / 3600
+        window_hours = sum(index.active_between(s, e) for s, e in windows) / 3600
+    else:
+        total_hours = (incidents[-1] - incidents[0]) / 3600 if len(incidents) > 1 else 0
+        window_hours = sum(e - s for s, e in windows) / 3600
+        total_hours = max(total_hours, window_hours)
+    other_hours = max(total_hours - window_hours, 0)
+    # 窗口内的事故与"安装后崩溃"是同一批 (窗口按安装时间向后延伸)
+    rate_after = after_install / window_hours * 100 if window_hours > 0 else 0.0
+    rate_baseline = (len(incidents) - after_install) / other_hours * 100 if other_hours > 0 else 0.0
+
+    install_days = Counter(datetime.datetime.fromtimestamp(ts).date() for ts in installs)
+    return {
+        'lookback_hours': lookback_hours,
+        'incidents': len(incidents),
+        'after_install': after_install,
+        'share': after_install / len(incidents) if incidents else 0.0,
+        'window_hours': round(window_hours, 1),
+        'rate_after': round(rate_after, 2),
+        'rate_baseline': round(rate_baseline, 2),
+        'ratio': round(rate_after / rate_baseline, 2) if rate_baseline > 0 else None,
+        'suspect_days': [
+            {'date': day, 'crashes': n, 'installs': install_days[day]}
+            for day, n in sorted(suspects.items(), key=lambda x: (-x[1], x[0]))[:top_n]
+        ],
+    }
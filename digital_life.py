@@ -3,23 +3,49 @@ import json
 import datetime
 import webbrowser
 import os
+from collections import Counter
+from sessions import reconstruct_intervals, SessionIndex
+from correlation import correlate_crashes, LOOKBACK_HOURS
+from event_registry import default_registry
+from activity_bitmap import bitmaps_from_index, summarize as summarize_bitmaps
+from badges import default_rules, system_metrics
+from calendar_heatmap import add_day, calendar_payload, calendar_script, chart_height
+from report_assets import head_assets, data_script, DATA_LOADER_JS, FONT_STACK
+import tracing
 
 # ================= 配置区 =================
 # 默认年份，稍后会根据用户输入更新
 YEAR = datetime.datetime.now().year 
 HTML_FILE = f"./my_digital_life_{YEAR}.html"
+# 多年模式的查询起点与索引页文件名
+HISTORY_START = "2000-01-01"
+HISTORY_HTML = "./my_digital_life_history.html"
+# 在线时长的口径：'power' 按开关机/睡眠计算；'presence' 锁屏和注销也会截断活跃区间
+ACTIVE_TIME_MODE = 'power'
+# 离线报告：内联 ECharts、不加载网络字体 (内网/断网机器上打开报告)
+OFFLINE_REPORT = False
+# 设置后把取回的原始事件导出为列式文件 (.parquet，没装 pyarrow 时为 .cols 目录)，
+# 之后可以用 batch.py / fleet.py / combined.py 的 --events 直接读取，不用再查系统日志
+EXPORT_PATH = None
 # ========================================
 
+# 事件的语义类别、采集过滤条件都来自注册表 (event_types.json)，
+# Linux 等其它来源会先把自己的事件映射成相同的 Windows Id，见 linux_source.py
+REGISTRY = default_registry()
+
+@tracing.traced()
 def run_ps_command(cmd):
     """
     PowerShell 执行器：
     先获取二进制数据，再尝试 GBK (中文系统常见) 和 UTF-8 解码，
     防止因编码问题导致的崩溃。
+    powershell 本身没能运行时返回 None (与"查询成功但没有输出"区分开)。
     """
     try:
         # capture_output=True 会捕获 stdout 和 stderr，默认返回 bytes
         result = subprocess.run(["powershell", "-Command", cmd], capture_output=True)
         raw_bytes = result.stdout
+        tracing.count('bytes_read', len(raw_bytes), source='powershell')
         
         # 1. 尝试 GBK 解码
         try:
@@ -38,36 +64,34 @@ def run_ps_command(cmd):
         
     except Exception as e:
         print(f"⚠️ PowerShell 执行底层错误: {e}")
-        return ""
-
-def get_hybrid_data(year):
-    print(f"🕵️‍♂️ 正在扫描 {year} 年的数字足迹...")
-    print("   [1/3] 正在分析系统启动与休眠日志...")
-    print("   [2/3] 正在计算运行持续时间与稳定性...")
-    print("   [3/3] 正在统计软件安装记录 (这可能需要几秒钟)...")
-    
-    start_date = f"{year}-01-01"
-    end_date = f"{year}-12-31"
-    
-    # PowerShell 脚本：同时获取 System 和 Application 日志
-    ps_script = f"""
-    $s = Get-Date -Date "{start_date}"
-    $e = Get-Date -Date "{end_date}"
-    
-    # 系统日志
-    $sys = Get-WinEvent -FilterHashtable @{{LogName='System'; Id=6005,6006,41,1001,1,42; StartTime=$s; EndTime=$e}} -ErrorAction SilentlyContinue | 
-           Select-Object Id, TimeCreated, @{{Name='Type';Expression={{'Sys'}}}}
+        return None
 
-    # 软件安装日志
-    $apps = Get-WinEvent -FilterHashtable @{{LogName='Application'; ProviderName='MsiInstaller'; Id=1033; StartTime=$s; EndTime=$e}} -ErrorAction SilentlyContinue | 
-            Select-Object Id, TimeCreated, @{{Name='Type';Expression={{'App'}}}}
+def build_hybrid_query(start_date, end_date):
+    """生成一次取回所有注册事件 (System / Security / Application) 的 PowerShell 脚本"""
+    return REGISTRY.build_query(start_date, end_date)
 
-    # 合并并按时间排序 (这对计算持续时间很重要)
-    $all = $sys + $apps | Sort-Object TimeCreated
-    $all | ConvertTo-Json -Depth 1
+@tracing.traced()
+def get_range_data(start_date, end_date, collector=None, strict=False):
     """
+    查询任意时间段的事件。
+    传入 collector (collector.PowerShellCollector) 时复用常驻 PowerShell 进程，
+    否则每次冷启动一个新的 powershell。
+    查询失败 (进程起不来、超时、输出不是 JSON) 时返回空列表；
+    strict=True 时改为返回 None，调用方据此区分"失败"和"这段时间确实没有事件"。
+    """
+    ps_script = build_hybrid_query(start_date, end_date)
+    failed = None if strict else []
     
-    raw_json = run_ps_command(ps_script)
+    if collector is not None:
+        try:
+            raw_json = collector.run(ps_script)
+        except Exception as e:
+            print(f"⚠️ 常驻 PowerShell 查询失败: {e}")
+            return failed
+    else:
+        raw_json = run_ps_command(ps_script)
+        if raw_json is None:
+            return failed
     
     if not raw_json.strip():
         return []
@@ -77,7 +101,24 @@ def get_hybrid_data(year):
         if isinstance(data, dict): data = [data]
         return data if data else []
     except:
-        return []
+        print("⚠️ PowerShell 输出无法解析为 JSON")
+        return failed
+
+@tracing.traced()
+def get_hybrid_data(year, collector=None):
+    print(f"🕵️‍♂️ 正在扫描 {year} 年的数字足迹 (读取系统日志可能需要几秒钟)...")
+    
+    # 结束时间取次年 1 月 1 日 0 点，否则会漏掉 12 月 31 日当天
+    start_date = f"{year}-01-01"
+    end_date = f"{year + 1}-01-01"
+    
+    return get_range_data(start_date, end_date, collector)
+
+def get_history_data(collector=None):
+    """一次查询取回日志里保留的全部历史，之后再在本地按年份切分"""
+    print("🕵️‍♂️ 正在一次性扫描全部历史数字足迹 (这可能需要一点时间)...")
+    tomorrow = datetime.date.today() + datetime.timedelta(days=1)
+    return get_range_data(HISTORY_START, tomorrow.isoformat(), collector)
 
 def parse_time(t_str):
     try:
@@ -87,10 +128,100 @@ def parse_time(t_str):
     except:
         return None
 
-def analyze_hybrid(events):
+def event_kind(e):
+    """事件 -> 会话重建用的归一化类型 (无关事件返回 None)"""
+    if e.get('Type') == 'Beat':
+        return 'heartbeat'
+    return REGISTRY.session_kind(e.get('Type'), e.get('Id'), ACTIVE_TIME_MODE == 'presence')
+
+# ---------- 事件处理函数：注册表里的 handler 名字 -> 函数 ----------
+def count_activity(stats, dt):
+    stats['hour_dist'][dt.hour] += 1
+
+def handle_boot(stats, dt):
+    stats['boot'] += 1
+    stats['hour_dist'][dt.hour] += 1
+    stats['weekday_dist'][dt.weekday()] += 1
+    if dt.weekday() >= 5: stats['weekend_activity'] += 1
+    else: stats['weekday_activity'] += 1
+
+def handle_shutdown(stats, dt):
+    stats['shutdown'] += 1
+    if 0 <= dt.hour < 5:
+        if stats['latest_session'] is None or dt.time() > stats['latest_session'].time():
+            stats['latest_session'] = dt
+
+def handle_crash(stats, dt):    # 异常重启
+    stats['crash'] += 1
+
+def handle_bsod(stats, dt):     # 蓝屏
+    stats['bsod'] += 1
+
+def handle_wake(stats, dt):
+    stats['wake'] += 1
+    count_activity(stats, dt)
+
+def handle_sleep(stats, dt):
+    stats['sleep'] += 1
+
+def handle_install(stats, dt):
+    stats['install_count'] += 1
+    count_activity(stats, dt)
+
+def handle_update(stats, dt):   # Windows 更新
+    stats['update_count'] += 1
+
+def handle_logon(stats, dt):
+    stats['logon'] += 1
+    count_activity(stats, dt)
+
+def handle_logoff(stats, dt):
+    stats['logoff'] += 1
+
+def handle_lock(stats, dt):
+    stats['lock'] += 1
+
+def handle_unlock(stats, dt):
+    stats['unlock'] += 1
+    count_activity(stats, dt)
+
+EVENT_HANDLERS = {
+    'boot': handle_boot,
+    'shutdown': handle_shutdown,
+    'crash': handle_crash,
+    'bsod': handle_bsod,
+    'wake': handle_wake,
+    'sleep': handle_sleep,
+    'install': handle_install,
+    'update': handle_update,
+    'logon': handle_logon,
+    'logoff': handle_logoff,
+    'lock': handle_lock,
+    'unlock': handle_unlock,
+}
+
+def build_dispatch(registry, presence=False):
+    """(Type, Id) -> (处理函数, 会话类型, 语义类别)，分析时每条事件只查一次表"""
+    table = {}
+    for key, entry in registry.dispatch.items():
+        handler = EVENT_HANDLERS.get(entry['handler'])
+        if handler is None:
+            raise ValueError(f"注册表引用了不存在的处理函数: {entry['handler']}")
+        table[key] = (handler, registry.session_kind(*key, presence=presence), entry['class'])
+    return table
+
+@tracing.traced()
+def analyze_hybrid(events, session_index=None, lookback_hours=LOOKBACK_HOURS, registry=None):
+    """
+    统计事件分布。session_index 为空时从 events 自行重建活跃区间；
+    多年模式会传入按年裁剪过的全局索引，保证跨年的会话不被拆错。
+    lookback_hours: 崩溃-安装关联的回看窗口
+    registry: 事件类型注册表，默认使用 event_types.json
+    """
     stats = {
         'boot': 0, 'shutdown': 0, 'crash': 0, 'bsod': 0, 'wake': 0, 'sleep': 0,
-        'install_count': 0,
+        'install_count': 0, 'update_count': 0,
+        'logon': 0, 'logoff': 0, 'lock': 0, 'unlock': 0,
         'hour_dist': [0]*24, 
         'weekday_dist': [0]*7,
         'weekend_activity': 0,
@@ -99,111 +230,133 @@ def analyze_hybrid(events):
         'latest_session': None,
         'total_uptime_seconds': 0,
         'longest_session': {'duration': 0, 'date': None},
-        'session_durations': []
+        'session_durations': [],
+        'hour_uptime': [0.0]*24,
+        'weekday_uptime': [0.0]*7,
+        'daily_uptime': {},
+        'day_dist': {},
+        'overtime': {'minutes': 0, 'days': 0},
+        'active_streak': {'days': 0, 'start': None},
+        'activity_bitmaps': {},
+        'session_index': None,
+        'crash_install': None
     }
     
-    last_boot_time = None
+    dispatch = build_dispatch(registry or REGISTRY, ACTIVE_TIME_MODE == 'presence')
+    timeline = []
+    install_times = []
+    crash_times = []
     
     for e in events:
         try:
-            eid = e.get('Id')
-            etype = e.get('Type')
             dt = parse_time(e.get('TimeCreated'))
             if not dt: continue
             
             if stats['first_boot'] is None: stats['first_boot'] = dt
             
-            # --- 软件安装 ---
-            if etype == 'App':
-                stats['install_count'] += 1
-                stats['hour_dist'][dt.hour] += 1
+            # --- 心跳 (例如 Linux 登录记录)：只用于会话重建，不参与计数 ---
+            if e.get('Type') == 'Beat':
+                if session_index is None:
+                    timeline.append((dt.timestamp(), 'heartbeat'))
                 continue
-
-            # --- 系统事件 ---
-            if eid == 6005: # 开机
-                stats['boot'] += 1
-                last_boot_time = dt 
-                stats['hour_dist'][dt.hour] += 1
-                stats['weekday_dist'][dt.weekday()] += 1
-                if dt.weekday() >= 5: stats['weekend_activity'] += 1
-                else: stats['weekday_activity'] += 1
-
-            elif eid == 6006: # 关机
-                stats['shutdown'] += 1
-                if last_boot_time:
-                    duration = (dt - last_boot_time).total_seconds()
-                    if 0 < duration < 30 * 24 * 3600:
-                        stats['total_uptime_seconds'] += duration
-                        stats['session_durations'].append(duration)
-                        if duration > stats['longest_session']['duration']:
-                            stats['longest_session']['duration'] = duration
-                            stats['longest_session']['date'] = last_boot_time
-                    last_boot_time = None 
-
-                if 0 <= dt.hour < 5:
-                    if stats['latest_session'] is None or dt.time() > stats['latest_session'].time():
-                         stats['latest_session'] = dt
-
-            elif eid == 41: # 异常重启
-                stats['crash'] += 1
-                last_boot_time = None 
-
-            elif eid == 1001: # 蓝屏
-                stats['bsod'] += 1
-                last_boot_time = None
-
-            elif eid == 1: # 唤醒
-                stats['wake'] += 1
-                stats['hour_dist'][dt.hour] += 1
-                
-            elif eid == 42: # 睡眠
-                stats['sleep'] += 1
+            
+            entry = dispatch.get((e.get('Type'), e.get('Id')))
+            if entry is None: continue
+            handler, kind, cls = entry
+            
+            if kind and session_index is None:
+                timeline.append((dt.timestamp(), kind))
+            if cls == 'crash':
+                crash_times.append(dt.timestamp())
+            elif cls in ('install', 'update'):
+                install_times.append(dt.timestamp())
+            
+            handler(stats, dt)
+            add_day(stats['day_dist'], dt)
                 
         except:
             continue
-            
+
+    if tracing.ENABLED:
+        tracing.count('events_in', len(events))
+        for (etype, eid), n in Counter((e.get('Type'), e.get('Id')) for e in events).items():
+            tracing.count('events', n, type=etype, id=eid)
+
+    with tracing.span('sessions'):
+        if session_index is None:
+            session_index = SessionIndex(reconstruct_intervals(timeline))
+        fill_session_stats(stats, session_index)
+    with tracing.span('correlate_crashes'):
+        stats['crash_install'] = correlate_crashes(install_times, crash_times, session_index, lookback_hours)
     return stats
 
-def get_achievements(stats):
-    badges = []
+def fill_session_stats(stats, index):
+    """
+    所有与"在线时长"相关的指标都从活跃区间索引派生，
+    睡眠/休眠时段已被扣除，崩溃会截断区间。
+    按小时/周几/天的分布来自分钟级活跃位图 (activity_bitmap.py)，单位换算成秒。
+    """
+    stats['session_index'] = index
+    stats['total_uptime_seconds'] = index.total()
+    stats['session_durations'] = index.durations()
     
-    # 1. 铁人勋章
-    longest_hours = stats['longest_session']['duration'] / 3600
-    if longest_hours > 48:
-        badges.append({'icon': '🤖', 'title': '赛博铁人', 'desc': f'单次连续开机 {int(longest_hours)} 小时'})
-    elif longest_hours > 12:
-        badges.append({'icon': '🔋', 'title': '超长待机', 'desc': f'单次连续工作 {int(longest_hours)} 小时'})
-        
-    # 2. 熬夜勋章
-    late_night_ops = sum(stats['hour_dist'][0:5])
-    if late_night_ops > 50:
-        badges.append({'icon': '🧛', 'title': '暗夜伯爵', 'desc': '凌晨活跃超过50次'})
-    elif late_night_ops == 0:
-        badges.append({'icon': '🌞', 'title': '养生达人', 'desc': '从不熬夜，作息极其规律'})
-        
-    # 3. 稳定勋章
-    crash_total = stats['bsod'] + stats['crash']
-    if crash_total == 0:
-        badges.append({'icon': '🛡️', 'title': '稳如泰山', 'desc': '全年 0 崩溃，简直是奇迹'})
-    elif stats['bsod'] > 5:
-        badges.append({'icon': '💊', 'title': '蓝屏受害者', 'desc': '经历了太多不该承受的痛苦'})
-        
-    # 4. 活跃勋章
-    total_hours = stats['total_uptime_seconds'] / 3600
-    if total_hours > 2000:
-        badges.append({'icon': '💻', 'title': '人机合一', 'desc': f'累计陪伴电脑 {int(total_hours)} 小时'})
-        
-    # 5. 折腾勋章
-    if stats['install_count'] > 30:
-        badges.append({'icon': '🛠️', 'title': '装机狂魔', 'desc': f'安装/更新了 {stats["install_count"]} 次软件'})
+    longest_start, longest = index.longest()
+    stats['longest_session'] = {
+        'duration': longest,
+        'date': datetime.datetime.fromtimestamp(longest_start) if longest_start is not None else None
+    }
+    
+    bitmaps = bitmaps_from_index(index)
+    rollup = summarize_bitmaps(bitmaps)
+    stats['activity_bitmaps'] = bitmaps
+    stats['hour_uptime'] = [m * 60 for m in rollup['per_hour']]
+    stats['weekday_uptime'] = [m * 60 for m in rollup['per_weekday']]
+    stats['daily_uptime'] = {day: m * 60 for day, m in rollup['per_day'].items()}
+    stats['overtime'] = {'minutes': rollup['overtime_minutes'], 'days': rollup['overtime_days']}
+    stats['active_streak'] = rollup['streak']
+    return stats
 
-    if not badges:
-        badges.append({'icon': '🧘', 'title': '数字隐士', 'desc': '平平淡淡才是真'})
-        
-    return badges
+def partition_by_year(events):
+    """
+    单遍扫描：按年份切分事件，同时收集整段历史的会话时间线。
+    会话在全局时间线上重建，跨年的会话 (例如跨年夜开着机) 不会因为切分被拆错。
+    """
+    by_year = {}
+    timeline = []
+    for e in events:
+        dt = parse_time(e.get('TimeCreated'))
+        if not dt: continue
+        by_year.setdefault(dt.year, []).append(e)
+        kind = event_kind(e)
+        if kind:
+            timeline.append((dt.timestamp(), kind))
+    return by_year, timeline
 
-def generate_html(stats, year):
+def analyze_history(events):
+    """返回 {年份: stats}，每年的在线时长来自按年裁剪的全局活跃区间索引"""
+    by_year, timeline = partition_by_year(events)
+    index = SessionIndex(reconstruct_intervals(timeline))
+    
+    yearly = {}
+    for year in sorted(by_year):
+        t1 = datetime.datetime(year, 1, 1).timestamp()
+        t2 = datetime.datetime(year + 1, 1, 1).timestamp()
+        yearly[year] = analyze_hybrid(by_year[year], index.slice(t1, t2))
+    return yearly
+
+def get_achievements(stats):
+    # 规则与阈值见 badge_rules.json
+    return default_rules('system').evaluate(system_metrics(stats))
+
+@tracing.traced('digital_life.render_html')
+def render_html(stats, year, period=None, offline=False):
+    """
+    生成报告页面的 HTML 字符串 (写文件见 generate_html，本地服务见 report_server.py)。
+    period: 非整年报告时的时间段标题，例如 "2024-04-01 ~ 2024-06-30"
+    offline: 内联 ECharts、使用系统字体，图表滚动到可视区域时才初始化 (内网/断网环境)
+    """
     badges = get_achievements(stats)
+    period_title = f"{period} " if period else f"{year} 年度"
     
     # 数据转换
     total_uptime_hours = stats['total_uptime_seconds'] / 3600
@@ -217,20 +370,85 @@ def generate_html(stats, year):
     
     crash_total = stats['crash'] + stats['bsod']
     
+    # 崩溃-安装关联卡片 (没有崩溃就不显示)
+    ci = stats.get('crash_install')
+    crash_install_html = ""
+    if ci and ci['incidents']:
+        ratio_str = f"{ci['ratio']:.1f}x" if ci['ratio'] is not None else "—"
+        suspect_rows = ''.join([
+            f'<div class="suspect-row"><span>{d["date"].strftime("%m月%d日")}</span><span>安装 {d["installs"]} 次 → 之后崩溃 {d["crashes"]} 次</span></div>'
+            for d in ci['suspect_days']
+        ]) or '<div class="suspect-row"><span>没有发现可疑的安装日 🎉</span></div>'
+        crash_install_html = f"""
+            <div class="card">
+                <h2>🧨 崩溃与安装关联</h2>
+                <div class="stat-grid">
+                    <div class="stat-box danger-zone">
+                        <div class="stat-num danger">{ci['incidents']}</div>
+                        <div class="stat-label">崩溃事故</div>
+                    </div>
+                    <div class="stat-box">
+                        <div class="stat-num">{ci['share'] * 100:.0f}%</div>
+                        <div class="stat-label">安装后 {ci['lookback_hours']}h 内</div>
+                    </div>
+                    <div class="stat-box">
+                        <div class="stat-num">{ci['rate_after']:.1f} / {ci['rate_baseline']:.1f}</div>
+                        <div class="stat-label">每百小时崩溃 (安装后/平时)</div>
+                    </div>
+                    <div class="stat-box">
+                        <div class="stat-num">{ratio_str}</div>
+                        <div class="stat-label">风险倍数</div>
+                    </div>
+                </div>
+                <div class="highlight-box">
+                    <div class="highlight-title">🔍 可疑安装日</div>
+                    {suspect_rows}
+                </div>
+            </div>
+        """
+    
+    # 每个整点累计的真实在线小时数 (来自会话索引)
+    hour_uptime = [round(sec / 3600, 1) for sec in stats['hour_uptime']]
+    weekday_uptime = [round(sec / 3600, 1) for sec in stats['weekday_uptime']]
+    
+    # 日历热力图：每天的在线小时数 (tooltip 里附带当天事件数)，整年报告固定显示 1/1 ~ 12/31
+    day_uptime = {day.toordinal(): sec for day, sec in stats['daily_uptime'].items()}
+    first_day = last_day = None
+    if not period:
+        first_day, last_day = datetime.date(year, 1, 1), datetime.date(year, 12, 31)
+    elif day_uptime or stats['day_dist']:
+        days = list(day_uptime) + list(stats['day_dist'])
+        first_day, last_day = datetime.date.fromordinal(min(days)), datetime.date.fromordinal(max(days))
+    calendar_data = calendar_payload(day_uptime, first_day, last_day, scale=1 / 3600, digits=1, extra=stats['day_dist'])
+    
+    # 加班与连续活跃天数 (来自分钟级活跃位图)
+    overtime_hours = stats['overtime']['minutes'] / 60
+    streak = stats['active_streak']
+    streak_str = f"，最长连续 {streak['days']} 天都开过机 (从 {streak['start'].strftime('%m月%d日')} 开始)" if streak['start'] else ""
+    
     # 饼图数据
     pie_data = [
         {'value': stats['weekday_activity'], 'name': '工作日搬砖'},
         {'value': stats['weekend_activity'], 'name': '周末狂欢'}
     ]
+    
+    # 所有图表数据只内嵌一次
+    payload = {
+        'hour_uptime': hour_uptime,
+        'hour_dist': stats['hour_dist'],
+        'pie': pie_data,
+        'weekday_uptime': weekday_uptime,
+        'weekday_dist': stats['weekday_dist'],
+        'calendar': calendar_data,
+    }
 
     html_content = f"""
     <!DOCTYPE html>
     <html>
     <head>
         <meta charset="utf-8">
-        <title>我的 {year} 年度PC使用报告</title>
-        <script src="https://cdn.jsdelivr.net/npm/echarts@5.4.3/dist/echarts.min.js"></script>
-        <link href="https://fonts.googleapis.com/css2?family=Noto+Sans+SC:wght@300;400;700&display=swap" rel="stylesheet">
+        <title>我的 {period_title}PC使用报告</title>
+        {head_assets(offline)}
         <style>
             /* 定义新版配色变量 */
             :root {{ 
@@ -249,7 +467,7 @@ def generate_html(stats, year):
             }}
             
             body {{ 
-                font-family: 'Noto Sans SC', sans-serif; 
+                font-family: {FONT_STACK}; 
                 background-color: var(--bg); 
                 background-image: 
                     radial-gradient(at 0% 0%, rgba(99, 102, 241, 0.15) 0px, transparent 50%),
@@ -391,6 +609,9 @@ def generate_html(stats, year):
             .highlight-val {{ font-size: 2.2em; font-weight: 800; margin: 15px 0; background: var(--gradient-main); -webkit-background-clip: text; -webkit-text-fill-color: transparent; }}
             .highlight-desc {{ font-size: 0.95em; color: var(--text-dim); z-index: 1; position: relative; }}
 
+            .suspect-row {{ display: flex; justify-content: space-between; padding: 8px 0; border-bottom: 1px dashed rgba(255,255,255,0.08); color: var(--text-dim); position: relative; z-index: 1; }}
+            .suspect-row span:first-child {{ color: var(--text-main); font-weight: bold; }}
+
             /* Charts */
             .chart-row {{ display: grid; grid-template-columns: 1fr 1fr; gap: 30px; }}
             .chart-box {{ width: 100%; height: 380px; }}
@@ -401,7 +622,7 @@ def generate_html(stats, year):
     <body>
         <div class="container">
             <div class="header">
-                <h1>{year} 年度数字足迹</h1>
+                <h1>{period_title}数字足迹</h1>
                 <p>Generated by Python System Report</p>
             </div>
 
@@ -445,12 +666,15 @@ def generate_html(stats, year):
                     <div class="highlight-val">{longest_hours:.1f} 小时</div>
                     <div class="highlight-desc">
                         发生于 <strong style="color:var(--text-main)">{longest_date_str}</strong>。
-                        平均每次开机你会使用 {avg_duration:.1f} 小时。
+                        平均每次连续使用 {avg_duration:.1f} 小时 (已扣除睡眠/休眠时段)。
                         {f"<br>另外，你最晚的一次关机是在 {latest_date_str} 的 {latest_time_str}，真的是辛苦了。" if stats['latest_session'] else ""}
+                        <br>有 {stats['overtime']['days']} 天在 20:00 之后还开着电脑，累计加班 {overtime_hours:.0f} 小时{streak_str}。
                     </div>
                 </div>
             </div>
 
+            {crash_install_html}
+
             <!-- 3. 图表分析 -->
             <div class="chart-row">
                 <div class="card">
@@ -467,6 +691,11 @@ def generate_html(stats, year):
                 <h2>📅 全年周常规律</h2>
                 <div id="chart-week" class="chart-box"></div>
             </div>
+            
+            <div class="card">
+                <h2>🗓️ 每日在线日历</h2>
+                <div id="chart-calendar" style="width: 100%; height: {chart_height(calendar_data)}px;"></div>
+            </div>
 
             <p style="text-align: center; color: #475569; margin-top: 50px; font-size: 0.8em;">
                 隐私声明：数据完全在本地处理，不会上传任何服务器。<br>
@@ -474,116 +703,301 @@ def generate_html(stats, year):
             </p>
         </div>
 
+        {data_script(payload)}
         <script>
-            // ECharts 配色同步
-            var colorPrimary = '#818cf8';
-            var colorSecondary = '#c084fc';
-            var colorPink = '#f472b6';
-            var colorText = '#cbd5e1';
-            var colorSplit = '#334155';
+            {DATA_LOADER_JS}
+            loadReportData(function(DATA) {{
+                // ECharts 配色同步
+                var colorPrimary = '#818cf8';
+                var colorSecondary = '#c084fc';
+                var colorPink = '#f472b6';
+                var colorText = '#cbd5e1';
+                var colorSplit = '#334155';
             
-            var chartHour = echarts.init(document.getElementById('chart-hour'));
-            chartHour.setOption({{
-                tooltip: {{ trigger: 'axis', backgroundColor: 'rgba(30, 41, 59, 0.9)', borderColor: '#475569', textStyle: {{ color: '#fff' }} }},
-                grid: {{ top: 30, bottom: 20, left: 10, right: 10, containLabel: true }},
-                xAxis: {{ 
-                    type: 'category', 
-                    data: {list(range(24))}, 
-                    axisLine:{{lineStyle:{{color: '#475569'}}}},
-                    axisLabel: {{ color: colorText }}
-                }},
-                yAxis: {{ 
-                    type: 'value', 
-                    splitLine: {{ lineStyle: {{ color: colorSplit, type: 'dashed' }} }},
-                    axisLabel: {{ color: colorText }}
-                }},
-                series: [{{
-                    data: {stats['hour_dist']},
-                    type: 'bar',
-                    itemStyle: {{ 
-                        borderRadius: [4, 4, 0, 0], 
-                        color: new echarts.graphic.LinearGradient(0, 0, 0, 1, [
-                            {{ offset: 0, color: colorPink }},
-                            {{ offset: 1, color: colorPrimary }}
-                        ])
+                var chartHour = echarts.init(document.getElementById('chart-hour'));
+                chartHour.setOption({{
+                    tooltip: {{ trigger: 'axis', backgroundColor: 'rgba(30, 41, 59, 0.9)', borderColor: '#475569', textStyle: {{ color: '#fff' }} }},
+                    legend: {{ top: 0, right: 10, textStyle: {{ color: colorText }} }},
+                    grid: {{ top: 30, bottom: 20, left: 10, right: 10, containLabel: true }},
+                    xAxis: {{ 
+                        type: 'category', 
+                        data: {list(range(24))}, 
+                        axisLine:{{lineStyle:{{color: '#475569'}}}},
+                        axisLabel: {{ color: colorText }}
                     }},
-                    emphasis: {{ itemStyle: {{ color: '#fff' }} }}
-                }}]
-            }});
+                    yAxis: [{{ 
+                        type: 'value', 
+                        splitLine: {{ lineStyle: {{ color: colorSplit, type: 'dashed' }} }},
+                        axisLabel: {{ color: colorText }}
+                    }}, {{
+                        type: 'value',
+                        splitLine: {{ show: false }},
+                        axisLabel: {{ color: colorText, formatter: '{{value}}h' }}
+                    }}],
+                    series: [{{
+                        name: '在线时长',
+                        data: DATA.hour_uptime,
+                        type: 'line',
+                        yAxisIndex: 1,
+                        smooth: true,
+                        showSymbol: false,
+                        itemStyle: {{ color: colorSecondary }},
+                        lineStyle: {{ width: 3, color: colorSecondary }}
+                    }}, {{
+                        name: '活跃事件',
+                        data: DATA.hour_dist,
+                        type: 'bar',
+                        itemStyle: {{ 
+                            borderRadius: [4, 4, 0, 0], 
+                            color: new echarts.graphic.LinearGradient(0, 0, 0, 1, [
+                                {{ offset: 0, color: colorPink }},
+                                {{ offset: 1, color: colorPrimary }}
+                            ])
+                        }},
+                        emphasis: {{ itemStyle: {{ color: '#fff' }} }}
+                    }}]
+                }});
 
-            var chartPie = echarts.init(document.getElementById('chart-pie'));
-            chartPie.setOption({{
-                tooltip: {{ trigger: 'item', backgroundColor: 'rgba(30, 41, 59, 0.9)', textStyle: {{ color: '#fff' }} }},
-                legend: {{ bottom: '0', textStyle: {{ color: colorText }} }},
-                series: [{{
-                    name: '活跃分布',
-                    type: 'pie',
-                    radius: ['45%', '70%'],
-                    itemStyle: {{ borderRadius: 10, borderColor: '#1e293b', borderWidth: 3 }},
-                    label: {{ show: false }},
-                    data: {json.dumps(pie_data)},
-                    color: [colorPrimary, colorSecondary]
-                }}]
-            }});
+                var chartPie = echarts.init(document.getElementById('chart-pie'));
+                chartPie.setOption({{
+                    tooltip: {{ trigger: 'item', backgroundColor: 'rgba(30, 41, 59, 0.9)', textStyle: {{ color: '#fff' }} }},
+                    legend: {{ bottom: '0', textStyle: {{ color: colorText }} }},
+                    series: [{{
+                        name: '活跃分布',
+                        type: 'pie',
+                        radius: ['45%', '70%'],
+                        itemStyle: {{ borderRadius: 10, borderColor: '#1e293b', borderWidth: 3 }},
+                        label: {{ show: false }},
+                        data: DATA.pie,
+                        color: [colorPrimary, colorSecondary]
+                    }}]
+                }});
             
-            var chartWeek = echarts.init(document.getElementById('chart-week'));
-            chartWeek.setOption({{
-                tooltip: {{ trigger: 'axis', backgroundColor: 'rgba(30, 41, 59, 0.9)', textStyle: {{ color: '#fff' }} }},
-                grid: {{ top: 30, bottom: 20, left: 10, right: 10, containLabel: true }},
-                xAxis: {{ 
-                    type: 'category', 
-                    data: ['周一','周二','周三','周四','周五','周六','周日'], 
-                    axisLine:{{lineStyle:{{color: '#475569'}}}},
-                    axisLabel: {{ color: colorText }}
-                }},
-                yAxis: {{ 
-                    type: 'value', 
-                    splitLine: {{ lineStyle: {{ color: colorSplit, type: 'dashed' }} }},
-                    axisLabel: {{ color: colorText }}
-                }},
-                series: [{{
-                    data: {stats['weekday_dist']},
-                    type: 'line',
-                    smooth: true,
-                    symbolSize: 8,
-                    areaStyle: {{ 
-                        opacity: 0.3, 
-                        color: new echarts.graphic.LinearGradient(0, 0, 0, 1, [
-                            {{ offset: 0, color: colorSecondary }},
-                            {{ offset: 1, color: 'rgba(192, 132, 252, 0)' }}
-                        ])
+                var chartWeek = echarts.init(document.getElementById('chart-week'));
+                chartWeek.setOption({{
+                    tooltip: {{ trigger: 'axis', backgroundColor: 'rgba(30, 41, 59, 0.9)', textStyle: {{ color: '#fff' }} }},
+                    legend: {{ top: 0, right: 10, textStyle: {{ color: colorText }} }},
+                    grid: {{ top: 30, bottom: 20, left: 10, right: 10, containLabel: true }},
+                    xAxis: {{ 
+                        type: 'category', 
+                        data: ['周一','周二','周三','周四','周五','周六','周日'], 
+                        axisLine:{{lineStyle:{{color: '#475569'}}}},
+                        axisLabel: {{ color: colorText }}
                     }},
-                    itemStyle: {{ color: colorSecondary, borderColor: '#fff', borderWidth: 2 }},
-                    lineStyle: {{ width: 4, color: colorSecondary }}
-                }}]
-            }});
+                    yAxis: [{{ 
+                        type: 'value', 
+                        splitLine: {{ lineStyle: {{ color: colorSplit, type: 'dashed' }} }},
+                        axisLabel: {{ color: colorText }}
+                    }}, {{
+                        type: 'value',
+                        splitLine: {{ show: false }},
+                        axisLabel: {{ color: colorText, formatter: '{{value}}h' }}
+                    }}],
+                    series: [{{
+                        name: '在线时长',
+                        data: DATA.weekday_uptime,
+                        type: 'bar',
+                        yAxisIndex: 1,
+                        barWidth: '40%',
+                        itemStyle: {{ borderRadius: [4, 4, 0, 0], color: 'rgba(129, 140, 248, 0.5)' }}
+                    }}, {{
+                        name: '活跃事件',
+                        data: DATA.weekday_dist,
+                        type: 'line',
+                        smooth: true,
+                        symbolSize: 8,
+                        areaStyle: {{ 
+                            opacity: 0.3, 
+                            color: new echarts.graphic.LinearGradient(0, 0, 0, 1, [
+                                {{ offset: 0, color: colorSecondary }},
+                                {{ offset: 1, color: 'rgba(192, 132, 252, 0)' }}
+                            ])
+                        }},
+                        itemStyle: {{ color: colorSecondary, borderColor: '#fff', borderWidth: 2 }},
+                        lineStyle: {{ width: 4, color: colorSecondary }}
+                    }}]
+                }});
             
-            window.onresize = function() {{
-                chartHour.resize(); chartPie.resize(); chartWeek.resize();
-            }};
+                {calendar_script('chartCalendar', 'chart-calendar', 'DATA.calendar', '在线', ['#1e293b', '#818cf8', '#f472b6'], extra_label='事件', unit='h')}
+                window.onresize = function() {{
+                    chartHour.resize(); chartPie.resize(); chartWeek.resize(); chartCalendar.resize();
+                }};
+            }});
+        </script>
+    </body>
+    </html>
+    """
+    return html_content
+
+def generate_html(stats, year, output=None, open_browser=True, period=None, offline=False):
+    html_content = render_html(stats, year, period=period, offline=offline)
+    output = output or HTML_FILE
+    with open(output, "w", encoding="utf-8") as f:
+        f.write(html_content)
+    
+    print(f"\n🎉 报告已生成！请查看文件: {output}")
+    if open_browser:
+        webbrowser.open('file://' + os.path.abspath(output))
+    return output
+
+def generate_history_html(yearly, pages, output=None, open_browser=True, offline=False):
+    """
+    多年索引页：逐年的在线时长、崩溃、安装趋势，并链接到每一年的详细报告。
+    pages: {年份: 该年报告的相对路径}
+    """
+    years = sorted(yearly)
+    uptime = [round(yearly[y]['total_uptime_seconds'] / 3600, 1) for y in years]
+    crashes = [yearly[y]['crash'] + yearly[y]['bsod'] for y in years]
+    installs = [yearly[y]['install_count'] for y in years]
+    boots = [yearly[y]['boot'] for y in years]
+    
+    total_hours = int(sum(uptime))
+    best_year = years[uptime.index(max(uptime))] if years else "无"
+    
+    rows = ''.join([
+        f'<a class="year-link" href="{pages[y]}"><span class="year">{y}</span>'
+        f'<span>{uptime[i]:.0f}h 在线 · {boots[i]} 次开机 · {crashes[i]} 次崩溃 · {installs[i]} 次安装</span></a>'
+        for i, y in enumerate(years)
+    ])
+
+    # 与年度报告一样，图表数据只内嵌一次
+    payload = {
+        'years': [str(y) for y in years],
+        'uptime': uptime,
+        'crashes': crashes,
+        'installs': installs,
+    }
+    
+    html_content = f"""
+    <!DOCTYPE html>
+    <html>
+    <head>
+        <meta charset="utf-8">
+        <title>我的数字足迹编年史</title>
+        {head_assets(offline)}
+        <style>
+            :root {{ 
+                --bg: #0f172a; 
+                --card-bg: #1e293b; 
+                --card-border: #334155;
+                --text-main: #f1f5f9; 
+                --text-dim: #94a3b8;
+                --accent-primary: #818cf8;
+                --accent-secondary: #c084fc;
+                --gradient-main: linear-gradient(135deg, #6366f1 0%, #ec4899 100%);
+            }}
+            body {{ font-family: {FONT_STACK}; background-color: var(--bg); color: var(--text-main); margin: 0; padding: 40px 20px; line-height: 1.6; }}
+            .container {{ max-width: 1100px; margin: 0 auto; }}
+            .header {{ text-align: center; padding: 60px 20px; background: rgba(30, 41, 59, 0.5); border-radius: 30px; margin-bottom: 40px; border: 1px solid rgba(255,255,255,0.1); }}
+            .header h1 {{ margin: 0; font-size: 3em; font-weight: 800; background: var(--gradient-main); -webkit-background-clip: text; -webkit-text-fill-color: transparent; }}
+            .header p {{ color: var(--text-dim); margin-top: 15px; font-size: 1.1em; }}
+            .card {{ background: var(--card-bg); border-radius: 24px; padding: 35px; margin-bottom: 30px; border: 1px solid var(--card-border); }}
+            .card h2 {{ margin-top: 0; font-size: 1.6em; margin-bottom: 25px; color: #fff; }}
+            .stat-grid {{ display: grid; grid-template-columns: repeat(3, 1fr); gap: 20px; text-align: center; }}
+            .stat-box {{ background: rgba(15, 23, 42, 0.6); padding: 25px 15px; border-radius: 18px; border: 1px solid rgba(255,255,255,0.05); }}
+            .stat-num {{ font-size: 2.2em; font-weight: 800; color: #fff; }}
+            .stat-label {{ font-size: 0.9em; color: var(--text-dim); }}
+            .chart-box {{ width: 100%; height: 380px; }}
+            .year-link {{ display: flex; gap: 20px; align-items: center; padding: 15px 20px; margin-bottom: 10px; border-radius: 14px; background: rgba(255,255,255,0.03); color: var(--text-dim); text-decoration: none; border: 1px solid rgba(255,255,255,0.05); }}
+            .year-link:hover {{ border-color: var(--accent-primary); color: var(--text-main); }}
+            .year {{ font-size: 1.4em; font-weight: 800; color: var(--accent-secondary); min-width: 70px; }}
+            @media (max-width: 768px) {{ .stat-grid {{ grid-template-columns: 1fr; }} }}
+        </style>
+    </head>
+    <body>
+        <div class="container">
+            <div class="header">
+                <h1>数字足迹编年史</h1>
+                <p>{years[0] if years else ''} - {years[-1] if years else ''} · Generated by Python System Report</p>
+            </div>
+
+            <div class="card">
+                <h2>📟 历年总览</h2>
+                <div class="stat-grid">
+                    <div class="stat-box"><div class="stat-num">{len(years)}</div><div class="stat-label">覆盖年份</div></div>
+                    <div class="stat-box"><div class="stat-num">{total_hours}h</div><div class="stat-label">累计运行</div></div>
+                    <div class="stat-box"><div class="stat-num">{best_year}</div><div class="stat-label">最肝的一年</div></div>
+                </div>
+            </div>
+
+            <div class="card">
+                <h2>📈 逐年趋势</h2>
+                <div id="chart-trend" class="chart-box"></div>
+            </div>
+
+            <div class="card">
+                <h2>🗂️ 年度报告</h2>
+                {rows}
+            </div>
+        </div>
+
+        {data_script(payload)}
+        <script>
+            {DATA_LOADER_JS}
+            loadReportData(function(DATA) {{
+                var colorText = '#cbd5e1';
+                var colorSplit = '#334155';
+                var chartTrend = echarts.init(document.getElementById('chart-trend'));
+                chartTrend.setOption({{
+                    tooltip: {{ trigger: 'axis', backgroundColor: 'rgba(30, 41, 59, 0.9)', textStyle: {{ color: '#fff' }} }},
+                    legend: {{ top: 0, textStyle: {{ color: colorText }} }},
+                    grid: {{ top: 40, bottom: 20, left: 10, right: 10, containLabel: true }},
+                    xAxis: {{ type: 'category', data: DATA.years, axisLabel: {{ color: colorText }} }},
+                    yAxis: [
+                        {{ type: 'value', name: '小时', splitLine: {{ lineStyle: {{ color: colorSplit, type: 'dashed' }} }}, axisLabel: {{ color: colorText }} }},
+                        {{ type: 'value', name: '次数', splitLine: {{ show: false }}, axisLabel: {{ color: colorText }} }}
+                    ],
+                    series: [
+                        {{ name: '在线时长', type: 'line', smooth: true, data: DATA.uptime, itemStyle: {{ color: '#818cf8' }}, lineStyle: {{ width: 4 }}, areaStyle: {{ opacity: 0.15 }} }},
+                        {{ name: '异常/崩溃', type: 'bar', yAxisIndex: 1, data: DATA.crashes, itemStyle: {{ color: '#ef4444', borderRadius: [4, 4, 0, 0] }} }},
+                        {{ name: '软件安装', type: 'bar', yAxisIndex: 1, data: DATA.installs, itemStyle: {{ color: '#c084fc', borderRadius: [4, 4, 0, 0] }} }}
+                    ]
+                }});
+                window.onresize = function() {{ chartTrend.resize(); }};
+            }});
         </script>
     </body>
     </html>
     """
     
-    with open(HTML_FILE, "w", encoding="utf-8") as f:
+    output = output or HISTORY_HTML
+    with open(output, "w", encoding="utf-8") as f:
         f.write(html_content)
     
-    print(f"\n🎉 报告已生成！请查看文件: {HTML_FILE}")
-    webbrowser.open('file://' + os.path.abspath(HTML_FILE))
+    print(f"\n🎉 历年索引已生成！请查看文件: {output}")
+    if open_browser:
+        webbrowser.open('file://' + os.path.abspath(output))
+    return output
+
+def generate_history_report(yearly, output=None, open_browser=True, offline=False):
+    """为每一年生成详细报告，再生成串联它们的索引页"""
+    output = output or HISTORY_HTML
+    folder = os.path.dirname(os.path.abspath(output))
+    pages = {}
+    for year, stats in sorted(yearly.items()):
+        page = f"my_digital_life_{year}.html"
+        generate_html(stats, year, output=os.path.join(folder, page), open_browser=False, offline=offline)
+        pages[year] = page
+    return generate_history_html(yearly, pages, output, open_browser, offline)
 
 if __name__ == "__main__":
     current_year = datetime.datetime.now().year
     
     try:
-        user_input = input(f"请输入要查询的年份 (默认 {current_year}): ")
+        user_input = input(f"请输入要查询的年份 (默认 {current_year}，输入 all 生成历年报告): ")
+        history_mode = user_input.strip().lower() == 'all'
         target_year = int(user_input) if user_input.strip().isdigit() else current_year
         HTML_FILE = f"my_digital_life_{target_year}.html"
         
-        events = get_hybrid_data(target_year)
-        if events:
+        events = get_history_data() if history_mode else get_hybrid_data(target_year)
+        if events and EXPORT_PATH:
+            from columnar import export_events
+            export_events(events, EXPORT_PATH)
+        if events and history_mode:
+            generate_history_report(analyze_history(events), offline=OFFLINE_REPORT)
+        elif events:
             stats = analyze_hybrid(events)
-            generate_html(stats, target_year)
+            generate_html(stats, target_year, offline=OFFLINE_REPORT)
         else:
             print("\n❌ 未能获取数据。")
             print("💡 小贴士：系统日志属于敏感信息，请尝试【右键 -> 以管理员身份运行】此脚本。")
@@ -0,0 +1,107 @@
+import os
+import json
+
+# ================= 配置区 =================
+REGISTRY_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "event_types.json")
+# ========================================
+
+# 语义类别 -> 会话重建用的类型 (见 sessions.py)
+#   presence=False: 只看电源状态，登录/锁屏只是"机器醒着"的心跳
+#   presence=True : 锁屏/注销也会截断活跃区间，统计的是人真正坐在电脑前的时间
+SESSION_KINDS = {
+    'boot': 'boot',
+    'shutdown': 'shutdown',
+    'sleep': 'sleep',
+    'wake': 'wake',
+    'crash': 'crash',
+    'install': 'heartbeat',
+    'update': 'heartbeat',
+    'logon': 'unlock',
+    'unlock': 'unlock',
+    'logoff': 'lock',
+    'lock': 'lock',
+}
+
+class EventRegistry:
+    """
+    事件类型注册表 (event_types.json)：
+    - 生成 PowerShell 采集脚本的过滤条件 (按 日志 + 来源 分组，一次查询取全)
+    - 提供 (Type, Id) -> 条目 的 O(1) 分发表给分析器
+    新增信号只需要在 JSON 里加一行，不用改采集脚本和分析器。
+    """
+
+    def __init__(self, entries):
+        self.entries = entries
+        self.dispatch = {(e['type'], e['id']): e for e in entries}
+        self.handlers = sorted({e['handler'] for e in entries})
+
+    @classmethod
+    def load(cls, path=REGISTRY_PATH):
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        entries = []
+        for raw in data['events']:
+            entry = dict(raw)
+            entry['id'] = int(entry['id'])
+            entry.setdefault('provider', None)
+            entry.setdefault('handler', entry['class'])
+            if entry['class'] not in SESSION_KINDS:
+                raise ValueError(f"未知的事件类别: {entry['class']}")
+            entries.append(entry)
+        return cls(entries)
+
+    def lookup(self, etype, eid):
+        return self.dispatch.get((etype, eid))
+
+    def match(self, log, provider, eid):
+        """原始日志 (evtx) 的 日志名/来源/Id -> 条目，用于把 evtx 转成采集器格式"""
+        for e in self.entries:
+            if e['log'] == log and e['id'] == eid and e['provider'] in (None, provider):
+                return e
+        return None
+
+    def session_kind(self, etype, eid, presence=False):
+        entry = self.dispatch.get((etype, eid))
+        if entry is None:
+            return None
+        kind = SESSION_KINDS[entry['class']]
+        if not presence and kind in ('lock', 'unlock'):
+            return 'heartbeat'
+        return kind
+
+    def groups(self):
+        """按 (日志, 来源, Type) 分组的 Id 列表，每组对应一条 Get-WinEvent"""
+        groups = {}
+        for e in self.entries:
+            groups.setdefault((e['log'], e['provider'], e['type']), []).append(e['id'])
+        return groups
+
+    def build_query(self, start_date, end_date):
+        """生成一次取回所有注册事件的 PowerShell 脚本"""
+        lines = [
+            f'$s = Get-Date -Date "{start_date}"',
+            f'$e = Get-Date -Date "{end_date}"',
+            '$all = @()',
+        ]
+        for (log, provider, etype), ids in self.groups().items():
+            fields = [f"LogName='{log}'"]
+            if provider:
+                fields.append(f"ProviderName='{provider}'")
+            fields.append("Id=" + ','.join(str(i) for i in sorted(set(ids))))
+            fields.append("StartTime=$s; EndTime=$e")
+            lines.append(
+                f"$all += @(Get-WinEvent -FilterHashtable @{{{'; '.join(fields)}}} -ErrorAction SilentlyContinue | "
+                f"Select-Object Id, TimeCreated, @{{Name='Type';Expression={{'{etype}'}}}})"
+            )
+        # 合并后按时间排序 (这对计算持续时间很重要)
+        lines.append("$all | Sort-Object TimeCreated | ConvertTo-Json -Depth 1")
+        return '\n'.join(lines) + '\n'
+
+_default = None
+
+def default_registry():
+    """进程内共享的默认注册表 (首次使用时加载)"""
+    global _default
+    if _default is None:
+        _default = EventRegistry.load()
+    return _default
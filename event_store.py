@@ -0,0 +1,256 @@
+import os
+import sys
+import json
+import heapq
+import bisect
+import argparse
+import datetime
+from array import array
+
+from digital_life import analyze_hybrid, parse_time, get_range_data, generate_html, event_kind, REGISTRY
+from sessions import reconstruct_intervals, SessionIndex
+
+# ================= 配置区 =================
+STORE_PATH = "./digital_life_events.store"
+# ========================================
+
+# 持久化格式：魔数行 + JSON 头一行 + 若干定长数组 (array.tofile)
+STORE_MAGIC = b'DLSTORE1\n'
+# 头里没有 classes 字段的旧文件使用的前缀和布局
+LEGACY_CLASSES = ['boot', 'shutdown', 'crash', 'bsod', 'wake', 'sleep', 'install']
+
+TYPE_CODES = {'Sys': 0, 'App': 1, 'Beat': 2, 'Sec': 3}
+TYPE_NAMES = {v: k for k, v in TYPE_CODES.items()}
+
+# 需要 O(log n) 计数的事件类别 (注册表里的 handler 名)，每类一条前缀和数组
+COUNT_CLASSES = tuple(REGISTRY.handlers)
+
+def event_class(eid, type_code):
+    entry = REGISTRY.lookup(TYPE_NAMES[type_code], eid)
+    return entry['handler'] if entry else None
+
+def to_ms(dt):
+    return int(round(dt.timestamp() * 1000))
+
+class EventStore:
+    """
+    按时间排序的归一化事件库：
+    - times / ids / types 三个平行数组，bisect 定位任意时间段，O(log n)
+    - 每类事件一条前缀和数组，任意时间段的开机/崩溃/安装次数也是 O(log n)
+    - 活跃区间在入库时基于全部历史重建，按时间段裁剪即可，不受查询边界影响
+    - covered 记录已经向 PowerShell 查询过的时间段，只补查缺口
+    """
+
+    def __init__(self, path=STORE_PATH):
+        self.path = path
+        self.times = array('q')   # epoch 毫秒
+        self.ids = array('i')
+        self.types = array('b')
+        self.prefix = {c: array('I', [0]) for c in COUNT_CLASSES}
+        self.covered = []         # [[t1_ms, t2_ms], ...]，互不重叠且有序
+        self.index = SessionIndex([])
+        self.keys = None          # 去重用的 {(毫秒, Id, 类型)}，第一次 add 时建立，之后随入库增量维护
+
+    def __len__(self):
+        return len(self.times)
+
+    # ---------- 持久化 ----------
+    @classmethod
+    def load(cls, path=STORE_PATH):
+        store = cls(path)
+        if not os.path.exists(path):
+            return store
+        with open(path, 'rb') as f:
+            if f.readline() != STORE_MAGIC:
+                raise ValueError(f"不是有效的事件库文件: {path}")
+            header = json.loads(f.readline())
+            n, m = header['count'], header['intervals']
+            store.covered = header['covered']
+            store.times.fromfile(f, n)
+            store.ids.fromfile(f, n)
+            store.types.fromfile(f, n)
+            prefix = {}
+            for c in header.get('classes', LEGACY_CLASSES):
+                prefix[c] = array('I')
+                prefix[c].fromfile(f, n + 1)
+            starts, ends = array('d'), array('d')
+            starts.fromfile(f, m)
+            ends.fromfile(f, m)
+            store.index = SessionIndex(list(zip(starts, ends)))
+        if tuple(header.get('classes', LEGACY_CLASSES)) == COUNT_CLASSES:
+            store.prefix = prefix
+        else:
+            # 注册表新增/删除了类别：用已有事件重建前缀和与活跃区间
+            store._rebuild()
+        return store
+
+    def save(self, path=None):
+        path = path or self.path
+        header = {'count': len(self.times), 'intervals': len(self.index), 'covered': self.covered,
+                  'classes': list(COUNT_CLASSES)}
+        tmp = path + '.tmp'
+        with open(tmp, 'wb') as f:
+            f.write(STORE_MAGIC)
+            f.write(json.dumps(header).encode('utf-8') + b'\n')
+            self.times.tofile(f)
+            self.ids.tofile(f)
+            self.types.tofile(f)
+            for c in COUNT_CLASSES:
+                self.prefix[c].tofile(f)
+            array('d', self.index.starts).tofile(f)
+            array('d', self.index.ends).tofile(f)
+        os.replace(tmp, path)
+
+    # ---------- 入库 ----------
+    def add(self, events):
+        """
+        合并一批采集器格式的事件 (自动去重)：新事件单独排序后与已有数组归并，
+        只重写第一条新事件之后的部分，前缀和也只从那里接着算；成本与这一批和它之后的事件数相关，
+        补查最近的时间段时几乎只是追加。活跃区间仍基于全部历史重建。
+        """
+        if self.keys is None:
+            self.keys = set(zip(self.times, self.ids, self.types))
+        new = set()
+        for e in events:
+            dt = parse_time(e.get('TimeCreated'))
+            code = TYPE_CODES.get(e.get('Type'))
+            if dt is None or code is None:
+                continue
+            row = (to_ms(dt), int(e.get('Id') or 0), code)
+            if row not in self.keys:
+                new.add(row)
+        if not new:
+            return
+        new = sorted(new)
+        self.keys.update(new)
+        # 早于第一条新事件的部分不动，之后的部分与新事件归并
+        i = bisect.bisect_left(self.times, new[0][0])
+        tail = heapq.merge(zip(self.times[i:], self.ids[i:], self.types[i:]), new)
+        times, ids, types = self.times[:i], self.ids[:i], self.types[:i]
+        for ms, eid, code in tail:
+            times.append(ms)
+            ids.append(eid)
+            types.append(code)
+        self.times, self.ids, self.types = times, ids, types
+        self._rebuild(i)
+
+    def _rebuild(self, start=0):
+        """从下标 start 开始重算前缀和 (之前的不变)，并重建活跃区间"""
+        prefix = {c: self.prefix[c][:start + 1] if start else array('I', [0]) for c in COUNT_CLASSES}
+        counts = {c: prefix[c][-1] for c in COUNT_CLASSES}
+        for eid, code in zip(self.ids[start:], self.types[start:]):
+            cls = event_class(eid, code)
+            if cls:
+                counts[cls] += 1
+            for c in COUNT_CLASSES:
+                prefix[c].append(counts[c])
+        self.prefix = prefix
+        timeline = []
+        for ms, eid, code in zip(self.times, self.ids, self.types):
+            kind = event_kind({'Id': eid, 'Type': TYPE_NAMES[code]})
+            if kind:
+                timeline.append((ms / 1000, kind))
+        self.index = SessionIndex(reconstruct_intervals(timeline))
+
+    def mark_covered(self, t1, t2):
+        spans = sorted(self.covered + [[t1, t2]])
+        merged = []
+        for s, e in spans:
+            if merged and s <= merged[-1][1]:
+                merged[-1][1] = max(merged[-1][1], e)
+            else:
+                merged.append([s, e])
+        self.covered = merged
+
+    def missing(self, t1, t2):
+        """[t1, t2) 中还没有查询过的缺口"""
+        gaps = []
+        cursor = t1
+        for s, e in self.covered:
+            if e <= cursor or s >= t2:
+                continue
+            if s > cursor:
+                gaps.append((cursor, s))
+            cursor = max(cursor, e)
+        if cursor < t2:
+            gaps.append((cursor, t2))
+        return gaps
+
+    def ensure(self, t1, t2, collector=None):
+        """
+        只为缺口发起 PowerShell 查询。查询成功 (包括确实没有事件) 的缺口才标记为已覆盖，
+        失败的缺口下次再查；尚未到来的时间不标记。
+        """
+        now = to_ms(datetime.datetime.now())
+        gaps = self.missing(t1, t2)
+        fetched = []
+        for s, e in gaps:
+            start = datetime.datetime.fromtimestamp(s / 1000).isoformat(timespec='seconds')
+            end = datetime.datetime.fromtimestamp(e / 1000).isoformat(timespec='seconds')
+            print(f"   ---> 补查日志: {start} ~ {end}")
+            events = get_range_data(start, end, collector, strict=True)
+            if events is None:
+                print("   ⚠️ 这一段查询失败，暂不记为已覆盖，下次运行会重新补查。")
+                continue
+            fetched.extend(events)
+            if s < now:
+                self.mark_covered(s, min(e, now))
+        if fetched:
+            self.add(fetched)
+        return len(gaps)
+
+    # ---------- 查询 ----------
+    def span(self, t1, t2):
+        """[t1, t2) (毫秒) 对应的数组下标范围"""
+        return bisect.bisect_left(self.times, t1), bisect.bisect_left(self.times, t2)
+
+    def counts(self, t1, t2):
+        """任意时间段内各类事件的次数，O(log n)"""
+        i, j = self.span(t1, t2)
+        return {c: self.prefix[c][j] - self.prefix[c][i] for c in COUNT_CLASSES}
+
+    def events_between(self, t1, t2):
+        """解码 [t1, t2) 内的事件，耗时只与该时间段的事件数成正比"""
+        i, j = self.span(t1, t2)
+        return [
+            {'Id': eid, 'TimeCreated': f"/Date({ms})/", 'Type': TYPE_NAMES[code]}
+            for ms, eid, code in zip(self.times[i:j], self.ids[i:j], self.types[i:j])
+        ]
+
+    def analyze(self, t1, t2):
+        """时间段报告的 stats，活跃区间取全局索引的裁剪结果"""
+        return analyze_hybrid(self.events_between(t1, t2), self.index.slice(t1 / 1000, t2 / 1000))
+
+def parse_day(text):
+    return datetime.datetime.strptime(text, '%Y-%m-%d')
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="任意时间段的 System Report (本地事件库 + 按需补查)")
+    parser.add_argument('--from', dest='date_from', required=True, type=parse_day, help="起始日期 YYYY-MM-DD")
+    parser.add_argument('--to', dest='date_to', required=True, type=parse_day, help="结束日期 YYYY-MM-DD (含当天)")
+    parser.add_argument('--store', default=STORE_PATH, help="事件库文件路径")
+    parser.add_argument('--no-fetch', action='store_true', help="只使用事件库中已有的数据")
+    parser.add_argument('-o', '--output', default=None, help="HTML 输出路径")
+    parser.add_argument('--offline', action='store_true', help="内联 ECharts，生成可以断网打开的报告")
+    args = parser.parse_args(argv)
+
+    t1 = to_ms(args.date_from)
+    t2 = to_ms(args.date_to + datetime.timedelta(days=1))
+    period = f"{args.date_from:%Y-%m-%d} ~ {args.date_to:%Y-%m-%d}"
+
+    store = EventStore.load(args.store)
+    if not args.no_fetch and store.ensure(t1, t2):
+        store.save()
+
+    counts = store.counts(t1, t2)
+    print(f"🗃️  {period}：开机 {counts.get('boot', 0)} 次，崩溃 {counts.get('crash', 0) + counts.get('bsod', 0)} 次，安装 {counts.get('install', 0)} 次")
+    if not any(counts.values()):
+        print("\n❌ 该时间段没有数据。")
+        return 1
+
+    output = args.output or f"my_digital_life_{args.date_from:%Y%m%d}_{args.date_to:%Y%m%d}.html"
+    generate_html(store.analyze(t1, t2), args.date_from.year, output=output, period=period, offline=args.offline)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,386 @@
+import os
+import sys
+import json
+import time
+import argparse
+import datetime
+from concurrent.futures import ProcessPoolExecutor, TimeoutError, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
+
+from digital_life import analyze_hybrid, parse_time, REGISTRY
+from linux_source import events_from_wtmp, events_from_journal
+from activity_bitmap import ActivityBitmap, sum_bitmaps
+from badges import default_rules, system_metrics
+from columnar import is_columnar, load_events as load_columnar_events
+
+# ================= 配置区 =================
+# 每台主机导出文件支持的格式 (.wtmp 为 Linux 主机的 wtmp 副本)
+# .parquet / .cols 是 columnar.py 导出的列式事件文件
+EXPORT_EXTENSIONS = ('.json', '.ndjson', '.jsonl', '.evtx', '.wtmp', '.parquet', '.cols')
+# 排行榜长度
+TOP_N = 10
+FLEET_JSON = "fleet_report.json"
+# 单台主机最多分析多少秒，超时记为失败 (损坏的导出文件可能让解析器卡死)
+HOST_TIMEOUT = 300
+# ========================================
+
+def load_json_export(path):
+    """
+    读取采集器导出的 JSON (ConvertTo-Json 的数组/单对象) 或 NDJSON (每行一个事件)
+    """
+    with open(path, 'rb') as f:
+        raw = f.read()
+    text = raw.decode('utf-8-sig', errors='ignore').strip()
+    if not text:
+        return []
+    if text[0] in '[{':
+        try:
+            data = json.loads(text)
+            if isinstance(data, dict): data = [data]
+            return data
+        except ValueError:
+            # 不是一个完整的 JSON 文档，按 NDJSON 处理
+            pass
+    events = []
+    for line in text.splitlines():
+        line = line.strip()
+        if line:
+            events.append(json.loads(line))
+    return events
+
+def load_evtx_export(path):
+    """
+    读取 .evtx 原始日志 (需要 python-evtx)，转换成与 PowerShell 采集器相同的事件结构，
+    只保留事件类型注册表里登记过的事件 (与采集脚本的过滤条件一致)
+    """
+    try:
+        from Evtx.Evtx import Evtx
+    except ImportError:
+        raise RuntimeError("读取 .evtx 需要先安装 python-evtx: pip install python-evtx")
+    import xml.etree.ElementTree as ET
+
+    ns = '{http://schemas.microsoft.com/win/2004/08/events/event}'
+    events = []
+    with Evtx(path) as log:
+        for record in log.records():
+            system = ET.fromstring(record.xml()).find(f'{ns}System')
+            if system is None: continue
+            try:
+                eid = int(system.findtext(f'{ns}EventID'))
+            except (TypeError, ValueError):
+                continue
+            provider = system.find(f'{ns}Provider')
+            provider = provider.get('Name') if provider is not None else ''
+            channel = system.findtext(f'{ns}Channel') or ''
+            created = system.find(f'{ns}TimeCreated')
+            if created is None: continue
+            # EVTX 里是 7 位小数的 UTC 时间，fromisoformat 只认 6 位
+            t_str = created.get('SystemTime', '').replace(' ', 'T')
+            if '.' in t_str:
+                head, frac = t_str.split('.', 1)
+                t_str = f"{head}.{frac.rstrip('Z')[:6].ljust(6, '0')}Z"
+            # 换成本地时间 (不带时区)，与 PowerShell 导出的 /Date(ms)/ 一致，
+            # 否则同一个 fleet 里 EVTX 主机的小时/星期分布是 UTC 的
+            try:
+                t_str = datetime.datetime.fromisoformat(t_str.replace('Z', '+00:00')).astimezone().replace(tzinfo=None).isoformat()
+            except ValueError:
+                continue
+
+            entry = REGISTRY.match(channel, provider, eid)
+            if entry is not None:
+                events.append({'Id': eid, 'TimeCreated': t_str, 'Type': entry['type']})
+    return events
+
+def load_host_events(path):
+    """按扩展名读取单台主机的导出，并按时间排序 (analyze_hybrid 依赖时间顺序)"""
+    if is_columnar(path):
+        # 导出时已经归一化过，读出来就是排好序的采集器格式
+        return load_columnar_events(path)
+    if path.lower().endswith('.evtx'):
+        events = load_evtx_export(path)
+    elif path.lower().endswith('.wtmp'):
+        events = events_from_wtmp(path)
+    else:
+        events = load_json_export(path)
+        # Linux 主机的 journalctl -o json 导出
+        if events and isinstance(events[0], dict) and '__REALTIME_TIMESTAMP' in events[0]:
+            events = events_from_journal(events)
+
+    keyed = []
+    for e in events:
+        if not isinstance(e, dict): continue
+        dt = parse_time(str(e.get('TimeCreated', '')))
+        if dt is None: continue
+        keyed.append((dt.timestamp(), e))
+    keyed.sort(key=lambda x: x[0])
+    return [e for _, e in keyed]
+
+def host_name(path):
+    name = os.path.basename(path)
+    for ext in EXPORT_EXTENSIONS:
+        if name.lower().endswith(ext):
+            return name[:-len(ext)]
+    return name
+
+def summarize_host(host, stats, event_count):
+    """只保留合并所需的精简指标，避免把整个 stats 在进程间来回序列化"""
+    longest = stats['longest_session']
+    return {
+        'host': host,
+        'events': event_count,
+        'boot': stats['boot'],
+        'shutdown': stats['shutdown'],
+        'crash': stats['crash'],
+        'bsod': stats['bsod'],
+        'sleep': stats['sleep'],
+        'wake': stats['wake'],
+        'install_count': stats['install_count'],
+        'crashes_after_install': stats['crash_install']['after_install'],
+        'uptime_hours': round(stats['total_uptime_seconds'] / 3600, 2),
+        'longest_session_hours': round(longest['duration'] / 3600, 2),
+        'longest_session_date': longest['date'].strftime('%Y-%m-%d') if longest['date'] else None,
+        'active_days': len(stats['daily_uptime']),
+        'hour_dist': stats['hour_dist'],
+        'weekday_dist': stats['weekday_dist'],
+        'hour_uptime': [round(sec / 3600, 2) for sec in stats['hour_uptime']],
+        'overtime_days': stats['overtime']['days'],
+        'longest_streak_days': stats['active_streak']['days'],
+        # 每年 ~64 KB 的分钟位图，合并时用来算"同时在线"
+        'activity_bitmaps': {year: bytes(b.bits) for year, b in stats['activity_bitmaps'].items()},
+        # 徽章规则用到的数值指标，合并时对所有主机一次性求值
+        'badge_metrics': system_metrics(stats),
+    }
+
+def process_host(path):
+    """进程池 worker：单台主机的任何异常都只影响它自己"""
+    host = host_name(path)
+    try:
+        events = load_host_events(path)
+        if not events:
+            return {'host': host, 'path': path, 'error': '没有可用事件'}
+        stats = analyze_hybrid(events)
+        return summarize_host(host, stats, len(events))
+    except Exception as e:
+        return {'host': host, 'path': path, 'error': f"{type(e).__name__}: {e}"}
+
+def find_exports(folder):
+    paths = []
+    for root, dirs, files in os.walk(folder):
+        # .cols 是一个目录 (每列一个文件)，整体算一台主机，不再往里走
+        for d in [d for d in dirs if d.lower().endswith('.cols')]:
+            paths.append(os.path.join(root, d))
+            dirs.remove(d)
+        for filename in files:
+            if filename.lower().endswith(EXPORT_EXTENSIONS):
+                paths.append(os.path.join(root, filename))
+    paths.sort()
+    return paths
+
+def terminate_pool(pool):
+    """结束进程池，卡住的 worker 直接杀掉 (shutdown 本身不会打断正在运行的任务)"""
+    for proc in list((getattr(pool, '_processes', None) or {}).values()):
+        proc.terminate()
+    pool.shutdown(wait=True, cancel_futures=True)
+
+def timeout_error(path, timeout):
+    return {'host': host_name(path), 'path': path, 'error': f"超时: 超过 {timeout} 秒仍未分析完"}
+
+def run_isolated(path, timeout=HOST_TIMEOUT):
+    """在独立的单进程池里处理一台主机，用于定位把 worker 搞崩或卡死的那份文件"""
+    pool = ProcessPoolExecutor(max_workers=1)
+    try:
+        return pool.submit(process_host, path).result(timeout=timeout)
+    except BrokenProcessPool as e:
+        return {'host': host_name(path), 'path': path, 'error': f"worker 崩溃: {e}"}
+    except TimeoutError:
+        return timeout_error(path, timeout)
+    finally:
+        terminate_pool(pool)
+
+def run_fleet(paths, workers=None, timeout=HOST_TIMEOUT):
+    """
+    并行分析所有主机。出问题时结束当前进程池，只把可疑的主机单独重跑，
+    其余未完成的主机换一个新的进程池继续 (坏文件只会让它自己失败，不会让整批变成串行)：
+    - 某个 worker 进程直接崩溃 (BrokenProcessPool)：崩溃时已交给 worker (正在运行或排在队列里) 的主机是可疑的
+    - 某台主机开始运行后超过 timeout 秒还没完成：超时的主机是可疑的，单独重跑仍然超时就记为失败
+    """
+    results = {}
+    suspects = []
+    pool = ProcessPoolExecutor(max_workers=workers)
+    futures = {pool.submit(process_host, p): p for p in paths}
+    started = {}
+    pending = set(futures)
+
+    def mark_running():
+        # running() 在任务交给 worker 队列时就为真，计时会略早于真正开始运行
+        now = time.monotonic()
+        for fut in pending:
+            if fut.running():
+                started.setdefault(fut, now)
+        return now
+
+    try:
+        while pending and not suspects:
+            mark_running()
+            done, pending = wait(pending, timeout=min(timeout, 1.0), return_when=FIRST_COMPLETED)
+            now = mark_running()
+            for fut in done:
+                results[futures[fut]] = fut.result()
+            suspects = [futures[fut] for fut in pending if fut in started and now - started[fut] > timeout]
+    except BrokenProcessPool:
+        for fut, p in futures.items():
+            if fut.done() and not fut.cancelled() and fut.exception() is None:
+                results[p] = fut.result()
+        suspects = [futures[fut] for fut in started if futures[fut] not in results]
+        if not suspects:
+            # 还没来得及看到就崩了：任务按提交顺序交给 worker，在跑的一定是最早的几个未完成主机
+            # (每个 worker 一个正在运行，队列里再最多排 worker 数 + 1 个)
+            suspects = [p for p in paths if p not in results][:2 * pool._max_workers + 1]
+    finally:
+        if suspects:
+            terminate_pool(pool)
+        else:
+            pool.shutdown(cancel_futures=True)
+
+    # 超时的计时偏早、崩溃时在跑的不一定是元凶，都单独再跑一次确认
+    for p in suspects:
+        results[p] = run_isolated(p, timeout)
+    rest = [p for p in paths if p not in results]
+    if rest:
+        results.update(zip(rest, run_fleet(rest, workers, timeout)))
+    return [results[p] for p in paths]
+
+def merge_fleet(summaries, top_n=TOP_N):
+    """把各主机的指标合并成全网分布与排行榜"""
+    hosts = [s for s in summaries if 'error' not in s]
+    failed = [s for s in summaries if 'error' in s]
+
+    fleet = {
+        'generated_at': datetime.datetime.now().isoformat(timespec='seconds'),
+        'host_count': len(hosts),
+        'failed_count': len(failed),
+        'failed': [{'host': s['host'], 'error': s['error']} for s in failed],
+        'totals': {},
+        'hour_dist': [0] * 24,
+        'weekday_dist': [0] * 7,
+        'hour_uptime': [0.0] * 24,
+        'uptime_histogram': {},
+        'rankings': {},
+    }
+
+    for key in ('events', 'boot', 'shutdown', 'crash', 'bsod', 'sleep', 'wake', 'install_count',
+                'crashes_after_install', 'uptime_hours'):
+        fleet['totals'][key] = round(sum(s[key] for s in hosts), 2)
+
+    # 每台主机累计在线时长的分布 (按 500 小时分桶)
+    histogram = {}
+    for s in hosts:
+        for i in range(24):
+            fleet['hour_dist'][i] += s['hour_dist'][i]
+            fleet['hour_uptime'][i] += s['hour_uptime'][i]
+        for i in range(7):
+            fleet['weekday_dist'][i] += s['weekday_dist'][i]
+        bucket = int(s['uptime_hours'] // 500) * 500
+        histogram[bucket] = histogram.get(bucket, 0) + 1
+    fleet['hour_uptime'] = [round(h, 1) for h in fleet['hour_uptime']]
+    fleet['concurrency'] = merge_bitmaps(hosts)
+    fleet['badges'] = merge_badges(hosts)
+    fleet['uptime_histogram'] = {f"{k}-{k + 500}h": histogram[k] for k in sorted(histogram)}
+
+    def top(key, value):
+        ranked = sorted(hosts, key=lambda s: (-value(s), s['host']))[:top_n]
+        return [{'host': s['host'], key: value(s)} for s in ranked]
+
+    fleet['rankings'] = {
+        'most_crashes': top('crashes', lambda s: s['crash'] + s['bsod']),
+        'longest_uptime': top('longest_session_hours', lambda s: s['longest_session_hours']),
+        'most_uptime': top('uptime_hours', lambda s: s['uptime_hours']),
+        'most_installs': top('install_count', lambda s: s['install_count']),
+    }
+    fleet['hosts'] = hosts
+    return fleet
+
+def merge_badges(hosts):
+    """
+    所有主机的徽章一次性求值 (每条规则对整列指标比较一次)：
+    每台主机解锁了哪些徽章、每个徽章全网有多少比例的主机解锁。指标本身不写进汇总 JSON。
+    """
+    rules = default_rules('system')
+    rows = [s.pop('badge_metrics') for s in hosts]
+    matrix = rules.unlock_matrix(rows)
+    for k, s in enumerate(hosts):
+        s['badges'] = [badge_id for badge_id in rules.ids if matrix[badge_id][k]]
+    return rules.unlock_rates(rows)
+
+def merge_bitmaps(hosts):
+    """
+    各主机的分钟位图按年份逐分钟相加 / 按位或：
+    峰值时有几台机器同时在线、全网至少一台在线的总时长。位图不写进汇总 JSON。
+    """
+    by_year = {}
+    for s in hosts:
+        for year, bits in s.pop('activity_bitmaps', {}).items():
+            by_year.setdefault(year, []).append(ActivityBitmap(year, bits))
+
+    concurrency = {}
+    for year in sorted(by_year):
+        bitmaps = by_year[year]
+        counts = sum_bitmaps(bitmaps)
+        peak_minute = int(counts.argmax()) if hasattr(counts, 'argmax') else counts.index(max(counts))
+        peak = int(counts[peak_minute])
+        union = bitmaps[0]
+        for b in bitmaps[1:]:
+            union = union | b
+        concurrency[str(year)] = {
+            'peak_hosts': peak,
+            'peak_at': (union.origin + datetime.timedelta(minutes=peak_minute)).isoformat(timespec='minutes') if peak else None,
+            'any_active_hours': round(union.active_minutes() / 60, 1),
+        }
+    return concurrency
+
+def print_fleet(fleet):
+    print(f"\n🖥️  共分析 {fleet['host_count']} 台主机，失败 {fleet['failed_count']} 台")
+    titles = {
+        'most_crashes': '💀 崩溃最多',
+        'longest_uptime': '🤖 单次运行最长 (小时)',
+        'most_uptime': '💻 累计在线最长 (小时)',
+        'most_installs': '🛠️ 安装最多',
+    }
+    for key, title in titles.items():
+        print(f"\n{title}")
+        for rank, row in enumerate(fleet['rankings'][key], 1):
+            value = [v for k, v in row.items() if k != 'host'][0]
+            print(f"   {rank:>2}. {row['host']:<30} {value}")
+    if fleet['host_count']:
+        print("\n🏆 徽章解锁率")
+        for badge in sorted(fleet['badges'].values(), key=lambda b: -b['share']):
+            print(f"   {badge['icon']} {badge['title']:<8} {badge['share'] * 100:5.1f}%  ({badge['count']} 台)")
+    for s in fleet['failed']:
+        print(f"⚠️ {s['host']}: {s['error']}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fleet 模式：并行汇总多台主机导出的系统日志")
+    parser.add_argument('folder', help="包含每台主机导出文件 (.evtx/.json/.ndjson) 的目录")
+    parser.add_argument('-o', '--output', default=FLEET_JSON, help="汇总 JSON 输出路径")
+    parser.add_argument('-j', '--workers', type=int, default=None, help="进程数 (默认等于 CPU 核数)")
+    parser.add_argument('--top', type=int, default=TOP_N, help="排行榜长度")
+    parser.add_argument('--timeout', type=float, default=HOST_TIMEOUT, help="单台主机的分析超时 (秒)")
+    args = parser.parse_args(argv)
+
+    paths = find_exports(args.folder)
+    if not paths:
+        print("❌ 目录中没有找到任何主机导出文件。")
+        return 1
+
+    print(f"🕵️‍♂️ 正在并行分析 {len(paths)} 台主机的数字足迹...")
+    fleet = merge_fleet(run_fleet(paths, args.workers, args.timeout), args.top)
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(fleet, f, ensure_ascii=False, indent=2)
+
+    print_fleet(fleet)
+    print(f"\n🎉 汇总已生成！文件路径: {os.path.abspath(args.output)}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,78 @@
+import os
+import re
+import sys
+import json
+
+# ================= 配置区 =================
+CROP_TABLE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "crop_factors.json")
+UNKNOWN_LENS = "Unknown Lens"
+# ========================================
+
+def exif_text(value):
+    """
+    EXIF 字符串字段 -> 去掉 \\x00 与首尾空白、驻留 (sys.intern) 后的 str，空值返回 None。
+    同一型号的相机 / 镜头名在上百万条记录里只保存一份。
+    """
+    if value is None:
+        return None
+    if isinstance(value, bytes):
+        value = value.decode('utf-8', errors='ignore')
+    text = str(value).replace('\x00', '').strip()
+    return sys.intern(text) if text else None
+
+def lens_name(make, model):
+    """LensMake + LensModel -> 展示用的镜头名 (型号里已经带厂商名时不重复)"""
+    if not model:
+        return UNKNOWN_LENS
+    if make and not model.lower().startswith(make.lower()):
+        return sys.intern(f"{make} {model}")
+    return model
+
+class CropTable:
+    """
+    机身裁切系数表 (crop_factors.json)：按 Make 前缀 + Model 正则逐条匹配，
+    结果按 (Make, Model) 缓存，同一台机身的照片只匹配一次。
+    """
+
+    def __init__(self, bodies):
+        self.rules = [(b['make'].lower(), re.compile(b['model'], re.IGNORECASE), float(b['crop'])) for b in bodies]
+        self.cache = {}
+
+    @classmethod
+    def load(cls, path=CROP_TABLE_PATH):
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f)['bodies'])
+
+    def crop_factor(self, make, model):
+        """没有匹配的规则时返回 None"""
+        key = (make, model)
+        if key not in self.cache:
+            factor = None
+            make_l = (make or '').lower()
+            for rule_make, pattern, crop in self.rules:
+                if make_l.startswith(rule_make) and pattern.search(model or ''):
+                    factor = crop
+                    break
+            self.cache[key] = factor
+        return self.cache[key]
+
+    def equivalent(self, focal, focal35, make, model):
+        """
+        35mm 等效焦距 (整数 mm)：优先用 EXIF 的 FocalLengthIn35mmFilm，
+        否则 实际焦距 × 裁切系数；机身不在表里时按全画幅处理，焦距未知时返回 None。
+        """
+        if focal35:
+            return int(focal35)
+        if not focal:
+            return None
+        crop = self.crop_factor(make, model)
+        return int(round(focal * crop)) if crop else int(round(focal))
+
+_table = None
+
+def crop_table():
+    """进程内共享的裁切系数表，首次使用时加载"""
+    global _table
+    if _table is None:
+        _table = CropTable.load()
+    return _table
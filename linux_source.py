@@ -0,0 +1,205 @@
+import os
+import sys
+import mmap
+import json
+import struct
+import argparse
+import datetime
+
+# ================= 配置区 =================
+WTMP_PATH = "/var/log/wtmp"
+# ========================================
+
+# Linux 事件统一映射成 analyze_hybrid 认识的 Windows 事件 Id，
+# 这样会话重建、成就、图表都不需要区分数据来源。
+BOOT_ID = 6005
+SHUTDOWN_ID = 6006
+CRASH_ID = 41
+SLEEP_ID = 42
+WAKE_ID = 1
+
+# glibc 的 struct utmp (x86_64 / aarch64 均为 384 字节，时间字段是 32 位)：
+#   short ut_type; pid_t ut_pid; char ut_line[32]; char ut_id[4]; char ut_user[32];
+#   char ut_host[256]; struct exit_status; int32 ut_session; int32 tv_sec, tv_usec;
+#   int32 ut_addr_v6[4]; char __unused[20];
+# 只解出需要的 4 个字段，其余全部用 pad 跳过，避免为每条记录创建无用的 bytes 对象
+UTMP_RECORD = struct.Struct('<h2x4x32x4x32s256x4x4xii16x20x')
+assert UTMP_RECORD.size == 384
+
+RUN_LVL = 1
+BOOT_TIME = 2
+USER_PROCESS = 7
+DEAD_PROCESS = 8
+
+# systemd 的 MESSAGE_ID (sd-messages.h)，比匹配日志文本更可靠
+SD_MESSAGE_SHUTDOWN = '98268866d1d54a499c4e98921d93bc40'
+SD_MESSAGE_SLEEP_START = '6bbd95ee977941e497c48be27c254128'
+SD_MESSAGE_SLEEP_STOP = '8811e6df2a8e40f58a94cea26f8ebf14'
+
+# 没有 MESSAGE_ID 的内核/旧版 systemd 日志，退回文本匹配
+SHUTDOWN_TEXT = ('System is powering down', 'System is rebooting', 'System is halting')
+SLEEP_TEXT = ('PM: suspend entry', 'PM: hibernation entry', 'Entering sleep state')
+WAKE_TEXT = ('PM: suspend exit', 'PM: hibernation exit', 'System returned from sleep state')
+
+def make_event(eid, ms, etype='Sys'):
+    return {'Id': eid, 'TimeCreated': f"/Date({int(ms)})/", 'Type': etype}
+
+def iter_utmp_records(path):
+    """
+    mmap 整个 wtmp 文件，用 iter_unpack 批量解码 (type, user, sec, usec)。
+    文件尾部不足一条记录的残片会被忽略。
+    """
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size < UTMP_RECORD.size:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            usable = len(mm) - len(mm) % UTMP_RECORD.size
+            view = memoryview(mm)[:usable]
+            records = UTMP_RECORD.iter_unpack(view)
+            try:
+                yield from records
+            finally:
+                # 迭代器持有 view 的缓冲区，必须先释放它，mmap 才能正常关闭
+                del records
+                view.release()
+
+def events_from_wtmp(path):
+    """
+    把 wtmp 记录转换成归一化事件：
+    - BOOT_TIME                     -> 开机 (若上一次开机后没有关机记录，额外记一次崩溃)
+    - RUN_LVL 且 ut_user=shutdown   -> 关机
+    - 登录/注销                      -> 心跳，帮助估计崩溃前的最后活跃时间
+    wtmp 本身不记录睡眠/唤醒，需要配合 journald 导出。
+    """
+    events = []
+    booted = False
+    for ut_type, user, sec, usec in iter_utmp_records(path):
+        ms = sec * 1000 + usec // 1000
+        if ut_type == BOOT_TIME:
+            events.append(make_event(BOOT_ID, ms))
+            if booted:
+                # 41 紧跟在开机之后，与 Windows 的写入顺序一致
+                events.append(make_event(CRASH_ID, ms + 1))
+            booted = True
+        elif ut_type == RUN_LVL and user.startswith(b'shutdown'):
+            events.append(make_event(SHUTDOWN_ID, ms))
+            booted = False
+        elif ut_type in (USER_PROCESS, DEAD_PROCESS):
+            events.append(make_event(0, ms, 'Beat'))
+    return events
+
+def classify_journal_entry(entry):
+    """单条 journalctl -o json 记录 -> 事件 Id (无关记录返回 None)"""
+    message_id = entry.get('MESSAGE_ID')
+    if message_id == SD_MESSAGE_SHUTDOWN:
+        return SHUTDOWN_ID
+    if message_id == SD_MESSAGE_SLEEP_START:
+        return SLEEP_ID
+    if message_id == SD_MESSAGE_SLEEP_STOP:
+        return WAKE_ID
+    message = entry.get('MESSAGE')
+    if not isinstance(message, str):
+        return None
+    if message.startswith(SHUTDOWN_TEXT):
+        return SHUTDOWN_ID
+    if SLEEP_TEXT[0] in message or SLEEP_TEXT[1] in message or message.startswith(SLEEP_TEXT[2]):
+        return SLEEP_ID
+    if WAKE_TEXT[0] in message or WAKE_TEXT[1] in message or message.startswith(WAKE_TEXT[2]):
+        return WAKE_ID
+    return None
+
+def events_from_journal(entries):
+    """
+    把 journalctl -o json 的记录转换成归一化事件：
+    - 出现新的 _BOOT_ID               -> 开机 (取该次启动的第一条日志时间)
+    - 上一次启动没有关机消息就换了 _BOOT_ID -> 崩溃，且上一次启动的最后一条日志作为心跳
+    - systemd 睡眠/唤醒消息             -> 睡眠 / 唤醒
+    """
+    events = []
+    boot_id = None
+    last_ms = None
+    shutdown_seen = True
+    for entry in entries:
+        try:
+            ms = int(entry['__REALTIME_TIMESTAMP']) // 1000
+        except (KeyError, TypeError, ValueError):
+            continue
+        current = entry.get('_BOOT_ID')
+        if current and current != boot_id:
+            if boot_id is not None and not shutdown_seen and last_ms is not None:
+                events.append(make_event(0, last_ms, 'Beat'))
+            events.append(make_event(BOOT_ID, ms))
+            if boot_id is not None and not shutdown_seen:
+                events.append(make_event(CRASH_ID, ms + 1))
+            boot_id = current
+            shutdown_seen = False
+
+        eid = classify_journal_entry(entry)
+        if eid is not None:
+            events.append(make_event(eid, ms))
+            if eid == SHUTDOWN_ID:
+                shutdown_seen = True
+        last_ms = ms
+
+    if not shutdown_seen and last_ms is not None:
+        events.append(make_event(0, last_ms, 'Beat'))
+    return events
+
+def iter_journal_file(path):
+    """逐行读取 journalctl -o json 导出 (NDJSON)，坏行直接跳过"""
+    with open(path, 'rb') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError:
+                continue
+
+def event_ms(e):
+    return int(e['TimeCreated'][6:-2])
+
+def get_linux_data(year=None, wtmp_path=WTMP_PATH, journal_path=None):
+    """
+    Linux 版的 get_hybrid_data：合并 wtmp 与 journald 两个来源，按时间排序。
+    两个来源都记录了开机时，以 journald 为准 (它还带睡眠/唤醒与关机信息)。
+    """
+    events = []
+    if journal_path:
+        events.extend(events_from_journal(iter_journal_file(journal_path)))
+    if wtmp_path and os.path.exists(wtmp_path):
+        wtmp_events = events_from_wtmp(wtmp_path)
+        if journal_path:
+            wtmp_events = [e for e in wtmp_events if e['Type'] == 'Beat']
+        events.extend(wtmp_events)
+    events.sort(key=event_ms)
+
+    if year is not None:
+        t1 = datetime.datetime(year, 1, 1).timestamp() * 1000
+        t2 = datetime.datetime(year + 1, 1, 1).timestamp() * 1000
+        events = [e for e in events if t1 <= event_ms(e) < t2]
+    return events
+
+def main(argv=None):
+    from digital_life import analyze_hybrid, generate_html
+
+    parser = argparse.ArgumentParser(description="Linux 版 System Report：读取 wtmp / journalctl 导出")
+    parser.add_argument('--wtmp', default=WTMP_PATH, help="wtmp 文件路径")
+    parser.add_argument('--journal', default=None, help="journalctl -o json 的导出文件")
+    parser.add_argument('--year', type=int, default=datetime.datetime.now().year)
+    parser.add_argument('-o', '--output', default=None, help="HTML 输出路径")
+    parser.add_argument('--offline', action='store_true', help="内联 ECharts，生成可以断网打开的报告")
+    args = parser.parse_args(argv)
+
+    events = get_linux_data(args.year, args.wtmp, args.journal)
+    if not events:
+        print("\n❌ 未能获取数据。")
+        print("💡 小贴士：请确认 wtmp 可读，或使用 journalctl -o json > export.json 导出日志。")
+        return 1
+    output = args.output or f"my_digital_life_{args.year}.html"
+    generate_html(analyze_hybrid(events), args.year, output=output, offline=args.offline)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,233 @@
+import math
+
+from chart_shaping import shutter_seconds, shutter_bucket, focal_bucket, FOCAL_FINE_PER_OCTAVE, EXACT_FOCAL_LIMIT
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# ================= 配置区 =================
+# 交叉表最多展示多少台相机 (其余相机不进热力图)
+TOP_CAMERAS = 8
+# 夜间时段 (拍摄时段切片用)
+NIGHT_HOURS = (22, 23, 0, 1, 2, 3, 4)
+# ========================================
+
+BITS = 10                 # 每个维度占 10 位，6 个维度拼起来不超过 int64
+MASK = (1 << BITS) - 1
+OTHER = '其他'            # 某个维度的取值超过 1022 种时，之后的新取值都记到这里
+
+def iso_bin(iso):
+    """ISO 按档位分桶：100 / 200 / 400 ... 12800，0 (无 EXIF) 记为 None"""
+    if not iso:
+        return None
+    if iso < 200:
+        return 100
+    return min(100 * 2 ** int(math.log2(iso / 100)), 12800)
+
+def aperture_number(label):
+    return float(label.replace('f/', ''))
+
+# 维度名 -> (从 get_exif_data 结果取值的函数, 排序键)；取值为 None 时该维度记为"未知"
+DIMENSIONS = {
+    'camera': (lambda p: p['Camera'], None),
+    'focal': (lambda p: p['FocalLength'], None),
+    'aperture': (lambda p: None if p['Aperture'] == 'Unknown' else p['Aperture'], aperture_number),
+    # 快门入库前就归并到整档 (相机写的 1/320s、1/3200s 之类不会让类目无限增长)
+    'shutter': (lambda p: None if p['ShutterSpeed'] == 'Unknown' else shutter_bucket(p['ShutterSpeed']), shutter_seconds),
+    'iso': (lambda p: iso_bin(p['ISO']), None),
+    'hour': (lambda p: p['Hour'], None),
+}
+
+class Dimension:
+    """字典编码：取值 -> 连续的小整数，code 0 固定留给"未知" (None)"""
+
+    def __init__(self, name, sort_key=None):
+        self.name = name
+        self.sort_key = sort_key
+        self.values = [None]
+        self.codes = {None: 0}
+
+    def code(self, value):
+        c = self.codes.get(value)
+        if c is None:
+            if len(self.values) >= MASK:
+                value = OTHER
+                c = self.codes.get(OTHER)
+                if c is not None:
+                    return c
+            c = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return c
+
+    def ordered(self, values, mapping=None):
+        """
+        按取值本身排序 (快门按秒数、光圈按 f 值)，未知放最后。
+        values 是经过 mapping 归并后的取值时，按归并进来的原始取值中最小的那个排序。
+        """
+        key = self.sort_key or (lambda v: v)
+        if mapping is not None:
+            rank = {}
+            for raw in self.values[1:]:
+                if raw is OTHER:
+                    continue
+                label = mapping(raw)
+                if label not in rank or key(raw) < rank[label]:
+                    rank[label] = key(raw)
+            key = rank.__getitem__
+        known = sorted((v for v in values if v is not None and v is not OTHER), key=key)
+        return known + [v for v in (OTHER, None) if v in values]
+
+class PhotoCube:
+    """
+    稀疏聚合立方体：相机 × 焦段 × 光圈 × 快门 × ISO 档 × 时段。
+    每张照片的各维度取值先字典编码，再按 10 位一段拼成一个整数作为格子的键，
+    cells 只保存出现过的组合 {键: 张数}，内存与不同组合数成正比，与照片数无关。
+    任意维度的分组 / 切片都只遍历这些格子；有 NumPy 时对格子数组做移位、掩码与 bincount。
+    """
+
+    def __init__(self, dims=tuple(DIMENSIONS)):
+        self.dims = list(dims)
+        self.dimensions = {name: Dimension(name, DIMENSIONS[name][1]) for name in self.dims}
+        self.shifts = {name: i * BITS for i, name in enumerate(self.dims)}
+        self._extract = [(DIMENSIONS[name][0], self.dimensions[name], i * BITS) for i, name in enumerate(self.dims)]
+        self.cells = {}
+        self.total = 0
+        self._arrays = None   # (键数组, 张数数组)，查询时按需生成，add 之后作废
+
+    def add(self, photo, n=1):
+        key = 0
+        for extract, dimension, shift in self._extract:
+            key |= dimension.code(extract(photo)) << shift
+        self.cells[key] = self.cells.get(key, 0) + n
+        self.total += n
+        self._arrays = None
+
+    def arrays(self):
+        if self._arrays is None:
+            self._arrays = (np.fromiter(self.cells.keys(), dtype=np.int64, count=len(self.cells)),
+                            np.fromiter(self.cells.values(), dtype=np.int64, count=len(self.cells)))
+        return self._arrays
+
+    def _filters(self, where):
+        """where: {维度: 取值 / 取值集合 / 判断函数} -> [(位移, 允许的 code 集合)]"""
+        filters = []
+        for name, cond in (where or {}).items():
+            dimension = self.dimensions[name]
+            if callable(cond):
+                allowed = {c for c, v in enumerate(dimension.values) if cond(v)}
+            elif isinstance(cond, (set, frozenset, list, tuple)):
+                allowed = {dimension.codes[v] for v in cond if v in dimension.codes}
+            else:
+                allowed = {dimension.codes[cond]} if cond in dimension.codes else set()
+            filters.append((self.shifts[name], allowed))
+        return filters
+
+    def _group_codes(self, shifts, filters):
+        if np is not None and self.cells:
+            keys, counts = self.arrays()
+            keep = np.ones(len(keys), dtype=bool)
+            for s, allowed in filters:
+                keep &= np.isin((keys >> s) & MASK, np.fromiter(allowed, dtype=np.int64, count=len(allowed)))
+            keys, counts = keys[keep], counts[keep]
+            # 选中的维度重新拼成一个紧凑的键，再用 unique + bincount 汇总
+            packed = np.zeros(len(keys), dtype=np.int64)
+            for i, s in enumerate(shifts):
+                packed |= ((keys >> s) & MASK) << (i * BITS)
+            uniq, inverse = np.unique(packed, return_inverse=True)
+            sums = np.bincount(inverse.ravel(), weights=counts, minlength=len(uniq))
+            return {tuple((int(k) >> (i * BITS)) & MASK for i in range(len(shifts))): int(n) for k, n in zip(uniq, sums)}
+
+        grouped = {}
+        for key, n in self.cells.items():
+            if any((key >> s) & MASK not in allowed for s, allowed in filters):
+                continue
+            k = tuple((key >> s) & MASK for s in shifts)
+            grouped[k] = grouped.get(k, 0) + n
+        return grouped
+
+    def group_by(self, *dims, where=None, maps=None):
+        """
+        按若干维度汇总 (可先切片)：{(取值, ...): 张数}。
+        maps: {维度: 函数} 先把取值归并 (例如焦距 -> 对数桶) 再汇总，控制结果的类目数。
+        """
+        grouped = self._group_codes([self.shifts[d] for d in dims], self._filters(where))
+        decoders = []
+        for d in dims:
+            values = self.dimensions[d].values
+            fn = (maps or {}).get(d)
+            decoders.append([None] + [v if v is OTHER else fn(v) for v in values[1:]] if fn else values)
+        result = {}
+        for k, n in grouped.items():
+            key = tuple(values[c] for values, c in zip(decoders, k))
+            result[key] = result.get(key, 0) + n
+        return result
+
+    def marginal(self, dim, where=None, maps=None):
+        return {k[0]: n for k, n in self.group_by(dim, where=where, maps=maps).items()}
+
+    def crosstab(self, row_dim, col_dim, where=None, rows=None, cols=None, skip_unknown=True, maps=None):
+        """
+        两个维度的交叉表，直接给 ECharts 热力图使用：
+        {'rows': 行标签, 'cols': 列标签, 'cells': [[列下标, 行下标, 张数], ...]}
+        rows / cols 指定要展示的取值及顺序，默认按取值排序。
+        """
+        maps = maps or {}
+        table = self.group_by(row_dim, col_dim, where=where, maps=maps)
+        if rows is None:
+            rows = self.dimensions[row_dim].ordered({r for r, _ in table}, maps.get(row_dim))
+        if cols is None:
+            cols = self.dimensions[col_dim].ordered({c for _, c in table}, maps.get(col_dim))
+        if skip_unknown:
+            rows = [r for r in rows if r is not None]
+            cols = [c for c in cols if c is not None]
+        row_index = {r: i for i, r in enumerate(rows)}
+        col_index = {c: i for i, c in enumerate(cols)}
+        cells = [[col_index[c], row_index[r], n] for (r, c), n in table.items() if r in row_index and c in col_index]
+        cells.sort()
+        return {'rows': rows, 'cols': cols, 'cells': cells}
+
+    def top(self, dim, n, where=None):
+        counts = self.marginal(dim, where)
+        return [v for v, _ in sorted(counts.items(), key=lambda x: (-x[1], str(x[0]))) if v is not None][:n]
+
+def crosstab_payloads(cube, primary_camera=None):
+    """
+    Lens Report 的交叉图表数据。焦段与焦段图的精细视图同口径 (种类多时按对数分桶)，
+    快门归并到整档，类目数有上限，不随照片库的多样性增长。
+    """
+    if len(cube.dimensions['focal'].values) - 1 <= EXACT_FOCAL_LIMIT:
+        focal_map = lambda f: None if f is None else f"{f}mm"
+    else:
+        focal_map = focal_bucket(FOCAL_FINE_PER_OCTAVE)
+    maps = {'focal': focal_map}
+
+    cameras = cube.top('camera', TOP_CAMERAS)
+    camera_focal = cube.crosstab('camera', 'focal', rows=cameras[::-1], maps=maps)
+
+    # 主力机身：各时段用什么焦段 (夜间单独汇总)
+    primary = primary_camera if primary_camera in cube.dimensions['camera'].codes else (cameras[0] if cameras else None)
+    hour_focal = cube.crosstab('focal', 'hour', where={'camera': primary}, cols=list(range(24)), maps=maps)
+    night = cube.marginal('focal', where={'camera': primary, 'hour': set(NIGHT_HOURS)}, maps=maps)
+
+    # 曝光三角：快门 × 光圈 的气泡，按 ISO 档分系列
+    triangle = cube.group_by('shutter', 'aperture', 'iso', maps=maps)
+    shutters = cube.dimensions['shutter'].ordered({s for s, _, _ in triangle if s is not None})
+    apertures = cube.dimensions['aperture'].ordered({a for _, a, _ in triangle if a is not None})
+    s_index = {s: i for i, s in enumerate(shutters)}
+    a_index = {a: i for i, a in enumerate(apertures)}
+    series = {}
+    for (s, a, iso), n in triangle.items():
+        if s in s_index and a in a_index and iso is not None:
+            series.setdefault(iso, []).append([s_index[s], a_index[a], n])
+    return {
+        'camera_focal': camera_focal,
+        'hour_focal': {**hour_focal, 'camera': primary},
+        'night_focal': sorted(([f, n] for f, n in night.items() if f is not None), key=lambda x: -x[1])[:5],
+        'exposure': {
+            'shutters': shutters,
+            'apertures': apertures,
+            'series': [{'name': f"ISO {iso}", 'data': sorted(series[iso])} for iso in sorted(series)],
+        },
+    }
@@ -0,0 +1,200 @@
+import os
+import html
+import heapq
+import pathlib
+
+from lens_info import UNKNOWN_LENS
+
+# ================= 配置区 =================
+# 每项纪录保留前几名
+TOP_K = 5
+# "每台机身的第一张 / 最后一张" 最多列出几台 (按第一张的时间排序)
+MAX_BODIES = 12
+# ========================================
+
+def photo_ident(p):
+    """去重用的身份：有路径用路径，没有 (旧的列式导出) 时用 相机@时间"""
+    return p.get('Path') or f"{p['Camera']}@{p['DateObject'].isoformat()}"
+
+def photo_record(p):
+    """纪录里只保留展示要用的字段"""
+    return {
+        'path': p.get('Path'),
+        'taken': p['DateObject'],
+        'camera': p['Camera'],
+        'focal': p['FocalLength'],
+        'focal35': p.get('Focal35', p['FocalLength']),   # None 表示没有焦距信息
+        'lens': p.get('Lens'),
+        'aperture': p['Aperture'],
+        'shutter': p['ShutterSpeed'],
+        'iso': p['ISO'],
+    }
+
+class TopK:
+    """
+    保留 key 最大的 k 条记录：大小为 k 的最小堆，堆顶是当前的门槛，
+    新照片不超过门槛时只做一次比较。key 相同时按身份字符串排序，合并顺序不影响结果。
+    """
+
+    def __init__(self, k=TOP_K):
+        self.k = k
+        self.heap = []          # [(key, 身份, 记录)]
+        self.idents = set()
+
+    def push(self, key, ident, record_fn, photo):
+        """record_fn(photo) 只在这张照片进榜时才调用"""
+        if ident in self.idents:
+            return
+        if len(self.heap) < self.k:
+            heapq.heappush(self.heap, (key, ident, record_fn(photo)))
+        elif (key, ident) > self.heap[0][:2]:
+            _, dropped, _ = heapq.heapreplace(self.heap, (key, ident, record_fn(photo)))
+            self.idents.discard(dropped)
+        else:
+            return
+        self.idents.add(ident)
+
+    def merge(self, other):
+        for key, ident, record in other.heap:
+            self.push(key, ident, lambda _: record, None)
+
+    def items(self):
+        """从大到小 [(key, 记录)]"""
+        return [(key, record) for key, _, record in sorted(self.heap, key=lambda x: x[:2], reverse=True)]
+
+class Extremes:
+    """每个键一对 最早 / 最晚 槽位：{键: [(时间, 身份, 记录), (时间, 身份, 记录)]}"""
+
+    def __init__(self):
+        self.slots = {}
+
+    def update(self, key, when, ident, record_fn, photo):
+        slot = self.slots.get(key)
+        if slot is None:
+            entry = (when, ident, record_fn(photo))
+            self.slots[key] = [entry, entry]
+            return
+        if (when, ident) < slot[0][:2]:
+            slot[0] = (when, ident, record_fn(photo))
+        if (when, ident) > slot[1][:2]:
+            slot[1] = (when, ident, record_fn(photo))
+
+    def merge(self, other):
+        for key, (first, last) in other.slots.items():
+            slot = self.slots.get(key)
+            if slot is None:
+                self.slots[key] = [first, last]
+                continue
+            if first[:2] < slot[0][:2]:
+                slot[0] = first
+            if last[:2] > slot[1][:2]:
+                slot[1] = last
+
+class RecordBook:
+    """
+    Lens Report 的纪录卡片：在 analyze_data 的同一遍循环里逐张 add，
+    每项纪录只占 O(k) 或 O(键数) 的内存，不需要对照片列表排序。
+    并行的 worker、分几次扫描的结果可以 merge (同一张照片按路径去重，计数按天相加)。
+    """
+
+    def __init__(self, k=TOP_K):
+        self.k = k
+        self.exposure = TopK(k)         # 最长曝光 (秒)
+        self.iso = TopK(k)              # 最高 ISO
+        self.long_fast = TopK(k)        # 最长焦距 (35mm 等效) 下的最大光圈：key = (焦距, -f 值)
+        self.bodies = Extremes()        # 每台机身的第一张 / 最后一张
+        self.day_counts = {}            # 日期 -> 张数
+        self.day_frames = Extremes()    # 每天的第一张 / 最后一张
+
+    def add(self, p):
+        ident = photo_ident(p)
+        taken = p['DateObject']
+        shutter = p.get('ShutterVal')
+        if shutter:
+            self.exposure.push(shutter, ident, photo_record, p)
+        if p['ISO']:
+            self.iso.push(p['ISO'], ident, photo_record, p)
+        f_number = p.get('ApertureVal')
+        focal35 = p.get('Focal35', p['FocalLength'])
+        if f_number and focal35:
+            self.long_fast.push((focal35, -f_number), ident, photo_record, p)
+        self.bodies.update(p['Camera'], taken, ident, photo_record, p)
+        day = taken.date()
+        self.day_counts[day] = self.day_counts.get(day, 0) + 1
+        self.day_frames.update(day, taken, ident, photo_record, p)
+
+    def merge(self, other):
+        """
+        合并另一份纪录 (返回自身)。照片集合不重叠时结果与一次性统计完全相同；
+        同一张照片出现在两份里时，榜单按路径去重，但按天计数会重复计算。
+        """
+        self.exposure.merge(other.exposure)
+        self.iso.merge(other.iso)
+        self.long_fast.merge(other.long_fast)
+        self.bodies.merge(other.bodies)
+        for day, n in other.day_counts.items():
+            self.day_counts[day] = self.day_counts.get(day, 0) + n
+        self.day_frames.merge(other.day_frames)
+        return self
+
+    def busiest_days(self):
+        """[(日期, 张数, 第一张, 最后一张)]，张数相同时较早的日期在前"""
+        top = heapq.nsmallest(self.k, self.day_counts.items(), key=lambda x: (-x[1], x[0]))
+        return [(day, n, self.day_frames.slots[day][0][2], self.day_frames.slots[day][1][2]) for day, n in top]
+
+    def first_last_by_body(self):
+        """[(机身, 第一张, 最后一张)]，按第一张的时间排序"""
+        rows = sorted(self.bodies.slots.items(), key=lambda x: x[1][0][:2])
+        return [(camera, first[2], last[2]) for camera, (first, last) in rows]
+
+def merge_books(books):
+    """多份 RecordBook 合并成一份 (不修改传入的对象)"""
+    merged = RecordBook(max((b.k for b in books), default=TOP_K))
+    for book in books:
+        merged.merge(book)
+    return merged
+
+# ---------- 报告卡片 ----------
+def photo_link(record, text=None):
+    """文件名链接到原图 (file://)，鼠标悬停显示完整路径；没有路径时只显示文字"""
+    path = record['path']
+    text = html.escape(text or (os.path.basename(path) if path else record['taken'].strftime('%Y-%m-%d %H:%M')))
+    if not path:
+        return text
+    uri = pathlib.Path(os.path.abspath(path)).as_uri()
+    return f'<a href="{html.escape(uri)}" title="{html.escape(path)}">{text}</a>'
+
+def record_line(value, record):
+    meta = f"{record['camera']} · {record['taken']:%Y-%m-%d %H:%M}"
+    if record['lens'] and record['lens'] != UNKNOWN_LENS:
+        meta = f"{record['camera']} + {record['lens']} · {record['taken']:%Y-%m-%d %H:%M}"
+    return (f'<li><b>{html.escape(value)}</b> {photo_link(record)} '
+            f'<span class="record-meta">{html.escape(meta)}</span></li>')
+
+def span_links(first, last, fmt):
+    """第一张 → 最后一张，链接文字是按 fmt 格式化的拍摄时间"""
+    return f"{photo_link(first, first['taken'].strftime(fmt))} → {photo_link(last, last['taken'].strftime(fmt))}"
+
+def records_html(book):
+    """纪录卡片的 HTML (camera.render_html 直接嵌入)"""
+    exposure = ''.join(record_line(r['shutter'], r) for _, r in book.exposure.items())
+    iso = ''.join(record_line(f"ISO {r['iso']}", r) for _, r in book.iso.items())
+    long_fast = ''.join(record_line(f"{r['focal35']}mm {r['aperture']}", r) for _, r in book.long_fast.items())
+    days = ''.join(
+        f'<li><b>{day:%Y-%m-%d}</b> {n} 张 <span class="record-meta">{span_links(first, last, "%H:%M")}</span></li>'
+        for day, n, first, last in book.busiest_days())
+    bodies = book.first_last_by_body()
+    body_rows = ''.join(
+        f'<li><b>{html.escape(camera)}</b> {span_links(first, last, "%Y-%m-%d")}</li>'
+        for camera, first, last in bodies[:MAX_BODIES])
+    if len(bodies) > MAX_BODIES:
+        body_rows += f'<li class="record-meta">还有 {len(bodies) - MAX_BODIES} 台机身</li>'
+    empty = '<li class="record-meta">没有数据</li>'
+    sections = [
+        ('⏳ 最长曝光', exposure),
+        ('🌃 最高 ISO', iso),
+        ('🔭 最长焦距 (等效) 下的最大光圈', long_fast),
+        ('📅 最忙的一天', days),
+        ('📷 每台机身的第一张 / 最后一张', body_rows),
+    ]
+    return ''.join(f'<div class="record-box"><h3>{title}</h3><ol>{items or empty}</ol></div>' for title, items in sections)
@@ -0,0 +1,62 @@
+"""
+PowerShell 替身解释器：实现与 collector.py 相同的帧协议，用于在 Linux 上测试常驻采集器。
+
+用法: python ps_standin.py [events.json]
+
+- 收到包含 Get-WinEvent 的脚本时，按脚本里的 Get-Date -Date "..." 起止时间
+  过滤 events.json 中的事件并以 JSON 返回 (与 ConvertTo-Json 的输出结构相同)
+- 脚本中的 "#standin:sleep N" 会让替身卡住 N 秒 (测试超时)
+- 脚本中的 "#standin:exit" 会让替身直接退出 (测试崩溃重启)
+- 其它脚本原样回显
+"""
+import re
+import sys
+import json
+import time
+import base64
+import datetime
+
+FRAME_PREFIX = '@@FRAME '
+
+
+def event_time(e):
+    t_str = e.get('TimeCreated', '')
+    if '/Date(' in t_str:
+        return datetime.datetime.fromtimestamp(int(t_str[6:-2]) / 1000)
+    dt = datetime.datetime.fromisoformat(t_str.replace('Z', '+00:00'))
+    return dt.astimezone().replace(tzinfo=None) if dt.tzinfo else dt
+
+
+def answer(script, events):
+    m = re.search(r'#standin:sleep\s+([\d.]+)', script)
+    if m:
+        time.sleep(float(m.group(1)))
+    if '#standin:exit' in script:
+        sys.exit(3)
+    if 'Get-WinEvent' not in script:
+        return script
+
+    dates = re.findall(r'Get-Date -Date "([^"]+)"', script)
+    start = datetime.datetime.fromisoformat(dates[0]) if dates else datetime.datetime.min
+    end = datetime.datetime.fromisoformat(dates[1]) if len(dates) > 1 else datetime.datetime.max
+    picked = [e for e in events if start <= event_time(e) <= end]
+    return json.dumps(picked, ensure_ascii=False)
+
+
+def main():
+    events = []
+    if len(sys.argv) > 1:
+        with open(sys.argv[1], encoding='utf-8') as f:
+            events = json.load(f)
+
+    for line in sys.stdin:
+        # 空脚本编码后是空行，PowerShell 那边同样回一帧空输出，这里不能跳过
+        line = line.strip()
+        script = base64.b64decode(line).decode('utf-8')
+        out = answer(script, events)
+        sys.stdout.write(FRAME_PREFIX + base64.b64encode(out.encode('utf-8')).decode('ascii') + '\n')
+        sys.stdout.flush()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+import os
+import gzip
+import json
+import base64
+import hashlib
+import urllib.request
+
+# ================= 配置区 =================
+# 固定的 ECharts 版本，在线模式走 CDN，离线模式内联本地缓存的同版本文件
+ECHARTS_VERSION = "5.4.3"
+ECHARTS_URL = f"https://cdn.jsdelivr.net/npm/echarts@{ECHARTS_VERSION}/dist/echarts.min.js"
+VENDOR_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "vendor")
+# 可以用环境变量指向手动拷贝进来的 echarts.min.js (内网机器)
+ECHARTS_PATH = os.environ.get("ECHARTS_PATH") or os.path.join(VENDOR_DIR, f"echarts-{ECHARTS_VERSION}.min.js")
+# 固定版本 echarts.min.js 的 SHA-256 (十六进制)：下载后、内联前都要校验，对不上就报错，
+# 不会把来路不明的脚本写进报告。升级 ECHARTS_VERSION 时一起更新；也可以用同名环境变量指定
+ECHARTS_SHA256 = os.environ.get("ECHARTS_SHA256", "")
+# 图表数据超过这么多字节时 gzip + base64 内嵌
+COMPRESS_THRESHOLD = 64 * 1024
+# ========================================
+
+FONT_LINK = '<link href="https://fonts.googleapis.com/css2?family=Noto+Sans+SC:wght@300;400;700&display=swap" rel="stylesheet">'
+# 没有网络时按顺序回退到各平台自带的中文字体
+FONT_STACK = "'Noto Sans SC', 'PingFang SC', 'Hiragino Sans GB', 'Microsoft YaHei', 'Source Han Sans SC', 'WenQuanYi Micro Hei', sans-serif"
+
+# 离线模式：echarts.init 返回一个代理，图表滚动到可视区域附近时才真正初始化，
+# 之前的 setOption 先排队；不支持 IntersectionObserver 的浏览器直接初始化
+LAZY_INIT_JS = """
+(function() {
+    var realInit = echarts.init;
+    echarts.init = function(el, theme, opts) {
+        var chart = null, pending = [];
+        var proxy = {
+            setOption: function() { if (chart) chart.setOption.apply(chart, arguments); else pending.push(arguments); },
+            resize: function() { if (chart) chart.resize(); }
+        };
+        var start = function() {
+            chart = realInit(el, theme, opts);
+            for (var i = 0; i < pending.length; i++) chart.setOption.apply(chart, pending[i]);
+            pending = null;
+        };
+        if (!('IntersectionObserver' in window)) { start(); return proxy; }
+        var io = new IntersectionObserver(function(entries) {
+            for (var i = 0; i < entries.length; i++) {
+                if (entries[i].isIntersecting) { io.disconnect(); start(); return; }
+            }
+        }, { rootMargin: '200px' });
+        io.observe(el);
+        return proxy;
+    };
+})();
+"""
+
+# 读取内嵌的图表数据 (可能是 gzip + base64)，读完再执行报告脚本
+DATA_LOADER_JS = """
+function loadReportData(callback) {
+    var el = document.getElementById('report-data');
+    if (el.getAttribute('data-encoding') !== 'gzip-base64') { callback(JSON.parse(el.textContent)); return; }
+    var raw = atob(el.textContent.trim()), bytes = new Uint8Array(raw.length);
+    for (var i = 0; i < raw.length; i++) bytes[i] = raw.charCodeAt(i);
+    new Response(new Blob([bytes]).stream().pipeThrough(new DecompressionStream('gzip')))
+        .text().then(function(text) { callback(JSON.parse(text)); });
+}
+"""
+
+def verify_echarts(data, source):
+    """data 与固定版本的 SHA-256 一致时原样返回，否则抛 RuntimeError"""
+    if not ECHARTS_SHA256:
+        raise RuntimeError(f"没有配置 ECharts {ECHARTS_VERSION} 的 SHA-256，无法校验 {source}。"
+                           f"请在 report_assets.py 的配置区 (或环境变量) 填写 ECHARTS_SHA256。")
+    digest = hashlib.sha256(data).hexdigest()
+    if digest != ECHARTS_SHA256.strip().lower():
+        raise RuntimeError(f"{source} 的 SHA-256 是 {digest}，与固定的 ECharts {ECHARTS_VERSION} 不一致 "
+                           f"(文件损坏、被替换或不是这个版本)。")
+    return data
+
+def fetch_echarts(path=ECHARTS_PATH):
+    """在能联网的机器上下载固定版本的 ECharts 到 vendor/，校验通过才写入，之后整个目录拷到内网即可"""
+    with urllib.request.urlopen(ECHARTS_URL, timeout=60) as resp:
+        data = verify_echarts(resp.read(), ECHARTS_URL)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(data)
+    return path
+
+def load_echarts(path=ECHARTS_PATH):
+    """离线模式只读本地文件，不会临时去下载"""
+    if not os.path.exists(path):
+        raise RuntimeError(
+            f"离线模式需要 {os.path.basename(path)}。"
+            f"请在能联网的机器上运行 python report_assets.py 后拷贝 vendor 目录，或设置 ECHARTS_PATH。"
+        )
+    with open(path, "rb") as f:
+        data = verify_echarts(f.read(), path)
+    # 防止脚本内容里出现 </script> 提前结束标签
+    return data.decode("utf-8").replace("</script", "<\\/script")
+
+def head_assets(offline=False):
+    """<head> 里的 ECharts 与字体：在线模式走 CDN，离线模式全部内联、不发任何请求"""
+    if not offline:
+        return f'<script src="{ECHARTS_URL}"></script>\n        {FONT_LINK}'
+    return f"<script>{load_echarts()}</script>\n        <script>{LAZY_INIT_JS}</script>"
+
+def data_script(payload, threshold=COMPRESS_THRESHOLD):
+    """图表数据只内嵌一次：紧凑 JSON，超过阈值则 gzip + base64"""
+    text = json.dumps(payload, ensure_ascii=False, separators=(',', ':'))
+    if len(text.encode("utf-8")) > threshold:
+        packed = base64.b64encode(gzip.compress(text.encode("utf-8"), mtime=0)).decode("ascii")
+        return f'<script id="report-data" type="application/json" data-encoding="gzip-base64">{packed}</script>'
+    text = text.replace("</", "<\\/")
+    return f'<script id="report-data" type="application/json">{text}</script>'
+
+if __name__ == "__main__":
+    print(f"📦 已下载 ECharts {ECHARTS_VERSION}: {fetch_echarts()}")
@@ -0,0 +1,496 @@
+import os
+import sys
+import gzip
+import time
+import html
+import hashlib
+import argparse
+import datetime
+import contextlib
+import threading
+import http.client
+from collections import OrderedDict
+from email.utils import formatdate, parsedate_to_datetime
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs, urlencode
+
+from columnar import load_photos, resolve_path
+from fleet import find_exports, host_name, load_host_events
+from report_assets import FONT_STACK
+
+# ================= 配置区 =================
+HOST = "127.0.0.1"
+PORT = 8765
+# 最多缓存多少个渲染好的页面 (离线页面内联了 ECharts，每页约 1MB)
+CACHE_SIZE = 64
+# 大于这个字节数且浏览器支持时返回 gzip
+GZIP_MIN_BYTES = 1024
+# ========================================
+
+STORE_SUFFIX = '.store'
+
+class Snapshot:
+    """
+    一份数据源：某台主机的事件导出 / 事件库，或一份照片的列式导出。
+    版本号取文件的 (修改时间, 大小)，变了才重新加载；渲染缓存的键里带着版本号，
+    所以快照更新后旧页面自然失效，没变时同一个页面只渲染一次。
+    """
+
+    def __init__(self, kind, path):
+        self.kind = kind                  # 'system' / 'photo'
+        self.path = resolve_path(path) if kind == 'photo' else path
+        self.name = host_name(path[:-len(STORE_SUFFIX)] if path.endswith(STORE_SUFFIX) else path.rstrip('/\\'))
+        self.lock = threading.Lock()
+        self.loaded_version = None
+        self.data = None
+
+    def version(self):
+        path = self.path
+        if os.path.isdir(path):
+            # .cols 目录：schema.json 在所有列写完之后才写，用它代表整份导出
+            path = os.path.join(path, 'schema.json')
+        st = os.stat(path)
+        return st.st_mtime_ns, st.st_size
+
+    def load(self):
+        """返回 (版本, 数据)；系统快照是 EventStore，照片快照是照片列表"""
+        version = self.version()
+        with self.lock:
+            if version != self.loaded_version:
+                print(f"   📥 加载快照 {self.path}", file=sys.stderr)
+                self.data = self._read()
+                self.loaded_version = version
+            return self.loaded_version, self.data
+
+    def _read(self):
+        if self.kind == 'photo':
+            photos = load_photos(self.path)
+            photos.sort(key=lambda p: p['DateObject'])
+            return photos
+        from event_store import EventStore
+        if self.path.endswith(STORE_SUFFIX):
+            return EventStore.load(self.path)
+        store = EventStore(self.path)
+        store.add(load_host_events(self.path))
+        return store
+
+    def years(self):
+        _, data = self.load()
+        if self.kind == 'photo':
+            return sorted({p['Year'] for p in data})
+        if not len(data):
+            return []
+        first = datetime.datetime.fromtimestamp(data.times[0] / 1000).year
+        last = datetime.datetime.fromtimestamp(data.times[-1] / 1000).year
+        return list(range(first, last + 1))
+
+class RenderCache:
+    """
+    渲染结果的 LRU。同一个键同时有多个请求未命中时只渲染一次，其余请求等它的结果。
+    """
+
+    def __init__(self, size=CACHE_SIZE):
+        self.size = size
+        self.entries = OrderedDict()
+        self.pending = {}
+        self.lock = threading.Lock()
+        self.hits = self.misses = 0
+
+    def _lookup(self, key):
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.entries.move_to_end(key)
+            self.hits += 1
+        return entry
+
+    def peek(self, key):
+        """只看不取：不计命中、不调整 LRU 顺序"""
+        with self.lock:
+            return self.entries.get(key)
+
+    def get(self, key, render):
+        with self.lock:
+            entry = self._lookup(key)
+            if entry is not None:
+                return entry
+            key_lock = self.pending.setdefault(key, threading.Lock())
+        with key_lock:
+            with self.lock:
+                entry = self._lookup(key)
+                if entry is not None:
+                    return entry
+            try:
+                entry = render()
+            except BaseException:
+                with self.lock:
+                    self.pending.pop(key, None)
+                raise
+            # 放进缓存和撤掉 pending 在同一把锁里完成，中间不会有请求既查不到缓存又拿到新的 key_lock
+            with self.lock:
+                self.pending.pop(key, None)
+                self.misses += 1
+                self.entries[key] = entry
+                while len(self.entries) > self.size:
+                    self.entries.popitem(last=False)
+        return entry
+
+# ---------- 查询参数 ----------
+def parse_day(text):
+    return datetime.datetime.strptime(text.strip(), '%Y-%m-%d')
+
+def parse_period(query, default_year):
+    """
+    year=2024 或 range=2024-03-01~2024-06-30 (逗号分隔也可以，含结束当天)，range 优先。
+    返回 (起始, 结束 (不含), 年份, 标题)；都没给时用 default_year，default_year 为 None 表示全部。
+    """
+    if query.get('range'):
+        text = query['range'].replace(',', '~')
+        start, _, end = text.partition('~')
+        d1, d2 = parse_day(start), parse_day(end or start)
+        if d2 < d1:
+            raise ValueError("range 的结束日期早于开始日期")
+        return d1, d2 + datetime.timedelta(days=1), d1.year, f"{d1:%Y-%m-%d} ~ {d2:%Y-%m-%d}"
+    year = int(query['year']) if query.get('year') else default_year
+    if year is None:
+        return None, None, None, None
+    return datetime.datetime(year, 1, 1), datetime.datetime(year + 1, 1, 1), year, None
+
+class NotFound(Exception):
+    pass
+
+# ---------- 渲染 ----------
+def render_system(snapshot, query, offline):
+    from digital_life import render_html
+    from event_store import to_ms
+    version, store = snapshot.load()
+    years = snapshot.years()
+    t1, t2, year, period = parse_period(query, years[-1] if years else None)
+    if t1 is None:
+        raise NotFound(f"{snapshot.name} 没有事件")
+
+    def render():
+        i, j = store.span(to_ms(t1), to_ms(t2))
+        if i == j:
+            raise NotFound(f"{snapshot.name} 在 {period or f'{year} 年'} 没有事件")
+        return render_html(store.analyze(to_ms(t1), to_ms(t2)), year, period=period, offline=offline)
+    return version, (year, period), render
+
+def render_photo(snapshot, query, offline):
+    from camera import analyze_data, render_html
+    version, photos = snapshot.load()
+    t1, t2, year, period = parse_period(query, None)
+
+    def render():
+        selected = photos if t1 is None else [p for p in photos if t1 <= p['DateObject'] < t2]
+        stats = analyze_data(selected) if selected else None
+        if not stats:
+            raise NotFound(f"{snapshot.name} 在这个时间段没有照片")
+        return render_html(stats, offline=offline)
+    return version, (year, period), render
+
+RENDERERS = {'system': render_system, 'photo': render_photo}
+
+def make_entry(body, key, mtime_ns):
+    data = body.encode('utf-8')
+    return {
+        'body': data,
+        'gzip': gzip.compress(data, 6) if len(data) >= GZIP_MIN_BYTES else None,
+        'etag': etag_for(key),
+        'gzip_etag': etag_for(key, gzipped=True),
+        'last_modified': formatdate(mtime_ns / 1e9, usegmt=True),
+    }
+
+def etag_for(key, gzipped=False):
+    """
+    ETag 只由缓存键 (含快照版本) 决定：不用渲染就能回答 304。
+    gzip 与未压缩是两种不同的表示，强 ETag 不能相同，gzip 版加 -gz 后缀
+    """
+    digest = hashlib.sha1(repr(key).encode('utf-8')).hexdigest()[:20]
+    return f'"{digest}-gz"' if gzipped else f'"{digest}"'
+
+def accepts_gzip(accept_encoding):
+    """Accept-Encoding 里 gzip (没写 gzip 时看 *) 的 q 值大于 0 才算接受，gzip;q=0 表示拒绝"""
+    weights = {}
+    for part in (accept_encoding or '').split(','):
+        name, *params = part.split(';')
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        for param in params:
+            k, _, v = param.partition('=')
+            if k.strip().lower() == 'q':
+                try:
+                    q = float(v)
+                except ValueError:
+                    q = 0.0
+        weights[name] = q
+    return weights.get('gzip', weights.get('x-gzip', weights.get('*', 0.0))) > 0
+
+def index_html(snapshots):
+    rows = []
+    for kind, label in (('system', '🖥️ System Report'), ('photo', '📸 Lens Report')):
+        for name, snapshot in snapshots[kind].items():
+            try:
+                years = snapshot.years()
+            except (OSError, ValueError) as e:
+                rows.append(f"<li>{label} · {html.escape(name)} — ⚠️ {html.escape(str(e))}</li>")
+                continue
+            links = ' '.join(
+                f'<a href="/{kind}?{urlencode({"host": name, "year": y})}">{y}</a>' for y in years)
+            if kind == 'photo':
+                links = f'<a href="/photo?{urlencode({"host": name})}">全部</a> ' + links
+            rows.append(f"<li>{label} · <b>{html.escape(name)}</b> · {links}</li>")
+    return f"""<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Digital Life Reports</title>
+<style>body {{ font-family: {FONT_STACK}; background: #0f172a; color: #e2e8f0; padding: 40px; }}
+a {{ color: #818cf8; margin-right: 6px; }} li {{ margin: 8px 0; }} code {{ color: #f472b6; }}</style></head>
+<body><h1>📟 Digital Life Reports</h1><ul>{''.join(rows) or '<li>没有快照</li>'}</ul>
+<p>参数：<code>host</code> 主机 / 照片集，<code>year</code> 年份，<code>range=2024-03-01~2024-06-30</code> 任意时间段</p>
+</body></html>"""
+
+class ReportHandler(BaseHTTPRequestHandler):
+    server_version = "DigitalLifeReport/1.0"
+    # 长连接：页面和 304 都带 Content-Length，浏览器 / 压测客户端可以复用同一条连接
+    protocol_version = "HTTP/1.1"
+    # 响应头和正文分两次写；不关 Nagle 的话正文要等客户端的延迟 ACK (约 40ms)
+    disable_nagle_algorithm = True
+
+    def do_HEAD(self):
+        self.do_GET(head=True)
+
+    def do_GET(self, head=False):
+        url = urlsplit(self.path)
+        query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        kind = url.path.strip('/')
+        try:
+            if kind == '':
+                return self.send_body(200, index_html(self.server.snapshots).encode('utf-8'), head=head)
+            if kind not in RENDERERS:
+                raise NotFound(f"没有这个页面: {url.path}")
+            self.serve_report(kind, query, head)
+        except NotFound as e:
+            self.send_body(404, f"❌ {e}".encode('utf-8'), 'text/plain; charset=utf-8', head=head)
+        except ValueError as e:
+            self.send_body(400, f"❌ 参数错误: {e}".encode('utf-8'), 'text/plain; charset=utf-8', head=head)
+        except FileNotFoundError as e:
+            # 快照文件在服务运行期间被删掉 / 移走
+            self.send_body(404, f"❌ 快照不存在: {e.filename}".encode('utf-8'), 'text/plain; charset=utf-8', head=head)
+        except ConnectionError:
+            raise
+        except OSError as e:
+            self.log_error("读取快照失败: %s", e)
+            self.send_body(500, f"❌ 读取快照失败: {e}".encode('utf-8'), 'text/plain; charset=utf-8', head=head)
+
+    def serve_report(self, kind, query, head):
+        snapshots = self.server.snapshots[kind]
+        name = query.get('host') or next(iter(snapshots), None)
+        snapshot = snapshots.get(name)
+        if snapshot is None:
+            raise NotFound(f"没有名为 {name} 的{'主机' if kind == 'system' else '照片集'}")
+        version, params, render = RENDERERS[kind](snapshot, query, self.server.offline)
+        key = (kind, name, params, version)
+        last_modified = formatdate(version[0] / 1e9, usegmt=True)
+
+        # 协商缓存：快照没变时直接 304，不渲染也不查 LRU。
+        # 客户端缓存的是哪种表示 (gzip / 未压缩) 就带回哪个 ETag，304 原样回给它
+        etag = self.not_modified(key, version[0])
+        if etag:
+            self.send_response(304)
+            self.send_header('Content-Length', '0')
+            self.send_header('ETag', etag)
+            self.send_header('Last-Modified', last_modified)
+            self.send_header('Cache-Control', 'no-cache')
+            self.end_headers()
+            return
+        entry = self.server.cache.get(key, lambda: make_entry(render(), key, version[0]))
+        self.send_body(200, entry['body'], gzipped=entry['gzip'], head=head, etag=entry['etag'],
+                       gzip_etag=entry['gzip_etag'], headers={'Last-Modified': entry['last_modified']})
+
+    def accepts_gzip(self):
+        return accepts_gzip(self.headers.get('Accept-Encoding'))
+
+    def not_modified(self, key, mtime_ns):
+        """条件请求命中时返回 304 要带的 ETag (If-None-Match 里带的是哪种表示就回哪个)，否则返回 None"""
+        etags = (etag_for(key), etag_for(key, gzipped=True))
+        if_none_match = self.headers.get('If-None-Match')
+        if if_none_match is not None:
+            tags = [t.strip() for t in if_none_match.split(',')]
+            if '*' in tags:
+                # * 只在页面确实存在时成立：没渲染过的键 (可能是空时间段) 交给下面正常渲染，该 404 的照样 404
+                entry = self.server.cache.peek(key)
+                if entry is None:
+                    return None
+                return etags[self.accepts_gzip() and entry['gzip'] is not None]
+            return next((etag for etag in etags if etag in tags), None)
+        since = self.headers.get('If-Modified-Since')
+        if since:
+            try:
+                if int(mtime_ns / 1e9) > parsedate_to_datetime(since).timestamp():
+                    return None
+            except (TypeError, ValueError):
+                return None
+            # 没有 ETag 可对照：按这次会返回的表示给 ETag (页面太小不压缩时是未压缩版)
+            entry = self.server.cache.peek(key)
+            gzipped = self.accepts_gzip() and (entry is None or entry['gzip'] is not None)
+            return etags[gzipped]
+        return None
+
+    def send_body(self, status, body, content_type='text/html; charset=utf-8', gzipped=None, head=False,
+                  etag=None, gzip_etag=None, headers=None):
+        headers = dict(headers or {})
+        if gzipped is not None and self.accepts_gzip():
+            body, etag = gzipped, gzip_etag
+            headers['Content-Encoding'] = 'gzip'
+        if etag:
+            headers['ETag'] = etag
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        # 允许浏览器缓存，但每次都带着 ETag 回来确认 (快照没变时是一次很小的 304)
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Vary', 'Accept-Encoding')
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        if not head:
+            self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+def collect_snapshots(events=(), photos=()):
+    """events: 主机导出 / 事件库文件，或包含它们的文件夹；photos: 照片的列式导出"""
+    snapshots = {'system': {}, 'photo': {}}
+    for path in events:
+        if os.path.isdir(path) and not path.rstrip('/\\').endswith('.cols'):
+            paths = find_exports(path) + sorted(
+                os.path.join(root, f) for root, _, files in os.walk(path) for f in files if f.endswith(STORE_SUFFIX))
+        else:
+            paths = [path]
+        for p in paths:
+            s = Snapshot('system', p)
+            snapshots['system'][s.name] = s
+    for path in photos:
+        s = Snapshot('photo', path)
+        snapshots['photo'][s.name] = s
+    return snapshots
+
+def make_server(snapshots, host=HOST, port=PORT, offline=False, cache_size=CACHE_SIZE, quiet=False):
+    server = ThreadingHTTPServer((host, port), ReportHandler)
+    server.daemon_threads = True
+    server.snapshots = snapshots
+    server.cache = RenderCache(cache_size)
+    server.offline = offline
+    server.quiet = quiet
+    return server
+
+# ---------- 压测 ----------
+def fetch(conn, path, headers=None):
+    t0 = time.perf_counter()
+    conn.request('GET', path, headers=headers or {})
+    resp = conn.getresponse()
+    resp.read()
+    return resp.status, time.perf_counter() - t0, resp.getheader('ETag')
+
+def run_clients(port, paths, clients, headers=None):
+    """clients 个线程各开一条长连接，分摊 paths；返回 (每秒请求数, 各请求耗时, 状态码集合)"""
+    latencies, statuses = [], set()
+    lock = threading.Lock()
+
+    def worker(chunk):
+        conn = http.client.HTTPConnection(HOST, port)
+        for path in chunk:
+            status, elapsed, _ = fetch(conn, path, headers)
+            with lock:
+                latencies.append(elapsed)
+                statuses.add(status)
+        conn.close()
+
+    threads = [threading.Thread(target=worker, args=(paths[i::clients],)) for i in range(clients)]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return len(paths) / (time.perf_counter() - t0), sorted(latencies), statuses
+
+def load_test(snapshots, requests=200, clients=8, offline=False):
+    """
+    在随机端口起一个服务，用本地客户端分别压三种情况：
+    未命中 (每个请求一个新时间段，都要渲染)、命中 (同一页面，直接从 LRU 返回)、
+    协商缓存 (带 If-None-Match，返回 304)。
+    """
+    kind = 'system' if snapshots['system'] else 'photo'
+    snapshot = next(iter(snapshots[kind].values()))
+    years = snapshot.years()
+    if not years:
+        print("❌ 快照里没有数据，无法压测。")
+        return None
+    year = years[-1]
+    base = f"/{kind}?host={snapshot.name}"
+    # 未命中：同一年里每个请求的结束日期不同 (缓存放得下全部页面，排除淘汰的影响)
+    misses = [f"{base}&range={year}-01-01~{datetime.date(year, 1, 1) + datetime.timedelta(days=30 + i % 335)}"
+              for i in range(min(requests, 335))]
+    hit_path = f"{base}&year={year}"
+
+    server = make_server(snapshots, port=0, offline=offline, cache_size=len(misses) + 1, quiet=True)
+    port = server.server_address[1]
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    # 渲染时的提示信息不打印，避免终端输出影响计时
+    try:
+        with open(os.devnull, "w", encoding="utf-8") as devnull, contextlib.redirect_stdout(devnull):
+            snapshot.load()   # 快照加载不计入
+            conn = http.client.HTTPConnection(HOST, port)
+            _, first, etag = fetch(conn, hit_path)
+            conn.close()
+            results = {}
+            results['miss'] = run_clients(port, misses, clients)
+            results['hit'] = run_clients(port, [hit_path] * requests, clients)
+            results['hit_gzip'] = run_clients(port, [hit_path] * requests, clients, {'Accept-Encoding': 'gzip'})
+            results['revalidate_304'] = run_clients(port, [hit_path] * requests, clients, {'If-None-Match': etag})
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    print(f"\n🏎️ 压测：{kind} · {snapshot.name} · {clients} 个客户端 (首次渲染 {first * 1000:.0f} ms)")
+    print(f"   {'场景':<16}{'请求数':>8}{'请求/秒':>10}{'p50 ms':>10}{'p95 ms':>10}  状态码")
+    for name, (rps, latencies, statuses) in results.items():
+        p50 = latencies[len(latencies) // 2] * 1000
+        p95 = latencies[int(len(latencies) * 0.95)] * 1000
+        print(f"   {name:<16}{len(latencies):>8}{rps:>10.1f}{p50:>10.1f}{p95:>10.1f}  {sorted(statuses)}")
+    return results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="本地报告服务：从快照按需渲染 System / Lens Report 并缓存")
+    parser.add_argument('--events', nargs='*', default=[], help="主机事件导出 / 事件库 (.store)，或包含它们的文件夹")
+    parser.add_argument('--photos', nargs='*', default=[], help="照片的列式导出 (.parquet / .cols，见 batch.py --export)")
+    parser.add_argument('--host', default=HOST, help="监听地址 (团队共享时可设为 0.0.0.0)")
+    parser.add_argument('--port', type=int, default=PORT)
+    parser.add_argument('--offline', action='store_true', help="页面内联 ECharts (内网环境)")
+    parser.add_argument('--cache-size', type=int, default=CACHE_SIZE, help="最多缓存的页面数")
+    parser.add_argument('--load-test', type=int, metavar='N', default=None, help="不启动服务，用本地客户端压测 N 个请求")
+    parser.add_argument('--clients', type=int, default=8, help="压测并发客户端数")
+    args = parser.parse_args(argv)
+
+    snapshots = collect_snapshots(args.events, args.photos)
+    if not snapshots['system'] and not snapshots['photo']:
+        print("❌ 没有找到任何快照，请用 --events / --photos 指定。")
+        return 1
+    if args.load_test:
+        return 0 if load_test(snapshots, args.load_test, args.clients, args.offline) else 1
+
+    server = make_server(snapshots, args.host, args.port, args.offline, args.cache_size)
+    print(f"🌐 报告服务已启动: http://{args.host}:{args.port}/  "
+          f"({len(snapshots['system'])} 台主机，{len(snapshots['photo'])} 个照片集，Ctrl+C 退出)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n👋 已退出。")
+    finally:
+        server.server_close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,146 @@
+import bisect
+import datetime
+
+# ================= 配置区 =================
+# 单个活跃区间的上限，超过说明日志缺失 (例如丢了睡眠事件)，直接丢弃
+MAX_INTERVAL_SECONDS = 30 * 24 * 3600
+# ========================================
+
+# 会话重建只关心这几种归一化后的事件类型：
+#   'boot'      开机          'shutdown'  正常关机
+#   'sleep'     进入睡眠/休眠  'wake'      唤醒
+#   'crash'     异常重启/蓝屏  'heartbeat' 其它任何说明机器醒着的事件 (如软件安装)
+#   'lock'      锁屏/注销      'unlock'    解锁/登录 (只在"在场时间"模式下出现)
+SESSION_KINDS = ('boot', 'shutdown', 'sleep', 'wake', 'crash', 'heartbeat', 'lock', 'unlock')
+
+
+def reconstruct_intervals(timeline):
+    """
+    把按时间排序的 (epoch秒, 类型) 事件流还原成互不重叠的活跃区间列表。
+
+    - 睡眠 -> 唤醒 之间的时间不计入活跃时长
+    - 41/1001 是在 *下一次开机时* 才写入日志的，真实崩溃时间未知，
+      因此崩溃会把当前区间截断在最后一个"活着"的证据上，而不是崩溃事件本身
+    - 锁屏 -> 解锁 之间同样不计入 (唤醒后仍停在锁屏界面，直到解锁才算回来)
+    """
+    intervals = []
+    start = None        # 当前活跃区间的起点
+    last_seen = None    # 当前区间内最后一次看到机器醒着
+    fresh_boot = False  # 刚开机，紧随其后的崩溃事件 (41、1001 可能连着好几条) 都属于上一次会话
+    locked = False      # 处于锁屏/注销状态
+
+    def close(end):
+        if start is not None and end is not None and 0 < end - start <= MAX_INTERVAL_SECONDS:
+            intervals.append((start, end))
+
+    for ts, kind in timeline:
+        if kind == 'boot':
+            # 上一次没有正常关机 (断电、崩溃)，截断在最后心跳处
+            close(last_seen)
+            start, last_seen, fresh_boot, locked = ts, ts, True, False
+            continue
+
+        if kind == 'shutdown':
+            if start is not None:
+                close(ts)
+            start = None
+        elif kind == 'sleep':
+            if start is not None:
+                close(ts)
+            start = None
+        elif kind == 'wake':
+            # 跨年时第一条可能就是唤醒，同样视为区间开始
+            if start is None and not locked:
+                start = ts
+        elif kind == 'lock':
+            if start is not None:
+                close(ts)
+            start, locked = None, True
+        elif kind == 'unlock':
+            if start is None:
+                start = ts
+            locked = False
+        elif kind == 'crash':
+            if not fresh_boot and start is not None:
+                close(last_seen)
+                start = None
+            if not fresh_boot:
+                locked = False
+
+        if kind != 'crash':
+            fresh_boot = False
+        if start is not None:
+            last_seen = ts
+
+    # 日志截止时仍在运行：只统计到最后一次心跳
+    close(last_seen)
+    intervals.sort()
+    return intervals
+
+
+class SessionIndex:
+    """
+    活跃区间索引：起点/终点数组 + 时长前缀和，
+    "t1 ~ t2 之间活跃了多少秒" 只需两次二分，O(log n)。
+    """
+
+    def __init__(self, intervals):
+        self.starts = [s for s, _ in intervals]
+        self.ends = [e for _, e in intervals]
+        self.prefix = [0.0]
+        for s, e in intervals:
+            self.prefix.append(self.prefix[-1] + (e - s))
+
+    def __len__(self):
+        return len(self.starts)
+
+    def intervals(self):
+        return list(zip(self.starts, self.ends))
+
+    def durations(self):
+        return [e - s for s, e in zip(self.starts, self.ends)]
+
+    def total(self):
+        return self.prefix[-1]
+
+    def active_between(self, t1, t2):
+        if t2 <= t1 or not self.starts:
+            return 0.0
+        i = bisect.bisect_right(self.ends, t1)    # 第一个结束于 t1 之后的区间
+        j = bisect.bisect_left(self.starts, t2)   # 第一个开始于 t2 及之后的区间
+        if i >= j:
+            return 0.0
+        total = self.prefix[j] - self.prefix[i]
+        if self.starts[i] < t1:
+            total -= t1 - self.starts[i]
+        if self.ends[j - 1] > t2:
+            total -= self.ends[j - 1] - t2
+        return total
+
+    def covers(self, t):
+        """t 是否落在某个活跃区间 [start, end) 内，一次二分"""
+        i = bisect.bisect_right(self.starts, t) - 1
+        return i >= 0 and t < self.ends[i]
+
+    def slice(self, t1, t2):
+        """截取 [t1, t2) 内的部分 (跨边界的区间会被裁剪)，返回新的索引"""
+        i = bisect.bisect_right(self.ends, t1)
+        j = bisect.bisect_left(self.starts, t2)
+        clipped = [(max(s, t1), min(e, t2)) for s, e in zip(self.starts[i:j], self.ends[i:j])]
+        return SessionIndex([(s, e) for s, e in clipped if e > s])
+
+    def longest(self):
+        """返回 (起点, 时长)，没有区间时返回 (None, 0)"""
+        best_start, best = None, 0
+        for s, e in zip(self.starts, self.ends):
+            if e - s > best:
+                best_start, best = s, e - s
+        return best_start, best
+
+    def day_span(self):
+        """覆盖所有区间的本地日期范围 (含首尾)"""
+        if not self.starts:
+            return []
+        first = datetime.datetime.fromtimestamp(self.starts[0]).date()
+        last = datetime.datetime.fromtimestamp(self.ends[-1]).date()
+        return [first + datetime.timedelta(days=i) for i in range((last - first).days + 1)]
@@ -0,0 +1,151 @@
+import os
+import sys
+import json
+import random
+import argparse
+import datetime
+
+# ================= 配置区 =================
+START_YEAR = 2024
+# 每类事件的默认概率，可以在命令行覆盖
+CRASH_RATE = 0.01       # 每次会话以崩溃 (41) 结束的概率
+BSOD_RATE = 0.3         # 崩溃中伴随蓝屏 (1001) 的比例
+INSTALL_RATE = 0.15     # 每个活跃时段发生一次软件安装的概率
+# ========================================
+
+# 与 PowerShell 采集器 ConvertTo-Json 输出完全一致的结构：
+#   {"Id": 6005, "TimeCreated": "/Date(1704067200000)/", "Type": "Sys"}
+# PowerShell 5.1 输出 /Date(ms)/，PowerShell 7 输出带时区的 ISO 字符串
+TIME_FORMATS = ('msdate', 'iso', 'mixed')
+
+PROFILES = {
+    # 台式机：每天开机、关机，偶尔午休睡眠
+    'desktop': {'use_weekday': 0.92, 'use_weekend': 0.45, 'naps': (0, 1), 'overnight_sleep': 0.1},
+    # 笔记本：频繁合盖睡眠，晚上睡眠而不是关机，偶尔一睡好几天
+    'laptop': {'use_weekday': 0.95, 'use_weekend': 0.7, 'naps': (1, 5), 'overnight_sleep': 0.8},
+}
+
+def format_time(dt, fmt, rng):
+    if fmt == 'mixed':
+        fmt = 'msdate' if rng.random() < 0.5 else 'iso'
+    if fmt == 'msdate':
+        return f"/Date({int(dt.timestamp() * 1000)})/"
+    return dt.astimezone().isoformat(timespec='milliseconds')
+
+def iter_events(host='host', start_year=START_YEAR, years=1, seed=0, profile=None,
+                time_format='msdate', crash_rate=CRASH_RATE, bsod_rate=BSOD_RATE,
+                install_rate=INSTALL_RATE, limit=None):
+    """
+    逐条生成一台主机的事件流 (按时间排序)，相同参数 + 种子结果完全一致。
+    limit 不为空时生成到指定条数为止，此时会无视 years 一直往后生成。
+    """
+    rng = random.Random(f"{seed}:{host}")
+    profile = PROFILES[profile or rng.choice(sorted(PROFILES))]
+    day = datetime.date(start_year, 1, 1)
+    end_day = datetime.date(start_year + years, 1, 1) if limit is None else None
+    count = 0
+    sleeping = False  # 前一天晚上是睡眠而不是关机
+
+    def emit(eid, dt, etype='Sys'):
+        return {'Id': eid, 'TimeCreated': format_time(dt, time_format, rng), 'Type': etype}
+
+    while end_day is None or day < end_day:
+        midnight = datetime.datetime.combine(day, datetime.time())
+        day += datetime.timedelta(days=1)
+        chance = profile['use_weekend'] if midnight.weekday() >= 5 else profile['use_weekday']
+        if rng.random() > chance:
+            continue
+
+        begin = midnight + datetime.timedelta(hours=rng.uniform(7, 11))
+        finish = midnight + datetime.timedelta(hours=rng.uniform(17, 24.9))
+        out = []
+
+        if sleeping:
+            out.append(emit(1, begin))
+        else:
+            out.append(emit(6005, begin))
+
+        # 白天的几次短暂睡眠 (午休、合盖开会)
+        naps = rng.randint(*profile['naps'])
+        span = (finish - begin).total_seconds()
+        marks = sorted(rng.uniform(0.1, 0.9) * span for _ in range(naps))
+        t = begin
+        for m in marks:
+            nap_start = begin + datetime.timedelta(seconds=m)
+            if nap_start <= t:
+                continue
+            nap_end = nap_start + datetime.timedelta(minutes=rng.uniform(10, 90))
+            if nap_end >= finish:
+                break
+            if rng.random() < install_rate:
+                out.append(emit(1033, t + (nap_start - t) / 2, 'App'))
+            out.append(emit(42, nap_start))
+            out.append(emit(1, nap_end))
+            t = nap_end
+        if rng.random() < install_rate:
+            out.append(emit(1033, t + (finish - t) / 2, 'App'))
+
+        if rng.random() < crash_rate:
+            # 崩溃：没有关机事件，41/1001 在下一次开机时写入
+            reboot = finish + datetime.timedelta(minutes=rng.uniform(1, 30))
+            out.append(emit(6005, reboot))
+            out.append(emit(41, reboot + datetime.timedelta(seconds=2)))
+            if rng.random() < bsod_rate:
+                out.append(emit(1001, reboot + datetime.timedelta(seconds=30)))
+            out.append(emit(6006, reboot + datetime.timedelta(minutes=rng.uniform(5, 60))))
+            sleeping = False
+        elif rng.random() < profile['overnight_sleep']:
+            out.append(emit(42, finish))
+            sleeping = True
+        else:
+            out.append(emit(6006, finish))
+            sleeping = False
+
+        for e in out:
+            yield e
+            count += 1
+            if limit is not None and count >= limit:
+                return
+
+def generate_events(**kwargs):
+    return list(iter_events(**kwargs))
+
+def write_hosts(folder, hosts=10, ndjson=False, **kwargs):
+    """为 fleet 模式生成一整个目录的主机导出文件"""
+    os.makedirs(folder, exist_ok=True)
+    paths = []
+    for i in range(hosts):
+        host = f"host-{i:04d}"
+        ext = '.ndjson' if ndjson else '.json'
+        path = os.path.join(folder, host + ext)
+        with open(path, "w", encoding="utf-8") as f:
+            if ndjson:
+                for e in iter_events(host=host, **kwargs):
+                    f.write(json.dumps(e) + '\n')
+            else:
+                json.dump(generate_events(host=host, **kwargs), f)
+        paths.append(path)
+    return paths
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="生成可复现的 Windows 事件流 (PowerShell 采集器 JSON 格式)")
+    parser.add_argument('-o', '--output', default='synthetic_exports', help="输出目录")
+    parser.add_argument('--hosts', type=int, default=10)
+    parser.add_argument('--start-year', type=int, default=START_YEAR)
+    parser.add_argument('--years', type=int, default=1)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--profile', choices=sorted(PROFILES), default=None, help="默认每台主机随机")
+    parser.add_argument('--time-format', choices=TIME_FORMATS, default='mixed')
+    parser.add_argument('--crash-rate', type=float, default=CRASH_RATE)
+    parser.add_argument('--ndjson', action='store_true', help="每行一个事件")
+    args = parser.parse_args(argv)
+
+    paths = write_hosts(args.output, hosts=args.hosts, ndjson=args.ndjson,
+                        start_year=args.start_year, years=args.years, seed=args.seed,
+                        profile=args.profile, time_format=args.time_format,
+                        crash_rate=args.crash_rate)
+    print(f"🎲 已生成 {len(paths)} 台主机的模拟日志: {os.path.abspath(args.output)}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
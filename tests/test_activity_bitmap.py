@@ -0,0 +1,80 @@
+import datetime
+
+import pytest
+
+import activity_bitmap
+from activity_bitmap import ActivityBitmap, bitmaps_from_index, longest_streak, sum_bitmaps, summarize
+from sessions import SessionIndex
+
+
+def ts(*args):
+    return datetime.datetime(*args).timestamp()
+
+
+@pytest.fixture(params=['numpy', 'pure'])
+def backend(request, monkeypatch):
+    if request.param == 'numpy':
+        pytest.importorskip('numpy')
+    else:
+        monkeypatch.setattr(activity_bitmap, 'np', None)
+    return request.param
+
+
+def test_rollups_known_answer(backend):
+    # 2024-01-01 是周一：19:30-21:15 跨过加班线，周三 08:00-08:10
+    bitmap = ActivityBitmap.from_intervals(2024, [
+        (ts(2024, 1, 1, 19, 30), ts(2024, 1, 1, 21, 15)),
+        (ts(2024, 1, 3, 8, 0), ts(2024, 1, 3, 8, 10)),
+    ])
+    r = bitmap.rollups()
+    assert bitmap.active_minutes() == 115
+    assert r['per_day'][:3] == [105, 0, 10]
+    assert sum(r['per_day']) == 115 and len(r['per_day']) == 366
+    assert r['per_hour'][19] == 30 and r['per_hour'][20] == 60 and r['per_hour'][21] == 15 and r['per_hour'][8] == 10
+    assert r['per_weekday'] == [105, 0, 10, 0, 0, 0, 0]
+    assert r['overtime_minutes'] == 75
+    assert r['overtime_days'] == 1
+
+
+def test_empty_year(backend):
+    r = ActivityBitmap(2023).rollups()
+    assert r['per_hour'] == [0] * 24
+    assert r['overtime_days'] == 0
+    assert ActivityBitmap(2023).longest_streak() == (0, None)
+
+
+def test_set_range_within_one_byte_and_clipping():
+    bitmap = ActivityBitmap(2023)
+    bitmap.set_range(2, 5)
+    assert [bitmap.is_active(m) for m in range(7)] == [False, False, True, True, True, False, False]
+    bitmap.set_range(bitmap.minutes - 3, bitmap.minutes + 100)
+    bitmap.set_range(-10, 1)
+    assert bitmap.active_minutes() == 3 + 3 + 1
+
+
+def test_interval_across_new_year_is_split():
+    index = SessionIndex([(ts(2023, 12, 31, 23, 0), ts(2024, 1, 1, 1, 0))])
+    bitmaps = bitmaps_from_index(index)
+    assert sorted(bitmaps) == [2023, 2024]
+    assert bitmaps[2023].active_minutes() == 60
+    assert bitmaps[2024].active_minutes() == 60
+    # 12-31 与 01-01 连成两天
+    assert summarize(bitmaps)['streak'] == {'days': 2, 'start': datetime.date(2023, 12, 31)}
+
+
+def test_or_and_sum_align_by_minute_of_year(backend):
+    a = ActivityBitmap(2023)
+    a.set_range(0, 10)
+    b = ActivityBitmap(2024)
+    b.set_range(5, 20)
+    b.set_range(b.minutes - 1440, b.minutes)   # 闰年多出的最后一天
+    merged = a | b
+    assert merged.year == 2024
+    assert merged.active_minutes() == 20 + 1440
+    total = list(sum_bitmaps([a, b]))
+    assert len(total) == b.minutes
+    assert total[:21] == [1] * 5 + [2] * 5 + [1] * 10 + [0]
+
+
+def test_longest_streak_prefers_first_of_equal_runs():
+    assert longest_streak([1, 1, 0, 1, 1, 0], datetime.date(2024, 1, 1)) == (2, datetime.date(2024, 1, 1))
@@ -0,0 +1,246 @@
+import random
+from collections import Counter
+
+import pytest
+
+import badges
+from badges import BadgeRules, default_rules, photo_metrics, system_metrics
+
+
+# ---------- 基线：规则化之前 get_achievements 的 if / elif 写法，规则文件必须与它逐条一致 ----------
+def baseline_system_badges(stats):
+    out = []
+    longest_hours = stats['longest_session']['duration'] / 3600
+    if longest_hours > 48:
+        out.append({'icon': '🤖', 'title': '赛博铁人', 'desc': f'单次连续开机 {int(longest_hours)} 小时'})
+    elif longest_hours > 12:
+        out.append({'icon': '🔋', 'title': '超长待机', 'desc': f'单次连续工作 {int(longest_hours)} 小时'})
+    late_night_ops = sum(stats['hour_dist'][0:5])
+    if late_night_ops > 50:
+        out.append({'icon': '🧛', 'title': '暗夜伯爵', 'desc': '凌晨活跃超过50次'})
+    elif late_night_ops == 0:
+        out.append({'icon': '🌞', 'title': '养生达人', 'desc': '从不熬夜，作息极其规律'})
+    crash_total = stats['bsod'] + stats['crash']
+    if crash_total == 0:
+        out.append({'icon': '🛡️', 'title': '稳如泰山', 'desc': '全年 0 崩溃，简直是奇迹'})
+    elif stats['bsod'] > 5:
+        out.append({'icon': '💊', 'title': '蓝屏受害者', 'desc': '经历了太多不该承受的痛苦'})
+    total_hours = stats['total_uptime_seconds'] / 3600
+    if total_hours > 2000:
+        out.append({'icon': '💻', 'title': '人机合一', 'desc': f'累计陪伴电脑 {int(total_hours)} 小时'})
+    if stats['install_count'] > 30:
+        out.append({'icon': '🛠️', 'title': '装机狂魔', 'desc': f'安装/更新了 {stats["install_count"]} 次软件'})
+    ci = stats.get('crash_install')
+    if ci and ci['incidents'] >= 3 and ci['share'] >= 0.5 and (ci['ratio'] is None or ci['ratio'] >= 2):
+        out.append({'icon': '🧨', 'title': '装完就崩', 'desc': f'{ci["after_install"]}/{ci["incidents"]} 次崩溃发生在安装软件后 {ci["lookback_hours"]} 小时内'})
+    if not out:
+        out.append({'icon': '🧘', 'title': '数字隐士', 'desc': '平平淡淡才是真'})
+    return out
+
+
+def baseline_photo_badges(stats):
+    out = []
+    total = stats['total_count']
+    if total == 0:
+        return []
+    focals = stats['focal_dist']
+    wide_count = sum(c for f, c in focals.items() if f < 24)
+    tele_count = sum(c for f, c in focals.items() if f >= 85)
+    if wide_count / total > 0.4:
+        out.append({'icon': '🏔️', 'title': '广角狂魔', 'desc': '40% 以上的照片使用了超广角，心中装得下山河湖海'})
+    elif tele_count / total > 0.4:
+        out.append({'icon': '🔭', 'title': '空气切割机', 'desc': '偏爱长焦压缩感，也是一名合格的偷窥...观察者'})
+    else:
+        out.append({'icon': '👁️', 'title': '人文之眼', 'desc': '多使用 35mm-50mm 标准焦段，平实记录生活'})
+    night_shots = sum(stats['hour_dist'][0:5]) + sum(stats['hour_dist'][22:24])
+    noon_shots = sum(stats['hour_dist'][11:14])
+    if night_shots / total > 0.3:
+        out.append({'icon': '🌃', 'title': '夜之城行者', 'desc': '超过 30% 的照片拍摄于深夜，ISO 一定很高吧'})
+    elif noon_shots / total > 0.4:
+        out.append({'icon': '☀️', 'title': '光影捕手', 'desc': '顶着正午的大太阳拍摄，你是真的不怕热'})
+    large_aperture = 0
+    for k, v in stats['aperture_dist'].items():
+        try:
+            if float(k.replace('f/', '')) <= 2.8:
+                large_aperture += v
+        except Exception:
+            pass
+    if large_aperture / total > 0.5:
+        out.append({'icon': '🥯', 'title': '虚化大师', 'desc': '一半以上的照片都在追求焦外如奶油般化开'})
+    else:
+        out.append({'icon': '🏔️', 'title': '小光圈战士', 'desc': 'F8 才是风光狗的归宿，边缘画质必须锐利'})
+    if total > 5000:
+        out.append({'icon': '🔫', 'title': '机关枪手', 'desc': f'单文件夹扫射了 {total} 张照片，硬盘还好吗？'})
+    elif total < 100:
+        out.append({'icon': '🎨', 'title': '胶片节奏', 'desc': '按快门非常克制，每一张都是深思熟虑'})
+    if len(stats['camera_dist']) > 3:
+        out.append({'icon': '📸', 'title': '器材抚摸党', 'desc': f'使用了 {len(stats["camera_dist"])} 种不同的相机拍摄'})
+    return out
+
+
+def system_stats(longest_h=0.0, late=0, crash=0, bsod=0, total_h=0.0, installs=0, ci=None):
+    hour_dist = [0] * 24
+    hour_dist[2] = late
+    hour_dist[10] = 7
+    return {
+        'longest_session': {'duration': longest_h * 3600, 'date': None},
+        'hour_dist': hour_dist,
+        'crash': crash, 'bsod': bsod,
+        'total_uptime_seconds': total_h * 3600,
+        'install_count': installs,
+        'crash_install': ci,
+    }
+
+
+def crash_install(incidents, after, ratio, lookback=24):
+    return {'incidents': incidents, 'after_install': after, 'share': after / incidents if incidents else 0.0,
+            'ratio': ratio, 'lookback_hours': lookback}
+
+
+def photo_stats(wide=0, tele=0, normal=0, night=0, noon=0, fast=0, cameras=1, junk_aperture=0):
+    total = wide + tele + normal
+    hour_dist = [0] * 24
+    hour_dist[23] = night
+    hour_dist[12] = noon
+    hour_dist[9] = total - night - noon
+    focal_dist = Counter({16: wide, 200: tele, 50: normal})
+    aperture_dist = Counter({'f/1.8': fast, 'f/8.0': total - fast - junk_aperture, '未知': junk_aperture})
+    return {
+        'total_count': total,
+        'hour_dist': hour_dist,
+        'focal_dist': +focal_dist,
+        'aperture_dist': +aperture_dist,
+        'camera_dist': Counter({f'cam{i}': 1 for i in range(cameras)}),
+    }
+
+
+def test_system_known_answers():
+    rules = default_rules('system')
+    assert rules.evaluate(system_metrics(system_stats(late=3, crash=1))) == [
+        {'icon': '🧘', 'title': '数字隐士', 'desc': '平平淡淡才是真'}]
+    got = rules.evaluate(system_metrics(system_stats(longest_h=49.9, late=0, total_h=2500.7, installs=31)))
+    assert [b['title'] for b in got] == ['赛博铁人', '养生达人', '稳如泰山', '人机合一', '装机狂魔']
+    assert got[0]['desc'] == '单次连续开机 49 小时'
+    assert got[3]['desc'] == '累计陪伴电脑 2500 小时'
+    assert got[4]['desc'] == '安装/更新了 31 次软件'
+
+
+def test_system_thresholds_are_strict():
+    # 阈值本身不触发 (> 而不是 >=)，与旧代码一致
+    rules = default_rules('system')
+    at_edge = system_stats(longest_h=48, late=50, crash=1, bsod=5, total_h=2000, installs=30)
+    assert rules.evaluate(system_metrics(at_edge)) == baseline_system_badges(at_edge)
+    assert [b['title'] for b in rules.evaluate(system_metrics(at_edge))] == ['超长待机']
+
+
+def test_install_then_crash_without_baseline_ratio():
+    # 平时没有崩溃 -> ratio 为 None，视为无穷大，照样触发
+    stats = system_stats(late=3, crash=4, ci=crash_install(4, 3, None, lookback=6))
+    got = default_rules('system').evaluate(system_metrics(stats))
+    assert got == baseline_system_badges(stats)
+    assert got[-1]['desc'] == '3/4 次崩溃发生在安装软件后 6 小时内'
+    # 没做关联分析 (crash_install 为 None) 时不触发
+    stats = system_stats(late=3, crash=4)
+    assert [b['title'] for b in default_rules('system').evaluate(system_metrics(stats))] == ['数字隐士']
+
+
+def test_photo_known_answers_and_empty():
+    rules = default_rules('photo')
+    assert rules.evaluate(photo_metrics({'total_count': 0})) == []
+    stats = photo_stats(wide=50, normal=30, night=40, fast=60, cameras=4)
+    assert [b['title'] for b in rules.evaluate(photo_metrics(stats))] == [
+        '广角狂魔', '夜之城行者', '虚化大师', '胶片节奏', '器材抚摸党']
+    assert rules.evaluate(photo_metrics(stats))[-1]['desc'] == '使用了 4 种不同的相机拍摄'
+
+
+def test_photo_uses_focal35_when_present():
+    stats = photo_stats(normal=200)
+    assert default_rules('photo').evaluate(photo_metrics(stats))[0]['title'] == '人文之眼'
+    # 实际焦距 5.6mm 的手机，等效 26mm；按实际焦距会被错判成广角
+    stats['focal_dist'] = Counter({5.6: 200})
+    stats['focal35_dist'] = Counter({26: 200})
+    assert default_rules('photo').evaluate(photo_metrics(stats))[0]['title'] == '人文之眼'
+
+
+def random_system(rng):
+    pick = lambda *vals: rng.choice(vals)
+    ci = None
+    if rng.random() < 0.6:
+        incidents = pick(0, 2, 3, 4, 10)
+        after = rng.randint(0, incidents)
+        ci = crash_install(incidents, after, pick(None, 0.0, 1.99, 2, 2.01, 5))
+    return system_stats(
+        longest_h=pick(0, 11.9, 12, 12.01, 30, 48, 48.01, 100),
+        late=pick(0, 1, 50, 51, 200),
+        crash=pick(0, 1, 3), bsod=pick(0, 5, 6),
+        total_h=pick(0, 1999.99, 2000, 2000.01, 5000),
+        installs=pick(0, 30, 31, 80),
+        ci=ci,
+    )
+
+
+def random_photo(rng):
+    pick = lambda *vals: rng.choice(vals)
+    total = pick(1, 10, 99, 100, 101, 5000, 5001)
+    wide = rng.randint(0, total)
+    tele = rng.randint(0, total - wide)
+    night = rng.randint(0, total)
+    noon = rng.randint(0, total - night)
+    fast = rng.randint(0, total)
+    junk = rng.randint(0, total - fast)
+    return photo_stats(wide=wide, tele=tele, normal=total - wide - tele, night=night, noon=noon,
+                       fast=fast, cameras=pick(0, 3, 4), junk_aperture=junk)
+
+
+@pytest.mark.parametrize('name, make, metrics, baseline', [
+    ('system', random_system, system_metrics, baseline_system_badges),
+    ('photo', random_photo, photo_metrics, baseline_photo_badges),
+])
+def test_rules_match_baseline_on_random_snapshots(name, make, metrics, baseline):
+    rng = random.Random(20240)
+    rules = default_rules(name)
+    for _ in range(3000):
+        stats = make(rng)
+        assert rules.evaluate(metrics(stats)) == baseline(stats), stats
+
+
+@pytest.mark.parametrize('name, make, metrics', [
+    ('system', random_system, system_metrics),
+    ('photo', random_photo, photo_metrics),
+])
+def test_unlock_matrix_agrees_with_scalar_path(monkeypatch, name, make, metrics):
+    rng = random.Random(7)
+    rules = default_rules(name)
+    rows = [metrics(make(rng)) for _ in range(500)] + [{'total': 0}]
+    expected = {badge_id: [badge_id in {rules.ids[m] for m in rules.matches(r)} for r in rows] for badge_id in rules.ids}
+    vectorized = {k: list(map(bool, v)) for k, v in rules.unlock_matrix(rows).items()}
+    assert vectorized == expected
+    # 没有 NumPy 时退回纯 Python，结果必须相同
+    monkeypatch.setattr(badges, 'np', None)
+    assert rules.unlock_matrix(rows) == expected
+
+
+def test_unlock_rates_empty_and_counts():
+    rules = default_rules('system')
+    rates = rules.unlock_rates([])
+    assert set(rates) == set(rules.ids)
+    assert all(r['count'] == 0 and r['share'] == 0.0 for r in rates.values())
+    rows = [system_metrics(system_stats(late=3, crash=1)), system_metrics(system_stats(late=0))]
+    rates = rules.unlock_rates(rows)
+    assert rates['digital_hermit']['count'] == 1 and rates['digital_hermit']['share'] == 0.5
+    assert rates['early_sleeper']['count'] == 1
+
+
+def test_duplicate_predicates_compiled_once_and_bad_operator():
+    rules = BadgeRules({
+        'groups': [
+            {'rules': [{'id': 'a', 'when': [['x', '>', 1]], 'icon': '', 'title': 'A', 'desc': ''}]},
+            {'rules': [{'id': 'b', 'when': [['x', '>', 1.0], ['y', '==', 0]], 'icon': '', 'title': 'B', 'desc': ''}]},
+        ],
+    })
+    assert rules.predicates == [('x', '>', 1.0), ('y', '==', 0.0)]
+    # 缺失的指标按 NaN 比较，永远不满足
+    assert rules.matches({'x': 2}) == [0]
+    assert rules.matches({}) == []
+    with pytest.raises(ValueError):
+        BadgeRules({'groups': [{'rules': [{'id': 'c', 'when': [['x', '=>', 1]]}]}]})
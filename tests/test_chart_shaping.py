@@ -0,0 +1,22 @@
+from chart_shaping import aperture_bars, top_with_other
+
+
+def test_aperture_bars_keeps_all_when_few():
+    assert aperture_bars({'f/8.0': 1, 'f/1.8': 5, 'f/11.0': 2}) == {'x': ['f/1.8', 'f/8.0', 'f/11.0'], 'y': [5, 1, 2]}
+
+
+def test_aperture_bars_folds_rare_stops_into_other():
+    dist = {f"f/{1 + i / 10:.1f}": 100 - i for i in range(50)}
+    bars = aperture_bars(dist, n=4)
+    assert bars['x'] == ['f/1.0', 'f/1.1', 'f/1.2', '其他 (47 档)']
+    assert bars['y'] == [100, 99, 98, sum(100 - i for i in range(3, 50))]
+    assert sum(bars['y']) == sum(dist.values())
+
+
+def test_aperture_bars_empty():
+    assert aperture_bars({}) == {'x': [], 'y': []}
+
+
+def test_top_with_other():
+    data = top_with_other({'A': 5, 'B': 3, 'C': 1, 'D': 1}, n=3)
+    assert data == [{'value': 5, 'name': 'A'}, {'value': 3, 'name': 'B'}, {'value': 2, 'name': '其他 (2 款)'}]
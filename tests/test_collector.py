@@ -0,0 +1,58 @@
+import datetime
+import json
+import os
+import sys
+import time
+
+import pytest
+
+from collector import CollectorError, PowerShellCollector
+from digital_life import get_range_data
+
+STANDIN = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'ps_standin.py')
+
+
+@pytest.fixture
+def collector():
+    c = PowerShellCollector([sys.executable, STANDIN], timeout=10)
+    yield c
+    c.close()
+
+
+def test_queries_reuse_one_process(collector):
+    assert collector.run('Write-Output "你好"') == 'Write-Output "你好"'
+    assert collector.run('') == ''
+    assert collector.run('第二次') == '第二次'
+    assert (collector.starts, collector.restarts) == (1, 0)
+
+
+def test_timeout_kills_and_next_query_restarts(collector):
+    t0 = time.perf_counter()
+    with pytest.raises(CollectorError, match='超时'):
+        collector.run('#standin:sleep 5', timeout=0.3, retries=0)
+    assert time.perf_counter() - t0 < 3
+    assert not collector.alive()
+    assert collector.run('ok') == 'ok'
+    assert collector.restarts == 1
+
+
+def test_crash_is_retried_then_reported(collector):
+    with pytest.raises(CollectorError, match='意外退出'):
+        collector.run('#standin:exit', retries=1)
+    # 首次启动 + 重试时重启一次
+    assert collector.starts == 2
+    assert collector.run('still here') == 'still here'
+
+
+def test_range_query_through_standin(tmp_path):
+    events = [
+        {'Id': 6005, 'TimeCreated': '/Date(%d)/' % (datetime.datetime(2024, 3, 1, 9).timestamp() * 1000), 'Type': 'Sys'},
+        {'Id': 6006, 'TimeCreated': '2024-03-10T18:00:00', 'Type': 'Sys'},
+    ]
+    path = tmp_path / 'events.json'
+    path.write_text(json.dumps(events), encoding='utf-8')
+    with PowerShellCollector([sys.executable, STANDIN, str(path)], timeout=10) as c:
+        got = get_range_data('2024-03-01T00:00:00', '2024-03-05T00:00:00', c, strict=True)
+        assert [e['Id'] for e in got] == [6005]
+        assert get_range_data('2025-01-01T00:00:00', '2025-02-01T00:00:00', c, strict=True) == []
+        assert c.starts == 1
@@ -0,0 +1,126 @@
+import datetime
+import json
+import os
+
+import pytest
+
+import columnar
+from columnar import PHOTO_SCHEMA, ColumnarWriter, export_photos, iter_rows, load_photos, photo_from_row, resolve_path
+
+
+def photo(i):
+    taken = datetime.datetime(2024, 1, 1) + datetime.timedelta(minutes=i)
+    return {
+        'FocalLength': 35, 'Month': taken.month, 'Hour': taken.hour, 'Year': taken.year,
+        'DateObject': taken, 'ShutterSpeed': '1/250', 'ShutterVal': 0.004,
+        'Aperture': 'f/2.8', 'ApertureVal': 2.8, 'Camera': 'X-T4', 'ISO': 200,
+        'Path': f'D:/照片/{i:05d}.jpg', 'Focal35': 53, 'Lens': 'XF 35mm',
+    }
+
+
+@pytest.fixture(autouse=True)
+def no_arrow(monkeypatch):
+    # 固定走 .cols 目录格式；Parquet 的往返放在单独的用例里
+    monkeypatch.setattr(columnar, 'pa', False)
+    monkeypatch.setattr(columnar, 'pq', False)
+
+
+def test_cols_round_trip_with_unique_paths(tmp_path, capsys):
+    photos = [photo(i) for i in range(250)]
+    out = list(export_photos(iter(photos), str(tmp_path / 'photos.parquet'), batch_rows=64))
+    assert out == photos
+    # 写 .parquet 退回到 .cols，读的时候用原路径也能找到
+    assert resolve_path(str(tmp_path / 'photos.parquet')) == str(tmp_path / 'photos.cols')
+    assert load_photos(str(tmp_path / 'photos.parquet')) == photos
+    with open(tmp_path / 'photos.cols' / 'schema.json', encoding='utf-8') as f:
+        meta = json.load(f)
+    # 路径不进字典，schema.json 的大小与行数无关
+    assert 'path' not in meta['dictionaries']
+    assert meta['dictionaries']['camera'] == ['X-T4']
+
+
+def test_text_column_reads_back_in_batches(tmp_path):
+    path = str(tmp_path / 'p.cols')
+    rows = [photo(i) for i in range(10)]
+    rows[3]['Path'] = ''
+    with ColumnarWriter(path, PHOTO_SCHEMA, batch_rows=4) as writer:
+        for p in rows:
+            writer.append(columnar.photo_row(p))
+        assert writer.dictionaries[PHOTO_SCHEMA.index(('path', 'text'))] is None
+    assert [row[8] for row in iter_rows(path, batch_rows=3)] == [p['Path'] for p in rows]
+    assert os.path.getsize(os.path.join(path, 'path.bin')) == sum(len(p['Path'].encode('utf-8')) for p in rows)
+
+
+def test_empty_export(tmp_path):
+    path = str(tmp_path / 'empty.cols')
+    ColumnarWriter(path, PHOTO_SCHEMA).close()
+    assert list(iter_rows(path)) == []
+
+
+def test_parquet_round_trip(tmp_path, monkeypatch):
+    monkeypatch.setattr(columnar, 'pa', None)
+    monkeypatch.setattr(columnar, 'pq', None)
+    pytest.importorskip('pyarrow')
+    photos = [photo(i) for i in range(100)]
+    list(export_photos(iter(photos), str(tmp_path / 'photos.parquet'), batch_rows=32))
+    assert os.path.isfile(tmp_path / 'photos.parquet')
+    assert load_photos(str(tmp_path / 'photos.parquet')) == photos
+
+
+def test_unknown_equivalent_focal_round_trips_as_none(tmp_path):
+    p = photo(0)
+    p['Focal35'] = None
+    path = str(tmp_path / 'p.cols')
+    with ColumnarWriter(path, PHOTO_SCHEMA) as writer:
+        writer.append(columnar.photo_row(p))
+    assert load_photos(path) == [p]
+
+
+def ev(eid, t, etype='Sys'):
+    return {'Id': eid, 'TimeCreated': t, 'Type': etype}
+
+
+def test_events_round_trip_sorted_and_drops_bad_times(tmp_path):
+    events = [
+        ev(6006, '/Date(1700000300000)/'),
+        ev(6005, '/Date(1700000000000)/'),
+        ev(1033, '/Date(1700000100000)/', 'App'),
+        ev(41, 'not a time'),
+        ev(42, '/Date(1700000100000)/'),      # 与上面的安装同一毫秒
+    ]
+    path = columnar.export_events(events, str(tmp_path / 'events.parquet'), batch_rows=2)
+    assert path == str(tmp_path / 'events.cols')
+    # 按时间排序，同一时间的保持写入顺序；解析不了时间的被丢弃
+    assert columnar.load_events(path) == [
+        ev(6005, '/Date(1700000000000)/'),
+        ev(1033, '/Date(1700000100000)/', 'App'),
+        ev(42, '/Date(1700000100000)/'),
+        ev(6006, '/Date(1700000300000)/'),
+    ]
+
+
+def test_empty_event_export(tmp_path):
+    path = columnar.export_events([], str(tmp_path / 'none.cols'))
+    assert columnar.load_events(path) == []
+
+
+@pytest.mark.parametrize('rows, batch_rows', [(64, 64), (65, 64), (63, 64), (7, 1)])
+def test_batch_boundaries(tmp_path, rows, batch_rows):
+    # 行数恰好是批大小的整数倍 / 多一行 / 少一行，以及每行一批
+    photos = [photo(i) for i in range(rows)]
+    path = str(tmp_path / 'p.cols')
+    list(export_photos(iter(photos), path, batch_rows=batch_rows))
+    assert [photo_from_row(r) for r in iter_rows(path, batch_rows=batch_rows + 3)] == photos
+    assert [photo_from_row(r) for r in iter_rows(path, batch_rows=1)] == photos
+
+
+def test_npy_columns_are_readable_by_numpy(tmp_path):
+    np = pytest.importorskip('numpy')
+    photos = [photo(i) for i in range(100)]
+    path = str(tmp_path / 'p.cols')
+    list(export_photos(iter(photos), path, batch_rows=30))
+    iso = np.load(os.path.join(path, 'iso.npy'), mmap_mode='r')
+    assert iso.dtype == np.dtype('<i4') and iso.shape == (100,)
+    assert set(iso.tolist()) == {200}
+    ends = np.load(os.path.join(path, 'path.npy'))
+    assert ends[-1] == os.path.getsize(os.path.join(path, 'path.bin'))
@@ -0,0 +1,55 @@
+import datetime
+
+from combined import combine, join_photos, photo_times_from, session_index_from, PHOTOS, PHOTOS_ON_PC, SCREEN_SEC
+from digital_life import partition_by_year
+from sessions import SessionIndex, reconstruct_intervals
+
+
+def ts(*args):
+    return datetime.datetime(*args).timestamp()
+
+
+def ev(dt, eid):
+    return {'Id': eid, 'TimeCreated': dt.isoformat(), 'Type': 'Sys'}
+
+
+def test_join_known_answer():
+    # 3 月 1 日 22:00 开机到次日 02:00，跨午夜切开
+    index = SessionIndex([(ts(2024, 3, 1, 22), ts(2024, 3, 2, 2))])
+    photos = [ts(2024, 3, 1, 21, 59), ts(2024, 3, 1, 22), ts(2024, 3, 2, 1, 59), ts(2024, 3, 2, 2), ts(2024, 3, 5, 12)]
+    days = join_photos(iter(photos), index)
+    d1, d2, d5 = (datetime.date(2024, 3, d).toordinal() for d in (1, 2, 5))
+    assert days[d1][SCREEN_SEC] == 2 * 3600 and days[d2][SCREEN_SEC] == 2 * 3600
+    # 区间左闭右开：22:00 整算开机时拍的，02:00 整不算
+    assert (days[d1][PHOTOS], days[d1][PHOTOS_ON_PC]) == (2, 1)
+    assert (days[d2][PHOTOS], days[d2][PHOTOS_ON_PC]) == (2, 1)
+    assert days[d5] == [0.0, 1, 0]
+
+
+def test_combine_counts_blank_days_and_empty_input():
+    index = SessionIndex([(ts(2024, 3, 1, 9), ts(2024, 3, 1, 18))])
+    result = combine(iter([ts(2024, 3, 1, 12)]), index, datetime.date(2024, 3, 1), datetime.date(2024, 3, 3))
+    assert result['totals']['days'] == 3
+    assert result['totals']['both_days'] == 1
+    assert result['totals']['neither_days'] == 2
+    assert result['totals']['on_pc_share'] == 1.0
+    empty = combine(iter([]), SessionIndex([]))
+    assert empty['months'] == [] and empty['totals']['photos'] == 0
+
+
+def test_photo_times_filter_is_half_open():
+    photos = [{'DateObject': datetime.datetime(2024, 1, 1)}, {'DateObject': datetime.datetime(2025, 1, 1)}]
+    assert list(photo_times_from(photos, ts(2024, 1, 1), ts(2025, 1, 1))) == [ts(2024, 1, 1)]
+
+
+def test_session_index_matches_history_partitioning():
+    base = datetime.datetime(2023, 12, 31, 20)
+    events = [ev(base, 6005), ev(base + datetime.timedelta(hours=1), 42), ev(base + datetime.timedelta(hours=2), 1),
+              ev(base + datetime.timedelta(hours=6), 6006), {'Id': 6005, 'TimeCreated': 'garbage', 'Type': 'Sys'},
+              ev(base + datetime.timedelta(hours=7), 1033)]
+    _, timeline = partition_by_year(events)
+    assert session_index_from(events).intervals() == SessionIndex(reconstruct_intervals(timeline)).intervals()
+    assert session_index_from(events).intervals() == [
+        (base.timestamp(), (base + datetime.timedelta(hours=1)).timestamp()),
+        ((base + datetime.timedelta(hours=2)).timestamp(), (base + datetime.timedelta(hours=6)).timestamp()),
+    ]
@@ -0,0 +1,61 @@
+import datetime
+import random
+
+from correlation import correlate_crashes, merge_incidents, merge_windows, INCIDENT_MERGE_SECONDS
+from sessions import SessionIndex
+
+H = 3600
+T0 = datetime.datetime(2024, 3, 1, 12).timestamp()
+
+
+def brute_force(installs, crashes, window):
+    """嵌套循环的参照实现：崩溃前 window 秒内 (含两端) 有没有安装"""
+    return sum(1 for c in merge_incidents(crashes) if any(c - window <= i <= c for i in installs))
+
+
+def test_known_answer():
+    installs = [T0, T0 + 100 * H]
+    crashes = [T0 + 10 * H, T0 + 10 * H + 60, T0 + 50 * H, T0 + 80 * H]
+    r = correlate_crashes(installs, crashes, lookback_hours=24)
+    # 41 + 1001 在一分钟内：算一次事故；只有 T0+10h 落在安装后 24 小时内
+    assert r['incidents'] == 3
+    assert r['after_install'] == 1
+    assert r['suspect_days'] == [{'date': datetime.date(2024, 3, 1), 'crashes': 1, 'installs': 1}]
+
+
+def test_window_edges_are_inclusive():
+    installs = [T0]
+    assert correlate_crashes(installs, [T0], lookback_hours=1)['after_install'] == 1
+    assert correlate_crashes(installs, [T0 + H], lookback_hours=1)['after_install'] == 1
+    assert correlate_crashes(installs, [T0 + H + 1], lookback_hours=1)['after_install'] == 0
+    assert correlate_crashes(installs, [T0 - 1], lookback_hours=1)['after_install'] == 0
+
+
+def test_matches_nested_loop():
+    rng = random.Random(3)
+    for _ in range(50):
+        installs = sorted(T0 + rng.randrange(0, 400 * H) for _ in range(rng.randrange(0, 30)))
+        crashes = sorted(T0 + rng.randrange(0, 400 * H) for _ in range(rng.randrange(0, 30)))
+        window = rng.choice([1, 6, 72]) * H
+        assert correlate_crashes(installs, crashes, lookback_hours=window // H)['after_install'] == \
+            brute_force(installs, crashes, window)
+
+
+def test_empty_inputs():
+    r = correlate_crashes([], [])
+    assert (r['incidents'], r['after_install'], r['share'], r['ratio'], r['suspect_days']) == (0, 0, 0.0, None, [])
+    assert correlate_crashes([T0], [])['incidents'] == 0
+
+
+def test_rates_use_online_hours():
+    # 在线 100 小时，其中安装后窗口 (10 小时) 内崩溃 1 次，其余 90 小时崩溃 1 次
+    index = SessionIndex([(T0, T0 + 100 * H)])
+    r = correlate_crashes([T0 + 20 * H], [T0 + 25 * H, T0 + 60 * H], index, lookback_hours=10)
+    assert r['window_hours'] == 10.0
+    assert r['rate_after'] == 10.0
+    assert r['rate_baseline'] == round(100 / 90, 2)
+
+
+def test_merge_helpers():
+    assert merge_incidents([0, INCIDENT_MERGE_SECONDS, INCIDENT_MERGE_SECONDS + 1]) == [0, INCIDENT_MERGE_SECONDS + 1]
+    assert merge_windows([0, 5, 20], 10) == [[0, 15], [20, 30]]
@@ -0,0 +1,117 @@
+import json
+
+import pytest
+
+from digital_life import analyze_hybrid, build_dispatch, EVENT_HANDLERS
+from event_registry import EventRegistry, SESSION_KINDS
+
+
+def ev(eid, t, etype='Sys'):
+    return {'Id': eid, 'TimeCreated': t, 'Type': etype}
+
+
+def write_registry(tmp_path, events):
+    path = tmp_path / 'event_types.json'
+    path.write_text(json.dumps({'events': events}, ensure_ascii=False), encoding='utf-8')
+    return str(path)
+
+
+@pytest.fixture(scope='module')
+def registry():
+    return EventRegistry.load()
+
+
+def test_default_registry_lookup(registry):
+    assert registry.lookup('Sys', 6005)['class'] == 'boot'
+    assert registry.lookup('Sys', 1001)['handler'] == 'bsod'
+    assert registry.lookup('Sec', 4800)['class'] == 'lock'
+    # Type 标签也是键的一部分：同一个 Id 换了来源类型就不认
+    assert registry.lookup('App', 6005) is None
+    assert registry.lookup('Sys', 999999) is None
+
+
+def test_every_handler_and_class_is_wired(registry):
+    assert set(registry.handlers) <= set(EVENT_HANDLERS)
+    assert {e['class'] for e in registry.entries} <= set(SESSION_KINDS)
+    assert len(build_dispatch(registry)) == len(registry.entries)
+
+
+def test_session_kind_depends_on_presence_mode(registry):
+    assert registry.session_kind('Sys', 6005) == 'boot'
+    assert registry.session_kind('Sys', 1001) == 'crash'
+    assert registry.session_kind('App', 1033) == 'heartbeat'
+    assert registry.session_kind('Sec', 4800) == 'heartbeat'
+    assert registry.session_kind('Sec', 4800, presence=True) == 'lock'
+    assert registry.session_kind('Sys', 7001, presence=True) == 'unlock'
+    assert registry.session_kind('Sys', 12345) is None
+
+
+def test_match_respects_provider(registry):
+    # provider 为 null 的条目不限来源，指定了来源的条目必须完全一致
+    assert registry.match('System', 'Microsoft-Windows-Kernel-Power', 41)['class'] == 'crash'
+    assert registry.match('System', 'Microsoft-Windows-Winlogon', 7001)['class'] == 'logon'
+    assert registry.match('System', 'SomethingElse', 7001) is None
+    assert registry.match('Application', 'MsiInstaller', 6005) is None
+
+
+def test_build_query_groups_by_log_provider_type(registry):
+    script = registry.build_query('2024-01-01', '2025-01-01')
+    lines = script.splitlines()
+    assert lines[0] == '$s = Get-Date -Date "2024-01-01"'
+    assert lines[-1] == '$all | Sort-Object TimeCreated | ConvertTo-Json -Depth 1'
+    queries = [l for l in lines if 'Get-WinEvent' in l]
+    assert len(queries) == len(registry.groups()) == 5
+    assert "LogName='System'; Id=1,41,42,1001,6005,6006; StartTime=$s; EndTime=$e" in script
+    assert "ProviderName='Microsoft-Windows-Security-Auditing'; Id=4800,4801" in script
+    assert "Expression={'App'}" in script
+
+
+def test_build_query_dedupes_ids(tmp_path):
+    reg = EventRegistry.load(write_registry(tmp_path, [
+        {'log': 'System', 'id': 6005, 'type': 'Sys', 'class': 'boot'},
+        {'log': 'System', 'id': '6005', 'type': 'Sys', 'class': 'boot', 'handler': 'boot'},
+    ]))
+    assert reg.groups() == {('System', None, 'Sys'): [6005, 6005]}
+    assert "Id=6005;" in reg.build_query('2024-01-01', '2024-02-01')
+    # 重复条目以后出现的为准，handler 缺省取 class
+    assert reg.lookup('Sys', 6005)['handler'] == 'boot'
+    assert reg.handlers == ['boot']
+
+
+def test_empty_registry(tmp_path):
+    reg = EventRegistry.load(write_registry(tmp_path, []))
+    assert reg.groups() == {}
+    assert reg.build_query('2024-01-01', '2024-02-01').count('Get-WinEvent') == 0
+    stats = analyze_hybrid([ev(6005, '2024-03-04T09:00:00')], registry=reg)
+    assert stats['boot'] == 0 and stats['day_dist'] == {}
+
+
+def test_unknown_class_or_handler_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        EventRegistry.load(write_registry(tmp_path, [{'log': 'System', 'id': 1, 'type': 'Sys', 'class': 'party'}]))
+    reg = EventRegistry.load(write_registry(tmp_path, [
+        {'log': 'System', 'id': 1, 'type': 'Sys', 'class': 'wake', 'handler': 'nope'},
+    ]))
+    with pytest.raises(ValueError):
+        build_dispatch(reg)
+
+
+def test_analyze_dispatches_through_registry(registry):
+    events = [
+        ev(6005, '2024-03-02T09:00:00'),     # 周六开机
+        ev(1033, '2024-03-02T10:00:00', 'App'),
+        ev(1001, '2024-03-02T10:30:00'),
+        ev(41, '2024-03-02T10:30:01'),
+        ev(4801, '2024-03-02T11:00:00', 'Sec'),
+        ev(19, '2024-03-02T11:30:00'),
+        ev(6006, '2024-03-02T12:00:00'),
+        ev(6006, '2024-03-02T12:00:00', 'App'),  # Type 不匹配，忽略
+        ev(7777, '2024-03-02T12:00:00'),
+    ]
+    stats = analyze_hybrid(events, registry=registry)
+    assert (stats['boot'], stats['shutdown'], stats['crash'], stats['bsod']) == (1, 1, 1, 1)
+    assert (stats['install_count'], stats['update_count'], stats['unlock']) == (1, 1, 1)
+    assert stats['weekend_activity'] == 1
+    # 开机/安装/解锁各计一次活跃小时
+    assert (stats['hour_dist'][9], stats['hour_dist'][10], stats['hour_dist'][11]) == (1, 1, 1)
+    assert sum(stats['day_dist'].values()) == 7
@@ -0,0 +1,111 @@
+import datetime
+import json
+import random
+
+import pytest
+
+from event_store import EventStore, to_ms
+
+DAY = 24 * 3600 * 1000
+T0 = to_ms(datetime.datetime(2024, 3, 1))
+
+
+def ev(ms, eid, typ='Sys'):
+    return {'Id': eid, 'TimeCreated': f"/Date({ms})/", 'Type': typ}
+
+
+def rows(store):
+    return list(zip(store.times, store.ids, store.types))
+
+
+def test_range_counts_and_boundaries(tmp_path):
+    store = EventStore(str(tmp_path / 's.store'))
+    # 开机、装软件、关机，第二天再开机后崩溃
+    store.add([ev(T0, 6005), ev(T0 + 3600_000, 1033, 'App'), ev(T0 + 7200_000, 6006),
+               ev(T0 + DAY, 6005), ev(T0 + DAY + 60_000, 41)])
+    assert len(store) == 5
+    assert store.counts(T0, T0 + DAY) == {**{c: 0 for c in store.prefix}, 'boot': 1, 'install': 1, 'shutdown': 1}
+    # 区间左闭右开：恰好落在 t2 上的事件不算
+    assert store.counts(T0, T0 + DAY)['boot'] == 1
+    assert store.counts(T0, T0 + DAY + 1)['boot'] == 2
+    assert store.counts(T0 + 1, T0 + DAY + 1)['boot'] == 1
+    assert [e['Id'] for e in store.events_between(T0 + DAY, T0 + 2 * DAY)] == [6005, 41]
+    assert store.span(T0 - DAY, T0) == (0, 0)
+    assert store.index.intervals()[0] == (T0 / 1000, (T0 + 7200_000) / 1000)
+
+
+def test_duplicates_and_bad_rows_are_dropped():
+    store = EventStore()
+    store.add([ev(T0, 6005), ev(T0, 6005), {'Id': 1, 'TimeCreated': 'garbage', 'Type': 'Sys'}, ev(T0, 6005, 'Nope')])
+    store.add([ev(T0, 6005)])
+    assert rows(store) == [(T0, 6005, 0)]
+    store.add([])
+    assert len(store) == 1
+
+
+def test_incremental_add_matches_bulk_add():
+    rng = random.Random(7)
+    ids = [6005, 6006, 41, 1001, 42, 1, 7001]
+    events = [ev(T0 + rng.randrange(30 * DAY), rng.choice(ids)) for _ in range(600)]
+    bulk = EventStore()
+    bulk.add(events)
+    incremental = EventStore()
+    for i in range(0, len(events), 37):
+        incremental.add(events[i:i + 37])
+    assert rows(incremental) == rows(bulk) == sorted(set(rows(bulk)))
+    assert incremental.prefix == bulk.prefix
+    assert incremental.index.intervals() == bulk.index.intervals()
+
+
+def test_save_and_load_round_trip(tmp_path):
+    path = str(tmp_path / 's.store')
+    store = EventStore(path)
+    store.add([ev(T0, 6005), ev(T0 + 3600_000, 6006)])
+    store.mark_covered(T0, T0 + DAY)
+    store.save()
+    loaded = EventStore.load(path)
+    assert rows(loaded) == rows(store)
+    assert loaded.prefix == store.prefix
+    assert loaded.covered == [[T0, T0 + DAY]]
+    assert loaded.index.intervals() == store.index.intervals()
+    # 载入后继续增量入库，去重仍然有效
+    loaded.add([ev(T0, 6005), ev(T0 + DAY, 6005)])
+    assert len(loaded) == 3
+
+
+def test_missing_gaps():
+    store = EventStore()
+    store.mark_covered(10, 20)
+    store.mark_covered(30, 40)
+    store.mark_covered(20, 25)
+    assert store.covered == [[10, 25], [30, 40]]
+    assert store.missing(0, 50) == [(0, 10), (25, 30), (40, 50)]
+    assert store.missing(10, 25) == []
+
+
+class FakeCollector:
+    def __init__(self, replies):
+        self.replies = list(replies)
+
+    def run(self, script):
+        reply = self.replies.pop(0)
+        if isinstance(reply, Exception):
+            raise reply
+        return reply
+
+
+def test_ensure_marks_only_successful_past_gaps(capsys):
+    store = EventStore()
+    t1 = T0
+    t2 = T0 + 2 * DAY
+    store.mark_covered(t1 + DAY // 2, t1 + DAY)
+    # 第一段失败，第二段成功但没有事件
+    assert store.ensure(t1, t2, FakeCollector([RuntimeError("超时"), ''])) == 2
+    assert store.covered == [[t1 + DAY // 2, t2]]
+    assert store.ensure(t1, t2, FakeCollector([json.dumps([ev(T0 + 1000, 6005)])])) == 1
+    assert store.covered == [[t1, t2]]
+    assert len(store) == 1
+
+    future = to_ms(datetime.datetime.now()) + DAY
+    store.ensure(t2, future, FakeCollector(['[]']))
+    assert store.covered[-1][1] < future
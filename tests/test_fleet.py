@@ -0,0 +1,39 @@
+import os
+import time
+
+import fleet
+
+
+def fake_load(path):
+    # 模拟把解析器搞崩的导出文件：worker 进程直接退出
+    if 'poison' in path:
+        time.sleep(0.3)
+        os._exit(1)
+    time.sleep(0.05)
+    return []
+
+
+def test_crashing_host_only_isolates_in_flight_hosts(monkeypatch):
+    monkeypatch.setattr(fleet, 'load_host_events', fake_load)
+    isolated = []
+    run_isolated = fleet.run_isolated
+
+    def spy(path, timeout=fleet.HOST_TIMEOUT):
+        isolated.append(path)
+        return run_isolated(path, timeout)
+
+    monkeypatch.setattr(fleet, 'run_isolated', spy)
+    paths = [f'host{i:02d}.json' for i in range(12)] + ['poison.json'] + [f'host{i:02d}.json' for i in range(12, 24)]
+    results = fleet.run_fleet(paths, workers=2, timeout=30)
+
+    assert [r['host'] for r in results] == [fleet.host_name(p) for p in paths]
+    by_host = {r['host']: r['error'] for r in results}
+    assert by_host['poison'].startswith('worker 崩溃')
+    assert all(by_host[fleet.host_name(p)] == '没有可用事件' for p in paths if p != 'poison.json')
+    # 只有崩溃时已交给 worker 的主机 (正在运行 + 队列里排着的) 单独重跑，其余主机回到新的进程池
+    assert 'poison.json' in isolated
+    assert len(isolated) <= 2 * 2 + 1
+
+
+def test_empty_fleet():
+    assert fleet.run_fleet([], workers=2) == []
@@ -0,0 +1,92 @@
+import pytest
+
+from lens_info import CropTable, lens_name, UNKNOWN_LENS
+
+# (Make, Model, 裁切系数)：Make / Model 按相机实际写进 EXIF 的样子
+BODIES = [
+    ('FUJIFILM', 'GFX100S', 0.79),
+    ('FUJIFILM', 'X-T4', 1.5),
+    ('SONY', 'ILCE-7M3', 1.0),
+    ('SONY', 'ILCE-7RM4', 1.0),
+    ('SONY', 'ILCE-6400', 1.5),
+    ('SONY', 'ZV-E10', 1.5),
+    ('SONY', 'DSC-RX100M7', 2.7),
+    ('SONY', 'DSC-RX1RM2', 1.0),
+    ('NIKON CORPORATION', 'NIKON Z 6', 1.0),
+    ('NIKON CORPORATION', 'NIKON Z 50', 1.5),
+    ('NIKON CORPORATION', 'NIKON Z fc', 1.5),
+    ('NIKON CORPORATION', 'NIKON D850', 1.0),
+    ('NIKON CORPORATION', 'NIKON D3X', 1.0),
+    ('NIKON CORPORATION', 'NIKON D7500', 1.5),
+    ('NIKON CORPORATION', 'NIKON D300S', 1.5),
+    ('NIKON CORPORATION', 'NIKON D2Xs', 1.5),
+    ('Canon', 'Canon EOS R5', 1.0),
+    ('Canon', 'Canon EOS R', 1.0),
+    ('Canon', 'Canon EOS R7', 1.6),
+    ('Canon', 'Canon EOS Rebel T7i', 1.6),
+    ('Canon', 'Canon EOS 5D Mark IV', 1.0),
+    ('Canon', 'Canon EOS-1D X Mark III', 1.0),
+    ('Canon', 'Canon EOS 90D', 1.6),
+    ('Canon', 'Canon PowerShot G7 X Mark III', 2.7),
+    ('PENTAX Corporation', 'PENTAX K10D', 1.5),
+    ('PENTAX Corporation', 'PENTAX K-100D', 1.5),
+    ('PENTAX Corporation', 'PENTAX *ist DS', 1.5),
+    ('PENTAX', 'PENTAX K-5', 1.5),
+    ('PENTAX', 'PENTAX K-01', 1.5),
+    ('RICOH IMAGING COMPANY, LTD.', 'PENTAX K-1', 1.0),
+    ('RICOH IMAGING COMPANY, LTD.', 'PENTAX K-1 Mark II', 1.0),
+    ('RICOH IMAGING COMPANY, LTD.', 'PENTAX K-3 Mark III', 1.5),
+    ('RICOH IMAGING COMPANY, LTD.', 'PENTAX KP', 1.5),
+    ('RICOH IMAGING COMPANY, LTD.', 'RICOH GR III', 1.5),
+    ('OLYMPUS CORPORATION', 'E-M1MarkII', 2.0),
+    ('Panasonic', 'DC-S5', 1.0),
+    ('Panasonic', 'DC-GH5', 2.0),
+    ('LEICA CAMERA AG', 'LEICA Q2', 1.0),
+    ('LEICA CAMERA AG', 'LEICA CL', 1.5),
+    ('Hasselblad', 'X2D 100C', 0.79),
+    ('Apple', 'iPhone 15 Pro', None),
+]
+
+
+@pytest.fixture(scope='module')
+def table():
+    return CropTable.load()
+
+
+@pytest.mark.parametrize('make, model, crop', BODIES)
+def test_crop_factor(table, make, model, crop):
+    assert table.crop_factor(make, model) == crop
+
+
+def test_equivalent_prefers_exif_value(table):
+    assert table.equivalent(35.0, 52, 'PENTAX', 'PENTAX K-5') == 52
+    assert table.equivalent(35.0, None, 'PENTAX', 'PENTAX K-5') == 52
+    assert table.equivalent(35.0, None, 'Apple', 'iPhone 15 Pro') == 35
+    assert table.equivalent(None, None, 'PENTAX', 'PENTAX K-5') is None
+
+
+def test_lens_name():
+    assert lens_name('FUJIFILM', 'XF35mmF1.4 R') == 'FUJIFILM XF35mmF1.4 R'
+    assert lens_name('Sony', 'Sony FE 24-70mm F2.8 GM') == 'Sony FE 24-70mm F2.8 GM'
+    assert lens_name('Canon', None) == UNKNOWN_LENS
+
+
+def test_unknown_equivalent_focal_is_left_out_of_the_histogram():
+    import contextlib
+    import datetime
+    import io
+
+    import camera
+
+    def shot(focal, focal35):
+        taken = datetime.datetime(2024, 5, 1, 12)
+        return {'FocalLength': focal, 'Focal35': focal35, 'Month': 5, 'Hour': 12, 'Year': 2024, 'DateObject': taken,
+                'ShutterSpeed': '1/250s', 'Aperture': 'f/2.8', 'ApertureVal': 2.8, 'Camera': 'X-T4', 'ISO': 200}
+
+    # 第二张没有任何焦距信息：实际焦距图按 14mm 计，等效焦段不计入
+    with contextlib.redirect_stdout(io.StringIO()):
+        stats = camera.analyze_data([shot(35, 53), shot(14, None)])
+    assert stats['focal35_dist'] == {53: 1}
+    assert stats['focal35_unknown'] == 1
+    assert stats['focal_dist'] == {35: 1, 14: 1}
+    assert [r['focal35'] for _, r in stats['records'].long_fast.items()] == [53]
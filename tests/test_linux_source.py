@@ -0,0 +1,139 @@
+import struct
+
+from linux_source import (
+    BOOT_ID, BOOT_TIME, CRASH_ID, DEAD_PROCESS, RUN_LVL, SHUTDOWN_ID, SLEEP_ID,
+    SD_MESSAGE_SHUTDOWN, SD_MESSAGE_SLEEP_START, SD_MESSAGE_SLEEP_STOP, USER_PROCESS,
+    UTMP_RECORD, WAKE_ID, classify_journal_entry, events_from_journal, events_from_wtmp,
+    iter_utmp_records,
+)
+
+# 完整的 struct utmp 布局，用来造出真实的 384 字节记录 (pid/line/host 等填上非零内容，
+# 确保解析时这些字段确实被跳过)
+FULL_UTMP = struct.Struct('<h2xi32s4s32s256shhiii16s20s')
+assert FULL_UTMP.size == UTMP_RECORD.size
+
+
+def record(ut_type, sec, user=b'', usec=0):
+    return FULL_UTMP.pack(ut_type, 4242, b'tty1', b'ab', user, b'host.example',
+                          0, 0, 7, sec, usec, b'\x01' * 16, b'')
+
+
+def write_wtmp(tmp_path, *records, tail=b''):
+    path = tmp_path / 'wtmp'
+    path.write_bytes(b''.join(records) + tail)
+    return str(path)
+
+
+def ids(events):
+    return [(e['Id'], e['TimeCreated'], e['Type']) for e in events]
+
+
+def test_records_unpack_only_needed_fields(tmp_path):
+    path = write_wtmp(tmp_path, record(BOOT_TIME, 1700000000, b'reboot', 250000))
+    assert list(iter_utmp_records(path)) == [(BOOT_TIME, b'reboot' + b'\x00' * 26, 1700000000, 250000)]
+
+
+def test_empty_and_short_files_yield_nothing(tmp_path):
+    assert list(iter_utmp_records(write_wtmp(tmp_path))) == []
+    assert events_from_wtmp(write_wtmp(tmp_path, tail=b'\x02' * 100)) == []
+
+
+def test_trailing_partial_record_is_ignored(tmp_path):
+    path = write_wtmp(tmp_path, record(BOOT_TIME, 10), record(USER_PROCESS, 20),
+                      tail=record(DEAD_PROCESS, 30)[:200])
+    assert [r[2] for r in iter_utmp_records(path)] == [10, 20]
+
+
+def test_wtmp_boot_login_shutdown(tmp_path):
+    path = write_wtmp(
+        tmp_path,
+        record(BOOT_TIME, 100, b'reboot', 1500),
+        record(USER_PROCESS, 200, b'alice'),
+        record(DEAD_PROCESS, 300),
+        record(RUN_LVL, 400, b'shutdown'),
+    )
+    assert ids(events_from_wtmp(path)) == [
+        (BOOT_ID, '/Date(100001)/', 'Sys'),
+        (0, '/Date(200000)/', 'Beat'),
+        (0, '/Date(300000)/', 'Beat'),
+        (SHUTDOWN_ID, '/Date(400000)/', 'Sys'),
+    ]
+
+
+def test_wtmp_boot_without_shutdown_is_crash(tmp_path):
+    # 第二次开机前没有关机记录 -> 开机后 1ms 记一次崩溃；普通 runlevel 切换不算关机
+    path = write_wtmp(
+        tmp_path,
+        record(BOOT_TIME, 100),
+        record(RUN_LVL, 150, b'runlevel'),
+        record(BOOT_TIME, 500),
+        record(RUN_LVL, 600, b'shutdown'),
+        record(BOOT_TIME, 900),
+    )
+    assert ids(events_from_wtmp(path)) == [
+        (BOOT_ID, '/Date(100000)/', 'Sys'),
+        (BOOT_ID, '/Date(500000)/', 'Sys'),
+        (CRASH_ID, '/Date(500001)/', 'Sys'),
+        (SHUTDOWN_ID, '/Date(600000)/', 'Sys'),
+        (BOOT_ID, '/Date(900000)/', 'Sys'),
+    ]
+
+
+def test_classify_by_message_id_before_text():
+    assert classify_journal_entry({'MESSAGE_ID': SD_MESSAGE_SHUTDOWN, 'MESSAGE': 'PM: suspend entry'}) == SHUTDOWN_ID
+    assert classify_journal_entry({'MESSAGE_ID': SD_MESSAGE_SLEEP_START}) == SLEEP_ID
+    assert classify_journal_entry({'MESSAGE_ID': SD_MESSAGE_SLEEP_STOP}) == WAKE_ID
+
+
+def test_classify_by_text():
+    assert classify_journal_entry({'MESSAGE': 'System is rebooting.'}) == SHUTDOWN_ID
+    assert classify_journal_entry({'MESSAGE': '[ 12.3] PM: suspend entry (deep)'}) == SLEEP_ID
+    assert classify_journal_entry({'MESSAGE': 'PM: hibernation exit'}) == WAKE_ID
+    # 文本只在开头匹配的规则不能被中间出现的字样误触发
+    assert classify_journal_entry({'MESSAGE': 'user said System is rebooting'}) is None
+    # journald 对非 UTF-8 消息导出为字节数组
+    assert classify_journal_entry({'MESSAGE': [80, 77]}) is None
+    assert classify_journal_entry({}) is None
+
+
+def entry(boot, us, message=None, **extra):
+    e = {'_BOOT_ID': boot, '__REALTIME_TIMESTAMP': str(us)}
+    if message is not None:
+        e['MESSAGE'] = message
+    e.update(extra)
+    return e
+
+
+def test_journal_clean_shutdown_then_unclean_boot():
+    events = events_from_journal([
+        entry('a', 1000000),
+        entry('a', 2000000, 'PM: suspend entry'),
+        entry('a', 3000000, 'PM: suspend exit'),
+        entry('a', 4000000, MESSAGE_ID=SD_MESSAGE_SHUTDOWN),
+        entry('b', 10000000),
+        entry('b', 12000000, 'last words'),
+        entry('c', 20000000),
+    ])
+    assert ids(events) == [
+        (BOOT_ID, '/Date(1000)/', 'Sys'),
+        (SLEEP_ID, '/Date(2000)/', 'Sys'),
+        (WAKE_ID, '/Date(3000)/', 'Sys'),
+        (SHUTDOWN_ID, '/Date(4000)/', 'Sys'),
+        (BOOT_ID, '/Date(10000)/', 'Sys'),
+        # b 没有关机消息就换成了 c：b 的最后一条日志作心跳，c 开机后记崩溃
+        (0, '/Date(12000)/', 'Beat'),
+        (BOOT_ID, '/Date(20000)/', 'Sys'),
+        (CRASH_ID, '/Date(20001)/', 'Sys'),
+        # 当前启动还在运行，末尾补一次心跳
+        (0, '/Date(20000)/', 'Beat'),
+    ]
+
+
+def test_journal_skips_entries_without_timestamp():
+    assert events_from_journal([]) == []
+    events = events_from_journal([
+        {'_BOOT_ID': 'a'},
+        entry('a', 'garbage'),
+        entry('a', 5000000),
+    ])
+    assert ids(events) == [(BOOT_ID, '/Date(5000)/', 'Sys'), (0, '/Date(5000)/', 'Beat')]
@@ -0,0 +1,130 @@
+import random
+
+import pytest
+
+import photo_cube
+from photo_cube import MASK, OTHER, Dimension, PhotoCube, aperture_number, crosstab_payloads, iso_bin
+
+
+def photo(camera='A', focal=35, aperture='f/2.8', shutter='1/250s', iso=100, hour=10):
+    return {'Camera': camera, 'FocalLength': focal, 'Aperture': aperture,
+            'ShutterSpeed': shutter, 'ISO': iso, 'Hour': hour}
+
+
+@pytest.fixture(params=['numpy', 'python'])
+def backend(request, monkeypatch):
+    # 有 / 没有 NumPy 两条路径的结果必须一致
+    if request.param == 'python':
+        monkeypatch.setattr(photo_cube, 'np', None)
+    return request.param
+
+
+@pytest.fixture
+def cube():
+    c = PhotoCube()
+    c.add(photo('A', 35, 'f/2.8', '1/250s', 100, 10))
+    c.add(photo('A', 35, 'f/2.8', '1/320s', 100, 10))     # 快门归并到 1/250s，与上一张同格
+    c.add(photo('A', 85, 'f/11.0', '1/60s', 800, 23))
+    c.add(photo('B', 35, 'Unknown', 'Unknown', 0, 23))
+    c.add(photo('B', 24, 'f/4.0', '2.0s', 3200, 2), n=3)
+    return c
+
+
+def test_iso_bin_boundaries():
+    assert [iso_bin(v) for v in (0, None, 50, 199, 200, 399, 400, 6400, 12800, 102400)] == \
+        [None, None, 100, 100, 200, 200, 400, 6400, 12800, 12800]
+
+
+def test_cells_dedupe_identical_combinations(cube):
+    assert cube.total == 7
+    assert len(cube.cells) == 4
+    assert sorted(cube.cells.values()) == [1, 1, 2, 3]
+
+
+def test_group_by_and_marginal(cube, backend):
+    assert cube.marginal('camera') == {'A': 3, 'B': 4}
+    assert cube.marginal('shutter') == {'1/250s': 2, '1/60s': 1, None: 1, '2s': 3}
+    assert cube.group_by('camera', 'focal') == {('A', 35): 2, ('A', 85): 1, ('B', 35): 1, ('B', 24): 3}
+    assert cube.marginal('iso', where={'camera': 'B'}) == {None: 1, 3200: 3}
+    assert cube.marginal('camera', where={'hour': {23, 2}}) == {'A': 1, 'B': 4}
+    assert cube.marginal('focal', where={'aperture': lambda a: a is not None and aperture_number(a) <= 4}) == {35: 2, 24: 3}
+    # 不存在的取值 -> 空结果，不报错
+    assert cube.marginal('camera', where={'camera': 'Z'}) == {}
+
+
+def test_crosstab_orders_by_value_and_skips_unknown(cube, backend):
+    table = cube.crosstab('camera', 'aperture')
+    assert table['rows'] == ['A', 'B']
+    # 光圈按 f 值数值排序 (f/11 在 f/4 之后)，未知被跳过
+    assert table['cols'] == ['f/2.8', 'f/4.0', 'f/11.0']
+    assert table['cells'] == [[0, 0, 2], [1, 1, 3], [2, 0, 1]]
+    full = cube.crosstab('camera', 'aperture', skip_unknown=False)
+    assert full['cols'][-1] is None and [3, 1, 1] in full['cells']
+
+
+def test_crosstab_with_maps_and_explicit_axes(cube, backend):
+    table = cube.crosstab('focal', 'hour', cols=list(range(24)), maps={'focal': lambda f: f"{f}mm"})
+    assert table['rows'] == ['24mm', '35mm', '85mm']
+    assert len(table['cols']) == 24
+    assert table['cells'] == [[2, 0, 3], [10, 1, 2], [23, 1, 1], [23, 2, 1]]
+    # 两个原始取值归并到同一标签时张数相加
+    merged = cube.marginal('focal', maps={'focal': lambda f: 'wide' if f < 50 else 'tele'})
+    assert merged == {'wide': 6, 'tele': 1}
+
+
+def test_empty_cube(backend):
+    c = PhotoCube()
+    assert c.total == 0 and c.group_by('camera') == {}
+    assert c.crosstab('camera', 'focal') == {'rows': [], 'cols': [], 'cells': []}
+    payload = crosstab_payloads(c)
+    assert payload['camera_focal'] == {'rows': [], 'cols': [], 'cells': []}
+    assert payload['hour_focal']['camera'] is None and payload['hour_focal']['cells'] == []
+    assert payload['night_focal'] == []
+    assert payload['exposure'] == {'shutters': [], 'apertures': [], 'series': []}
+
+
+def test_dimension_overflow_goes_to_other():
+    d = Dimension('camera')
+    codes = [d.code(f"cam{i}") for i in range(MASK - 1)]
+    assert codes == list(range(1, MASK))
+    # 第 1023 种取值起全部记到"其他"，code 仍在 10 位以内
+    assert d.code('late1') == d.code('late2') == MASK
+    assert d.values[-1] == OTHER
+    assert d.code(None) == 0 and d.code('cam0') == 1
+    assert d.ordered({'cam2', OTHER, None, 'cam10'}) == ['cam10', 'cam2', OTHER, None]
+
+
+def test_crosstab_payloads_known_answer(cube, backend):
+    payload = crosstab_payloads(cube, primary_camera='A')
+    assert payload['camera_focal']['rows'] == ['A', 'B']       # 张数少的在下，热力图从下往上
+    assert payload['camera_focal']['cols'] == ['24mm', '35mm', '85mm']
+    assert payload['hour_focal']['camera'] == 'A'
+    assert payload['hour_focal']['rows'] == ['35mm', '85mm']
+    assert payload['night_focal'] == [['85mm', 1]]
+    exposure = payload['exposure']
+    assert exposure['shutters'] == ['1/250s', '1/60s', '2s']
+    assert exposure['apertures'] == ['f/2.8', 'f/4.0', 'f/11.0']
+    assert exposure['series'] == [
+        {'name': 'ISO 100', 'data': [[0, 0, 2]]},
+        {'name': 'ISO 800', 'data': [[1, 2, 1]]},
+        {'name': 'ISO 3200', 'data': [[2, 1, 3]]},
+    ]
+    # 主力机身不在库里时退回张数最多的相机
+    assert crosstab_payloads(cube, primary_camera='Z')['hour_focal']['camera'] == 'B'
+
+
+def test_backends_agree_on_random_library(monkeypatch):
+    rng = random.Random(3)
+    c = PhotoCube()
+    for _ in range(2000):
+        c.add(photo(rng.choice('ABCDEFGHIJ'), rng.choice([14, 24, 35, 50, 85, 200]),
+                    rng.choice(['f/1.8', 'f/2.8', 'f/8.0', 'Unknown']),
+                    rng.choice(['1/4000s', '1/500s', '1/60s', '1s', 'Unknown']),
+                    rng.choice([0, 100, 400, 1600, 6400]), rng.randrange(24)))
+    queries = lambda: (c.group_by('camera', 'focal', 'hour'),
+                       c.crosstab('focal', 'iso', where={'camera': {'A', 'B'}}),
+                       crosstab_payloads(c))
+    expected = queries()
+    assert sum(expected[0].values()) == 2000
+    monkeypatch.setattr(photo_cube, 'np', None)
+    assert queries() == expected
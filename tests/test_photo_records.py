@@ -0,0 +1,109 @@
+import datetime
+import random
+
+from photo_records import RecordBook, TopK, merge_books, photo_ident, records_html
+
+
+def photo(i, camera='X-T4', minutes=0, shutter=0.004, iso=200, focal=35, focal35=53, f_number=2.8, path=True):
+    taken = datetime.datetime(2024, 5, 1, 8) + datetime.timedelta(minutes=minutes)
+    p = {
+        'DateObject': taken, 'Camera': camera, 'FocalLength': focal, 'Focal35': focal35,
+        'Lens': 'XF 35mm', 'Aperture': f'f/{f_number}', 'ApertureVal': f_number,
+        'ShutterSpeed': f'{shutter}s', 'ShutterVal': shutter, 'ISO': iso,
+    }
+    if path:
+        p['Path'] = f'D:/照片/{i:05d}.jpg'
+    return p
+
+
+def snapshot(book):
+    return (
+        [(k, r['path']) for k, r in book.exposure.items()],
+        [(k, r['path']) for k, r in book.iso.items()],
+        [(k, r['path']) for k, r in book.long_fast.items()],
+        [(d, n, a['path'], b['path']) for d, n, a, b in book.busiest_days()],
+        [(c, a['path'], b['path']) for c, a, b in book.first_last_by_body()],
+    )
+
+
+def test_topk_keeps_largest_and_breaks_ties_by_ident():
+    top = TopK(3)
+    for ident, key in [('a', 5), ('b', 9), ('c', 5), ('d', 1), ('e', 5), ('b', 100)]:
+        top.push(key, ident, lambda p: p, ident)
+    # 重复的身份只算第一次；key 相同按身份字符串取较大的
+    assert top.items() == [(9, 'b'), (5, 'e'), (5, 'c')]
+    assert top.idents == {'b', 'c', 'e'}
+
+
+def test_topk_record_fn_only_called_for_entries():
+    calls = []
+    top = TopK(1)
+    top.push(10, 'a', lambda p: calls.append(p) or p, 'a')
+    top.push(3, 'b', lambda p: calls.append(p) or p, 'b')
+    assert calls == ['a']
+
+
+def test_known_answer_records():
+    book = RecordBook(k=2)
+    book.add(photo(1, minutes=0, shutter=1/250, iso=100, focal35=200, f_number=5.6))
+    book.add(photo(2, minutes=60, shutter=2.0, iso=6400, focal35=200, f_number=2.8))
+    book.add(photo(3, camera='GR', minutes=24 * 60, shutter=30.0, iso=0, focal35=None, f_number=2.8))
+    book.add(photo(4, camera='GR', minutes=25 * 60, shutter=None, iso=800, focal35=28, f_number=None))
+    assert [(k, r['path'][-9:]) for k, r in book.exposure.items()] == [(30.0, '00003.jpg'), (2.0, '00002.jpg')]
+    assert [k for k, _ in book.iso.items()] == [6400, 800]
+    # 没有等效焦距 / 没有光圈值的照片不进 "长焦大光圈" 榜
+    assert [k for k, _ in book.long_fast.items()] == [(200, -2.8), (200, -5.6)]
+    days = book.busiest_days()
+    assert [(d.isoformat(), n) for d, n, _, _ in days] == [('2024-05-01', 2), ('2024-05-02', 2)]
+    assert days[0][2]['path'].endswith('00001.jpg') and days[0][3]['path'].endswith('00002.jpg')
+    assert [c for c, _, _ in book.first_last_by_body()] == ['X-T4', 'GR']
+
+
+def test_merge_equals_single_pass():
+    rng = random.Random(11)
+    photos = [photo(i, camera=rng.choice(['A', 'B', 'C']), minutes=rng.randrange(0, 10 * 24 * 60, 30),
+                    shutter=rng.choice([1/1000, 1/60, 0.5, 4.0, None]), iso=rng.choice([100, 800, 3200, 0]),
+                    focal35=rng.choice([24, 50, 200, None]), f_number=rng.choice([1.4, 2.8, 8.0]))
+              for i in range(500)]
+    single = RecordBook()
+    for p in photos:
+        single.add(p)
+    # 随机切成几份、每份乱序统计，合并结果与一次性统计完全相同
+    rng.shuffle(photos)
+    parts = [RecordBook() for _ in range(4)]
+    for i, p in enumerate(photos):
+        parts[i % 4].add(p)
+    assert snapshot(merge_books(parts)) == snapshot(single)
+    assert snapshot(merge_books(parts[::-1])) == snapshot(single)
+    assert merge_books(parts).day_counts == single.day_counts
+
+
+def test_merge_dedupes_same_photo_in_rankings():
+    a, b = RecordBook(), RecordBook()
+    p = photo(1, shutter=10.0)
+    a.add(p)
+    b.add(p)
+    b.add(photo(2, shutter=1.0))
+    merged = merge_books([a, b])
+    assert [r['path'][-9:] for _, r in merged.exposure.items()] == ['00001.jpg', '00002.jpg']
+    # 榜单按路径去重，按天计数照样相加 (文档约定)
+    assert sum(merged.day_counts.values()) == 3
+    # merge_books 不修改传入的对象
+    assert len(a.exposure.heap) == 1
+
+
+def test_ident_falls_back_to_camera_and_time():
+    p = photo(1, path=False)
+    assert photo_ident(p) == 'X-T4@2024-05-01T08:00:00'
+    book = RecordBook()
+    book.add(p)
+    book.add(dict(p))
+    assert len(book.iso.items()) == 1
+    assert book.exposure.items()[0][1]['path'] is None
+
+
+def test_empty_book():
+    book = merge_books([])
+    assert snapshot(book) == ([], [], [], [], [])
+    html = records_html(book)
+    assert html.count('没有数据') == 5
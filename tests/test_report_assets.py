@@ -0,0 +1,44 @@
+import hashlib
+
+import pytest
+
+import report_assets
+from report_assets import load_echarts
+
+SCRIPT = b'var echarts = {}; // </script>'
+
+
+def no_network(*args, **kwargs):
+    raise AssertionError("离线模式不应该联网")
+
+
+@pytest.fixture(autouse=True)
+def pinned(monkeypatch):
+    monkeypatch.setattr(report_assets.urllib.request, 'urlopen', no_network)
+    monkeypatch.setattr(report_assets, 'ECHARTS_SHA256', hashlib.sha256(SCRIPT).hexdigest())
+
+
+def test_inlines_verified_copy(tmp_path):
+    path = tmp_path / 'echarts.min.js'
+    path.write_bytes(SCRIPT)
+    assert load_echarts(str(path)) == 'var echarts = {}; // <\\/script>'
+
+
+def test_missing_file_fails_without_downloading(tmp_path):
+    with pytest.raises(RuntimeError, match='python report_assets.py'):
+        load_echarts(str(tmp_path / 'echarts.min.js'))
+
+
+def test_tampered_file_is_rejected(tmp_path):
+    path = tmp_path / 'echarts.min.js'
+    path.write_bytes(SCRIPT + b'alert(1)')
+    with pytest.raises(RuntimeError, match='SHA-256'):
+        load_echarts(str(path))
+
+
+def test_unpinned_digest_is_rejected(tmp_path, monkeypatch):
+    monkeypatch.setattr(report_assets, 'ECHARTS_SHA256', '')
+    path = tmp_path / 'echarts.min.js'
+    path.write_bytes(SCRIPT)
+    with pytest.raises(RuntimeError, match='ECHARTS_SHA256'):
+        load_echarts(str(path))
@@ -0,0 +1,152 @@
+import datetime
+import http.client
+import os
+import shutil
+import threading
+import time
+
+import pytest
+
+import columnar
+from columnar import PHOTO_SCHEMA, ColumnarWriter, photo_row
+from report_server import RenderCache, accepts_gzip, collect_snapshots, make_server
+
+
+# ---------- RenderCache ----------
+def test_single_flight_renders_once():
+    cache = RenderCache(4)
+    calls = []
+    gate = threading.Event()
+
+    def render():
+        calls.append(1)
+        gate.wait(1)
+        return {'body': b'x'}
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get('k', render))) for _ in range(20)]
+    for t in threads:
+        t.start()
+    time.sleep(0.05)
+    gate.set()
+    for t in threads:
+        t.join()
+    assert len(calls) == 1
+    assert len(results) == 20 and all(r is results[0] for r in results)
+    assert (cache.misses, cache.hits) == (1, 19)
+    assert cache.pending == {}
+
+
+def test_failed_render_is_not_cached():
+    cache = RenderCache(4)
+
+    def boom():
+        raise ValueError("空时间段")
+
+    with pytest.raises(ValueError):
+        cache.get('k', boom)
+    assert cache.pending == {} and cache.peek('k') is None
+    assert cache.get('k', lambda: 'ok') == 'ok'
+
+
+def test_lru_evicts_oldest():
+    cache = RenderCache(2)
+    cache.get('a', lambda: 'A')
+    cache.get('b', lambda: 'B')
+    cache.get('a', lambda: 'A2')     # 命中，a 变成最近使用
+    cache.get('c', lambda: 'C')
+    assert list(cache.entries) == ['a', 'c']
+
+
+# ---------- Accept-Encoding ----------
+@pytest.mark.parametrize('header, expected', [
+    ('gzip, deflate, br', True),
+    ('gzip;q=0', False),
+    ('gzip; q=0.0, deflate', False),
+    ('deflate;q=1, gzip;q=0.5', True),
+    ('*', True),
+    ('*;q=0', False),
+    ('*, gzip;q=0', False),
+    ('identity', False),
+    ('', False),
+    (None, False),
+])
+def test_accepts_gzip(header, expected):
+    assert accepts_gzip(header) is expected
+
+
+# ---------- HTTP ----------
+def photo(i):
+    taken = datetime.datetime(2024, 3, 1, 9) + datetime.timedelta(hours=5 * i)
+    return {
+        'FocalLength': 35, 'Month': taken.month, 'Hour': taken.hour, 'Year': taken.year,
+        'DateObject': taken, 'ShutterSpeed': '1/250s', 'ShutterVal': 0.004,
+        'Aperture': 'f/2.8', 'ApertureVal': 2.8, 'Camera': 'X-T4', 'ISO': 200,
+        'Path': f'/photos/{i}.jpg', 'Focal35': 53, 'Lens': 'XF 35mm',
+    }
+
+
+@pytest.fixture
+def server(tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr(columnar, 'pa', False)
+    monkeypatch.setattr(columnar, 'pq', False)
+    path = str(tmp_path / 'trip.cols')
+    with ColumnarWriter(path, PHOTO_SCHEMA) as writer:
+        for i in range(40):
+            writer.append(photo_row(photo(i)))
+    srv = make_server(collect_snapshots(photos=[path]), port=0, quiet=True)
+    thread = threading.Thread(target=srv.serve_forever, daemon=True)
+    thread.start()
+    srv.export_path = path
+    yield srv
+    srv.shutdown()
+    srv.server_close()
+
+
+def get(srv, path, **headers):
+    conn = http.client.HTTPConnection('127.0.0.1', srv.server_address[1])
+    conn.request('GET', path, headers=headers)
+    resp = conn.getresponse()
+    body = resp.read()
+    conn.close()
+    return resp, body
+
+
+def test_etags_and_revalidation(server):
+    plain, body = get(server, '/photo?host=trip')
+    assert plain.status == 200 and b'<html' in body
+    packed, _ = get(server, '/photo?host=trip', **{'Accept-Encoding': 'gzip'})
+    assert packed.getheader('Content-Encoding') == 'gzip'
+    assert packed.getheader('ETag') == plain.getheader('ETag')[:-1] + '-gz"'
+    assert server.cache.misses == 1
+
+    for etag in (plain.getheader('ETag'), packed.getheader('ETag')):
+        resp, body = get(server, '/photo?host=trip', **{'If-None-Match': etag})
+        assert (resp.status, body, resp.getheader('ETag')) == (304, b'', etag)
+    resp, _ = get(server, '/photo?host=trip', **{'If-None-Match': '*', 'Accept-Encoding': 'gzip'})
+    assert (resp.status, resp.getheader('ETag')) == (304, packed.getheader('ETag'))
+    resp, _ = get(server, '/photo?host=trip', **{'If-Modified-Since': plain.getheader('Last-Modified')})
+    assert (resp.status, resp.getheader('ETag')) == (304, plain.getheader('ETag'))
+
+    resp, _ = get(server, '/photo?host=trip', **{'Accept-Encoding': 'gzip;q=0'})
+    assert resp.getheader('Content-Encoding') is None
+
+
+def test_star_does_not_hide_missing_page(server):
+    # 这一年没有照片：即使带 If-None-Match: * 也要 404，而不是 304
+    resp, _ = get(server, '/photo?host=trip&year=1999', **{'If-None-Match': '*'})
+    assert resp.status == 404
+
+
+def test_deleted_snapshot_is_404(server):
+    shutil.rmtree(server.export_path)
+    resp, body = get(server, '/photo?host=trip')
+    assert resp.status == 404
+    assert '快照不存在' in body.decode('utf-8')
+    resp, _ = get(server, '/')
+    assert resp.status == 200
+
+
+def test_unknown_host_and_bad_range(server):
+    assert get(server, '/photo?host=nope')[0].status == 404
+    assert get(server, '/photo?host=trip&range=2024-05-01~2024-04-01')[0].status == 400
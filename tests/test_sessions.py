@@ -0,0 +1,12 @@
+from sessions import reconstruct_intervals
+
+
+def test_crash_records_after_reboot_belong_to_previous_session():
+    # 崩溃后下一次开机时依次写入 41 和 1001 (synth.py 生成的就是这种模式)
+    timeline = [(0, 'boot'), (100, 'heartbeat'), (1000, 'boot'), (1002, 'crash'), (1030, 'crash'), (2000, 'shutdown')]
+    assert reconstruct_intervals(timeline) == [(0, 100), (1000, 2000)]
+
+
+def test_crash_without_reboot_truncates_at_last_heartbeat():
+    timeline = [(0, 'boot'), (100, 'heartbeat'), (150, 'crash'), (300, 'wake'), (400, 'shutdown')]
+    assert reconstruct_intervals(timeline) == [(0, 100), (300, 400)]
@@ -0,0 +1,70 @@
+import sys
+import threading
+import time
+
+import pytest
+
+import tracing
+
+
+@pytest.fixture(autouse=True)
+def enabled():
+    tracing.enable(True)
+    tracing.reset()
+    yield
+    tracing.enable(False)
+    tracing.reset()
+
+
+def test_counts_from_many_threads_add_up():
+    # 频繁切换线程，让没加锁的读改写更容易丢更新
+    old = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        def work():
+            for _ in range(2000):
+                tracing.count('photos', reason='ok')
+                with tracing.span('exif'):
+                    pass
+        threads = [threading.Thread(target=work) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    finally:
+        sys.setswitchinterval(old)
+    data = tracing.to_json()
+    assert data['counters']['photos'] == [{'labels': {'reason': 'ok'}, 'value': 16000}]
+    assert data['spans']['exif']['calls'] == 16000
+
+
+def test_span_cpu_is_per_thread():
+    stop = time.perf_counter() + 0.3
+
+    def spin():
+        while time.perf_counter() < stop:
+            pass
+
+    busy = threading.Thread(target=spin)
+    busy.start()
+    with tracing.span('idle'):
+        time.sleep(0.2)
+    busy.join()
+    s = tracing.to_json()['spans']['idle']
+    assert s['wall_s'] >= 0.2
+    # 另一个线程在空转，但这个 span 自己几乎不占 CPU
+    assert s['cpu_s'] < 0.05
+
+
+def test_disabled_records_nothing():
+    tracing.enable(False)
+    tracing.count('photos')
+    with tracing.span('exif'):
+        pass
+    assert tracing.to_json() == {'spans': {}, 'counters': {}}
+    assert tracing.to_prometheus() == '\n'
+
+
+def test_prometheus_labels_are_escaped():
+    tracing.count('skipped', reason='bad "exif"')
+    assert 'digital_life_skipped_total{reason="bad \\"exif\\""} 1' in tracing.to_prometheus()
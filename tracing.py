@@ -0,0 +1,256 @@
+import os
+import re
+import sys
+import json
+import time
+import atexit
+import functools
+import threading
+
+# ================= 配置区 =================
+# 设置 DIGITAL_LIFE_TRACE=1 打开统计；DIGITAL_LIFE_TRACE_OUT 指定退出时导出的文件
+# (.prom / .txt 为 Prometheus 文本格式，其余为 JSON)
+ENABLED = os.environ.get("DIGITAL_LIFE_TRACE", "") not in ("", "0")
+TRACE_OUT = os.environ.get("DIGITAL_LIFE_TRACE_OUT")
+# 进度条最短刷新间隔 (秒)
+PROGRESS_INTERVAL = 0.2
+METRIC_PREFIX = "digital_life"
+# ========================================
+
+# 关闭时所有入口都在第一行直接返回，span() 复用同一个空上下文，不分配对象
+_spans = {}      # 名字 -> {'calls', 'wall_s', 'cpu_s', 'max_wall_s'}
+_counters = {}   # (名字, ((标签, 值), ...)) -> 数值
+# 后台扫描在多个线程里同时记 span / 计数，读改写要加锁
+_lock = threading.Lock()
+
+def enable(on=True):
+    global ENABLED
+    ENABLED = on
+
+def reset():
+    with _lock:
+        _spans.clear()
+        _counters.clear()
+
+def _snapshot():
+    """导出用的副本：(span 名字 -> 统计, 计数器)，不会在遍历时被其他线程改动"""
+    with _lock:
+        return {name: dict(s) for name, s in _spans.items()}, dict(_counters)
+
+class _NoopSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_NOOP = _NoopSpan()
+
+class _Span:
+    __slots__ = ('name', 'wall', 'cpu')
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.wall = time.perf_counter()
+        # 只算当前线程的 CPU 时间，多线程时不会把别的线程也算进来
+        self.cpu = time.thread_time()
+        return self
+
+    def __exit__(self, *exc):
+        wall = time.perf_counter() - self.wall
+        cpu = time.thread_time() - self.cpu
+        with _lock:
+            s = _spans.get(self.name)
+            if s is None:
+                s = _spans[self.name] = {'calls': 0, 'wall_s': 0.0, 'cpu_s': 0.0, 'max_wall_s': 0.0}
+            s['calls'] += 1
+            s['wall_s'] += wall
+            s['cpu_s'] += cpu
+            if wall > s['max_wall_s']:
+                s['max_wall_s'] = wall
+        return False
+
+def span(name):
+    """with span('analyze_hybrid'): ...  统计墙钟时间与 CPU 时间"""
+    if not ENABLED:
+        return _NOOP
+    return _Span(name)
+
+def traced(name=None):
+    """函数装饰器版的 span，名字默认取函数名"""
+    def decorator(fn):
+        label = name or fn.__name__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not ENABLED:
+                return fn(*args, **kwargs)
+            with _Span(label):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def count(name, n=1, **labels):
+    """计数器，例如 count('photos_skipped', reason='no_exif')"""
+    if not ENABLED:
+        return
+    key = (name, tuple(sorted((k, str(v)) for k, v in labels.items())))
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + n
+
+class Progress:
+    """
+    stderr 上的单行进度条：已完成 / 总数、每秒处理量、预计剩余时间。
+    stderr 是终端或开启了统计时显示；total 未知、输出被重定向到文件 (例如 batch 的任务日志) 时什么都不输出。
+    """
+
+    def __init__(self, total, label):
+        self.total = total
+        self.label = label
+        self.done = self.drawn = 0
+        self.active = total > 0 and (ENABLED or _isatty(sys.stderr))
+        self.start = self.last = time.perf_counter()
+
+    def update(self, n=1):
+        self.done += n
+        if not self.active:
+            return
+        now = time.perf_counter()
+        if now - self.last >= PROGRESS_INTERVAL or self.done >= self.total:
+            self.last = now
+            self._draw(now)
+
+    def _draw(self, now):
+        self.drawn = self.done
+        elapsed = now - self.start
+        rate = self.done / elapsed if elapsed > 0 else 0.0
+        eta = (self.total - self.done) / rate if rate > 0 else 0.0
+        width = 30
+        filled = int(width * self.done / self.total)
+        bar = '█' * filled + '░' * (width - filled)
+        sys.stderr.write(f"\r   {self.label} {bar} {self.done}/{self.total} · {rate:.0f}/s · 剩余 {eta:.0f}s ")
+        sys.stderr.flush()
+
+    def close(self):
+        if self.active:
+            if self.drawn != self.done:
+                self._draw(time.perf_counter())
+            sys.stderr.write("\n")
+            self.active = False
+
+def progress(total, label):
+    return Progress(total, label)
+
+def _isatty(stream):
+    try:
+        return stream.isatty()
+    except (AttributeError, ValueError):
+        return False
+
+class Stage:
+    """
+    流水线的一个阶段：真正开始时打印 "[i/n] 标题..."，结束时打印耗时 (以及 note)，
+    不管是否开启统计都会输出；开启统计时同时记一个 span。出异常时不打印完成。
+    """
+
+    def __init__(self, step, total, label, name=None):
+        self.prefix = f"[{step}/{total}]"
+        self.label = label
+        self.span = span(name or label)
+        self.note = ''
+
+    def __enter__(self):
+        print(f"   {self.prefix} {self.label}...")
+        self.start = time.perf_counter()
+        self.span.__enter__()
+        return self
+
+    def __exit__(self, *exc):
+        self.span.__exit__(*exc)
+        if exc[0] is None:
+            note = f" · {self.note}" if self.note else ''
+            print(f"   ✅ {self.prefix} {self.label} 完成{note} · {time.perf_counter() - self.start:.1f}s")
+        return False
+
+def stage(step, total, label, name=None):
+    """with stage(1, 3, '正在解析图像 EXIF 元数据', 'exif') as st: ...; st.note = '1234 张'"""
+    return Stage(step, total, label, name)
+
+# ---------- 导出 ----------
+def to_json():
+    spans, raw = _snapshot()
+    counters = {}
+    for (name, labels), value in sorted(raw.items()):
+        counters.setdefault(name, []).append({'labels': dict(labels), 'value': value})
+    return {
+        'spans': {name: {k: round(v, 6) if isinstance(v, float) else v for k, v in s.items()}
+                  for name, s in sorted(spans.items())},
+        'counters': counters,
+    }
+
+def _metric_name(name):
+    return f"{METRIC_PREFIX}_{re.sub(r'[^a-zA-Z0-9_]', '_', name)}"
+
+def _label_str(labels):
+    if not labels:
+        return ''
+    parts = []
+    for k, v in labels:
+        v = str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        parts.append(f'{k}="{v}"')
+    return '{' + ','.join(parts) + '}'
+
+def to_prometheus():
+    """Prometheus 文本格式 (可以交给 node_exporter 的 textfile collector)"""
+    spans, counters = _snapshot()
+    lines = []
+    span_metrics = (
+        ('span_calls_total', 'calls', 'counter', '阶段调用次数'),
+        ('span_wall_seconds_total', 'wall_s', 'counter', '阶段累计墙钟时间'),
+        ('span_cpu_seconds_total', 'cpu_s', 'counter', '阶段累计 CPU 时间'),
+        ('span_max_wall_seconds', 'max_wall_s', 'gauge', '阶段单次最长墙钟时间'),
+    )
+    if spans:
+        for metric, field, kind, help_text in span_metrics:
+            name = _metric_name(metric)
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for span_name, s in sorted(spans.items()):
+                lines.append(f"{name}{_label_str([('span', span_name)])} {s[field]}")
+
+    by_name = {}
+    for (name, labels), value in sorted(counters.items()):
+        by_name.setdefault(name, []).append((labels, value))
+    for name, rows in by_name.items():
+        metric = _metric_name(name if name.endswith('_total') else name + '_total')
+        lines.append(f"# TYPE {metric} counter")
+        for labels, value in rows:
+            lines.append(f"{metric}{_label_str(labels)} {value}")
+    return '\n'.join(lines) + '\n'
+
+def dump(path):
+    text = to_prometheus() if path.endswith(('.prom', '.txt')) else json.dumps(to_json(), ensure_ascii=False, indent=2)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+    return path
+
+def print_summary(file=None):
+    """各阶段耗时一览 (按墙钟时间从长到短)"""
+    file = file or sys.stderr
+    spans, _ = _snapshot()
+    if not spans:
+        return
+    print("\n⏱️  阶段耗时:", file=file)
+    for name, s in sorted(spans.items(), key=lambda x: -x[1]['wall_s']):
+        print(f"   {name:<24} {s['calls']:>7} 次  墙钟 {s['wall_s']:8.3f}s  CPU {s['cpu_s']:8.3f}s", file=file)
+
+def _at_exit():
+    if not ENABLED:
+        return
+    print_summary()
+    if TRACE_OUT:
+        print(f"📈 统计已导出: {os.path.abspath(dump(TRACE_OUT))}", file=sys.stderr)
+
+atexit.register(_at_exit)